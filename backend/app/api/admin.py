@@ -1,19 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date, timedelta
 
-from app.database import get_db
-from app.models.database_models import Admin, Event
+from app.api.licenses import LicenseResponse
+from app.database import get_db, run_write
+from app.models.database_models import Event
+from app.repositories import event_stats as event_stats_repository
+from app.repositories import events as event_repository
+from app.repositories import licenses as license_repository
+from app.services.admin_cache import AdminPrincipal, admin_auth_cache
 from app.services.auth_service import (
     authenticate_admin,
+    check_login_rate,
     create_access_token,
     get_current_admin,
     get_password_hash,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from app.services.container import ServiceContainer, get_services
+from app.services.event_cache import event_cache
+from app.services.event_stats import summarize_event_stats
+from app.services.export_service import (
+    parquet_available,
+    resolve_export_fields,
+    stream_event_images_zip,
+    stream_licenses_csv,
+    stream_licenses_parquet,
+)
+from app.services.job_service import job_registry
+from app.services.license_archive import restore_event_licenses
+from app.services.license_counter import license_counter
+from app.services.storage_maintenance import purge_event_objects, tier_original_images
+from app.utils.client_ip import client_ip
 
 router = APIRouter()
 
@@ -47,6 +70,13 @@ class EventUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class TierOriginalsRequest(BaseModel):
+    event_id: Optional[int] = None
+    older_than_days: Optional[int] = Field(None, ge=0)
+    quality: int = Field(80, ge=1, le=95)
+    max_dimension: int = Field(2048, ge=256)
+
+
 class EventResponse(BaseModel):
     id: int
     event_code: str
@@ -61,13 +91,56 @@ class EventResponse(BaseModel):
         from_attributes = True
 
 
+def _event_to_response(event: Event) -> EventResponse:
+    """EventモデルをEventResponseに変換するヘルパー"""
+    return EventResponse(
+        id=event.id,
+        event_code=event.event_code,
+        name=event.name,
+        issue_location=event.issue_location,
+        issue_date=event.issue_date,
+        auto_issue_date=event.auto_issue_date or False,
+        is_active=event.is_active,
+        created_at=event.created_at.isoformat() if event.created_at else None
+    )
+
+
+def _update_event(db: Session, event_id: int, changes: dict) -> Optional[EventResponse]:
+    """
+    イベントを更新する（run_writeから呼び出す）
+    アーカイブ済みのイベントを有効に戻す場合は、保存を受け付ける前に免許証を licenses に戻す
+    """
+    event = event_repository.update_event(db, event_id, changes)
+    if event is None:
+        return None
+    if event.is_active and event.licenses_archived_at is not None:
+        moved = restore_event_licenses(db, event_id)
+        print(f"[Archive] Restored {moved} licenses of event {event_id}")
+    return _event_to_response(event)
+
+
+def _delete_event(db: Session, event_id: int) -> int:
+    """
+    イベントと免許証を削除する（run_writeから呼び出す）
+
+    Returns:
+        int: 削除した免許証の件数
+    """
+    deleted_licenses = license_repository.delete_licenses_by_event(db, event_id)
+    event_stats_repository.delete_event_stats(db, event_id)
+    event_repository.delete_event(db, event_id)
+    return deleted_licenses
+
+
 # === 認証エンドポイント ===
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    admin = authenticate_admin(db, form_data.username, form_data.password)
+    check_login_rate(client_ip(request), form_data.username)
+    admin = await authenticate_admin(db, form_data.username, form_data.password)
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,7 +156,7 @@ async def login(
 
 @router.get("/me", response_model=AdminInfo)
 async def get_current_admin_info(
-    current_admin: Admin = Depends(get_current_admin)
+    current_admin: AdminPrincipal = Depends(get_current_admin)
 ):
     return current_admin
 
@@ -91,121 +164,253 @@ async def get_current_admin_info(
 # === イベント管理エンドポイント ===
 @router.get("/events", response_model=List[EventResponse])
 async def list_events(
-    current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
-    events = db.query(Event).order_by(Event.created_at.desc()).all()
-    return [
-        EventResponse(
-            id=e.id,
-            event_code=e.event_code,
-            name=e.name,
-            issue_location=e.issue_location,
-            issue_date=e.issue_date,
-            auto_issue_date=e.auto_issue_date or False,
-            is_active=e.is_active,
-            created_at=e.created_at.isoformat() if e.created_at else None
-        )
-        for e in events
-    ]
+    events = await event_repository.list_events(db)
+    return [_event_to_response(e) for e in events]
 
 
 @router.post("/events", response_model=EventResponse)
 async def create_event(
     event: EventCreate,
-    current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     import uuid
-    new_event = Event(
+    fields = dict(
         event_code=str(uuid.uuid4())[:8],
         name=event.name,
         issue_location=event.issue_location,
         issue_date=event.issue_date,
         auto_issue_date=event.auto_issue_date,
     )
-    db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
-    return EventResponse(
-        id=new_event.id,
-        event_code=new_event.event_code,
-        name=new_event.name,
-        issue_location=new_event.issue_location,
-        issue_date=new_event.issue_date,
-        auto_issue_date=new_event.auto_issue_date or False,
-        is_active=new_event.is_active,
-        created_at=new_event.created_at.isoformat() if new_event.created_at else None
-    )
+    new_event = await run_write(lambda session: _event_to_response(event_repository.add_event(session, **fields)))
+    event_cache.invalidate(new_event.id, new_event.event_code)
+    return new_event
 
 
 @router.get("/events/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: int,
-    current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await event_repository.get_event_by_id(db, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
-    return EventResponse(
-        id=event.id,
-        event_code=event.event_code,
-        name=event.name,
-        issue_location=event.issue_location,
-        issue_date=event.issue_date,
-        auto_issue_date=event.auto_issue_date or False,
-        is_active=event.is_active,
-        created_at=event.created_at.isoformat() if event.created_at else None
-    )
+    return _event_to_response(event)
 
 
 @router.put("/events/{event_id}", response_model=EventResponse)
 async def update_event(
     event_id: int,
     event_update: EventUpdate,
-    current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    # 指定された（Noneでない）項目のみ更新
+    changes = event_update.model_dump(exclude_none=True)
+    event = await run_write(lambda session: _update_event(session, event_id, changes))
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
 
-    if event_update.name is not None:
-        event.name = event_update.name
-    if event_update.issue_location is not None:
-        event.issue_location = event_update.issue_location
-    if event_update.issue_date is not None:
-        event.issue_date = event_update.issue_date
-    if event_update.auto_issue_date is not None:
-        event.auto_issue_date = event_update.auto_issue_date
-    if event_update.is_active is not None:
-        event.is_active = event_update.is_active
-
-    db.commit()
-    db.refresh(event)
-    return EventResponse(
-        id=event.id,
-        event_code=event.event_code,
-        name=event.name,
-        issue_location=event.issue_location,
-        issue_date=event.issue_date,
-        auto_issue_date=event.auto_issue_date or False,
-        is_active=event.is_active,
-        created_at=event.created_at.isoformat() if event.created_at else None
-    )
+    event_cache.invalidate(event.id, event.event_code)
+    return event
 
 
 @router.delete("/events/{event_id}")
 async def delete_event(
     event_id: int,
-    current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db),
+    services: ServiceContainer = Depends(get_services)
+):
+    event = await event_repository.get_event_by_id(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+    event_code = event.event_code
+
+    # イベントフォルダー外に保存された画像のキー（旧形式）を削除前に控える
+    extra_keys = await license_repository.list_keys_outside_prefix(db, event_id, f"events/{event_code}/")
+
+    deleted_licenses = await run_write(lambda session: _delete_event(session, event_id))
+    event_cache.invalidate(event_id, event_code)
+    license_counter.invalidate(event_id)
+
+    # 保存画像の削除はバックグラウンドジョブで実行
+    job = job_registry.create("delete_event_objects", f"events/{event_code}/")
+    background_tasks.add_task(
+        job_registry.run,
+        job,
+        lambda j: purge_event_objects(services.s3, j, event_code, sorted(extra_keys))
+    )
+    return {
+        "message": "イベントを削除しました",
+        "deleted_licenses": deleted_licenses,
+        "job_id": job.id
+    }
+
+
+@router.get("/events/{event_id}/licenses/search", response_model=List[LicenseResponse])
+async def search_event_licenses(
+    event_id: int,
+    q: str = Query(..., min_length=1, max_length=100, description="検索語（ペット名・飼い主名・品種・受付番号。空白区切りでAND）"),
+    prefix: bool = Query(False, description="各語をカラムの先頭一致で検索"),
+    limit: int = Query(50, ge=1, le=200, description="最大件数"),
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """イベント内の免許証を検索（新しい順）"""
+    if not q.split():
+        raise HTTPException(status_code=400, detail="検索語を入力してください")
+
+    event = await event_cache.get_by_id(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+
+    archived = await event_repository.is_licenses_archived(db, event.id)
+    rows = await license_repository.search_license_rows(
+        db, event.id, q, prefix=prefix, limit=limit, archived=archived
+    )
+    return ORJSONResponse(license_repository.rows_to_items(rows))
+
+
+@router.get("/events/{event_id}/stats")
+async def get_event_stats(
+    event_id: int,
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    イベントの統計（時間帯別の件数、動物種別・品種・毛色の分布、平均信頼度）
+
+    保存・削除時に更新しているロールアップを1回のクエリで読み込む
+    """
+    event = await event_cache.get_by_id(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+
+    rows = await event_stats_repository.list_event_stats(db, event.id)
+    return ORJSONResponse(summarize_event_stats(event.id, rows))
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    current_admin: AdminPrincipal = Depends(get_current_admin)
+):
+    """バックグラウンドジョブの進捗を取得"""
+    job = job_registry.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="ジョブが見つかりません")
+    return job.to_dict()
+
+
+@router.get("/metrics/cache")
+async def get_cache_metrics(
+    current_admin: AdminPrincipal = Depends(get_current_admin)
+):
+    """プロセス内キャッシュのヒット率などを取得"""
+    return {
+        "event_cache": event_cache.stats(),
+        "admin_auth_cache": admin_auth_cache.stats(),
+    }
+
+
+@router.get("/events/{event_id}/export/images.zip")
+async def export_event_images(
+    event_id: int,
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db),
+    services: ServiceContainer = Depends(get_services)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    """イベントの全画像（免許証・オリジナル）をZIPでストリーミングダウンロード"""
+    event = await event_repository.get_event_by_id(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+
+    return StreamingResponse(
+        stream_event_images_zip(services.s3, event.event_code),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{event.event_code}_images.zip"'}
+    )
+
+
+async def _export_fields(db: AsyncSession, event_id: int, columns: Optional[str]):
+    """出力対象のイベントとカラムを確認"""
+    event = await event_cache.get_by_id(db, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
+    try:
+        fields = resolve_export_fields(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return event, fields
+
+
+@router.get("/events/{event_id}/export/licenses.csv")
+async def export_event_licenses_csv(
+    event_id: int,
+    columns: Optional[str] = Query(None, description="出力するカラム（カンマ区切り。省略時は全カラム）"),
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """イベントの免許証を受付順にCSVでストリーミングダウンロード"""
+    event, fields = await _export_fields(db, event_id, columns)
+
+    return StreamingResponse(
+        stream_licenses_csv(event.id, fields),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{event.event_code}_licenses.csv"'}
+    )
 
-    db.delete(event)
-    db.commit()
-    return {"message": "イベントを削除しました"}
+
+@router.get("/events/{event_id}/export/licenses.parquet")
+async def export_event_licenses_parquet(
+    event_id: int,
+    columns: Optional[str] = Query(None, description="出力するカラム（カンマ区切り。省略時は全カラム）"),
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """イベントの免許証を受付順にParquetでストリーミングダウンロード（pyarrowが必要）"""
+    event, fields = await _export_fields(db, event_id, columns)
+    if not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet形式の出力には pyarrow のインストールが必要です")
+
+    return StreamingResponse(
+        stream_licenses_parquet(event.id, fields),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f'attachment; filename="{event.event_code}_licenses.parquet"'}
+    )
+
+
+@router.post("/storage/tier-originals")
+async def tier_originals(
+    request: TierOriginalsRequest,
+    background_tasks: BackgroundTasks,
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    services: ServiceContainer = Depends(get_services)
+):
+    """オリジナル画像の再圧縮・低コスト保存先への移動をバックグラウンドで開始"""
+    if request.event_id is None and request.older_than_days is None:
+        raise HTTPException(status_code=400, detail="event_id または older_than_days を指定してください")
+
+    job = job_registry.create(
+        "tier_originals",
+        f"event_id={request.event_id} older_than_days={request.older_than_days}"
+    )
+    background_tasks.add_task(
+        job_registry.run,
+        job,
+        lambda j: tier_original_images(
+            services.s3,
+            j,
+            event_id=request.event_id,
+            older_than_days=request.older_than_days,
+            quality=request.quality,
+            max_dimension=request.max_dimension
+        )
+    )
+    return {"job_id": job.id}
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import date
 from typing import Optional
 
 from app.database import get_db
-from app.models.database_models import Event
+from app.services.event_cache import event_cache
+from app.utils.etag import etag_headers, etag_matches, not_modified
 
 router = APIRouter()
 
@@ -24,10 +26,14 @@ class PublicEventResponse(BaseModel):
 @router.get("/{event_code}", response_model=PublicEventResponse)
 async def get_event_by_code(
     event_code: str,
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
-    """イベントコードからイベント情報を取得（公開API）"""
-    event = db.query(Event).filter(Event.event_code == event_code).first()
+    """
+    イベントコードからイベント情報を取得（公開API）
+    内容から作ったETagがIf-None-Matchと一致する場合は304を返す
+    """
+    event = await event_cache.get_by_code(db, event_code)
 
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
@@ -35,10 +41,13 @@ async def get_event_by_code(
     if not event.is_active:
         raise HTTPException(status_code=403, detail="このURLは現在無効です")
 
-    return PublicEventResponse(
-        event_code=event.event_code,
-        name=event.name,
-        issue_location=event.issue_location,
-        issue_date=event.issue_date,
-        auto_issue_date=event.auto_issue_date or False
-    )
+    if etag_matches(if_none_match, event.etag):
+        return not_modified(event.etag)
+
+    return ORJSONResponse({
+        "event_code": event.event_code,
+        "name": event.name,
+        "issue_location": event.issue_location,
+        "issue_date": event.issue_date,
+        "auto_issue_date": event.auto_issue_date or False,
+    }, headers=etag_headers(event.etag))
@@ -1,15 +1,35 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import date, datetime
-from pydantic import BaseModel
-
-from app.database import get_db
-from app.models.database_models import Event, License
+from pydantic import BaseModel, Field, ValidationError
+import asyncio
+import base64
+import json
+import orjson
+import os
+
+from app.database import AsyncSessionLocal, get_db, run_write
+from app.models.database_models import License
+from app.repositories import events as event_repository
+from app.repositories import licenses as license_repository
+from app.services import event_stats
+from app.services.container import ServiceContainer, get_services
+from app.services.event_cache import event_cache
+from app.services.license_counter import license_counter
+from app.services.license_events import license_event_hub
 from app.services.s3_service import S3Service
+from app.utils.etag import etag_headers, etag_matches, not_modified, weak_etag
 
 router = APIRouter()
-s3_service = S3Service()
+
+# 一括保存の1リクエストあたりの上限件数
+BULK_SAVE_MAX_ITEMS = int(os.getenv("BULK_SAVE_MAX_ITEMS", "100"))
+# 一括保存で同時にアップロードする免許証の数
+BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", "8"))
 
 
 class LicenseResponse(BaseModel):
@@ -41,6 +61,42 @@ class LicenseSaveResponse(BaseModel):
     message: str
 
 
+class BulkLicenseRecord(BaseModel):
+    """一括保存の1件分（画像はmultipartのファイル名で指定）"""
+    client_id: Optional[str] = None  # 端末側の識別子（結果にそのまま返す）
+    pet_name: str
+    owner_name: str
+    animal_type: Optional[str] = None
+    breed: Optional[str] = None
+    color: Optional[str] = None
+    birth_date: Optional[str] = None
+    gender: Optional[str] = None
+    favorite_food: Optional[str] = None
+    favorite_word: Optional[str] = None
+    microchip_no: Optional[str] = None
+    confidence: Optional[float] = Field(None, ge=0, le=1)
+    license_image: str
+    original_image: Optional[str] = None
+
+
+class BulkLicenseResult(BaseModel):
+    index: int  # records 内の位置
+    client_id: Optional[str] = None
+    status: str  # "saved" または "failed"
+    id: Optional[int] = None
+    receipt_number: Optional[str] = None
+    license_image_url: Optional[str] = None
+    original_image_url: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkLicenseSaveResponse(BaseModel):
+    items: List[BulkLicenseResult]
+    saved_count: int
+    failed_count: int
+    total_count: int
+
+
 class PaginatedLicenseResponse(BaseModel):
     items: List[LicenseResponse]
     total: int
@@ -54,6 +110,12 @@ class NewLicensesResponse(BaseModel):
     total_count: int
 
 
+class CursorLicenseResponse(BaseModel):
+    items: List[LicenseResponse]
+    next_cursor: Optional[str] = None  # 次ページがない場合はNone
+    total: Optional[int] = None  # include_total=true の場合のみ
+
+
 def _license_to_response(lic: License) -> LicenseResponse:
     """LicenseモデルをLicenseResponseに変換するヘルパー"""
     return LicenseResponse(
@@ -75,6 +137,266 @@ def _license_to_response(lic: License) -> LicenseResponse:
     )
 
 
+async def _iter_ndjson(event_id: int, chunk_size: int = 1000):
+    """
+    免許証一覧を1行1件のJSON（NDJSON）で順に出力
+    yield_per で chunk_size 件ずつ読み込むため、件数によらずメモリ使用量は一定。
+    リクエストのセッションはレスポンス開始前に閉じられるため、専用のセッションを使う
+    """
+    async with AsyncSessionLocal() as db:
+        archived = await event_repository.is_licenses_archived(db, event_id)
+        # 1行ごとに送ると書き込み回数が多くなるため、chunk_size 件単位で送る
+        async for rows in license_repository.stream_license_rows(db, event_id, chunk_size, archived=archived):
+            yield b"".join(orjson.dumps(item) + b"\n" for item in license_repository.rows_to_items(rows))
+
+
+def _ndjson_response(event_id: int, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        _iter_ndjson(event_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'inline; filename="{filename}"'}
+    )
+
+
+def _encode_cursor(lic: License) -> str:
+    """(created_at, id) を不透明なカーソル文字列に変換"""
+    payload = json.dumps([lic.created_at.isoformat(), lic.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, license_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(license_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="カーソルが不正です")
+
+
+async def _cursor_page(
+    db: AsyncSession,
+    event_id: int,
+    cursor: Optional[str],
+    limit: int,
+    include_total: bool
+) -> ORJSONResponse:
+    """
+    (created_at, id) の降順でキーセットページングする
+    (event_id, created_at, id) の複合インデックスを範囲スキャンするため、
+    深いページでもOFFSETのように読み飛ばしが発生せず、新着が増えてもページがずれない
+    """
+    before = _decode_cursor(cursor) if cursor else None
+    archived = await event_repository.is_licenses_archived(db, event_id)
+    licenses = await license_repository.list_license_rows(
+        db, event_id, limit=limit + 1, before=before, archived=archived
+    )
+    has_next = len(licenses) > limit
+    licenses = licenses[:limit]
+
+    total = None
+    if include_total:
+        total = await license_counter.get(db, event_id)
+
+    return ORJSONResponse({
+        "items": license_repository.rows_to_items(licenses),
+        "next_cursor": _encode_cursor(licenses[-1]) if has_next else None,
+        "total": total,
+    })
+
+
+async def _license_list_version(db: AsyncSession, event_id: int) -> Tuple[str, int, bool]:
+    """
+    一覧のETagと件数（eventsの1行だけを読み、免許証の行は読まない）
+
+    Returns:
+        Tuple[str, int, bool]: (ETag, 件数, 免許証が licenses_archive にあるか)
+    """
+    version = await event_repository.get_license_version(db, event_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+    license_version, total, archived_at = version
+    return weak_etag("licenses", event_id, license_version), total, archived_at is not None
+
+
+async def _paginated_page(
+    db: AsyncSession,
+    event_id: int,
+    page: int,
+    per_page: int,
+    if_none_match: Optional[str]
+) -> Response:
+    """
+    OFFSETページングの1ページ
+    一覧の版がIf-None-Matchと一致する場合は、免許証を読まずに304を返す
+    """
+    etag, total, archived = await _license_list_version(db, event_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    total_pages = (total + per_page - 1) // per_page if total > 0 else 1
+
+    offset = (page - 1) * per_page
+    licenses = await license_repository.list_license_rows(
+        db, event_id, offset=offset, limit=per_page, archived=archived
+    )
+
+    return ORJSONResponse({
+        "items": license_repository.rows_to_items(licenses),
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "total_pages": total_pages,
+    }, headers=etag_headers(etag))
+
+
+async def _new_licenses(
+    db: AsyncSession,
+    event_id: int,
+    since_id: int,
+    if_none_match: Optional[str]
+) -> Response:
+    """
+    since_id より新しい免許証（ポーリング用）
+    一覧の版がIf-None-Matchと一致する場合は、免許証を読まずに304を返す
+    """
+    etag, total_count, archived = await _license_list_version(db, event_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    new_licenses = await license_repository.list_license_rows(db, event_id, since_id=since_id, archived=archived)
+
+    return ORJSONResponse({
+        "items": license_repository.rows_to_items(new_licenses),
+        "total_count": total_count,
+    }, headers=etag_headers(etag))
+
+
+def _event_stream_response(request: Request, event_id: int, last_event_id: Optional[str]) -> StreamingResponse:
+    """免許証の追加・削除をServer-Sent Eventsで配信するレスポンス"""
+    return StreamingResponse(
+        license_event_hub.stream(event_id, last_event_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _insert_license(db: Session, event_id: int, fields: dict) -> tuple:
+    """
+    受付番号を採番して免許証をINSERTし、件数と統計を加算する（run_writeから呼び出す）
+
+    Returns:
+        tuple: (免許証のレスポンス用dict, 加算後の件数)
+    """
+    # 画像アップロード後、INSERTと同じトランザクションで採番
+    receipt_number, total_count = event_repository.allocate_receipt_number(db, event_id)
+    [license_id] = license_repository.new_license_ids(db, 1)
+    new_license = License(id=license_id, event_id=event_id, receipt_number=receipt_number, **fields)
+    db.add(new_license)
+    db.flush()
+    event_stats.record_license(db, event_id, new_license)
+    return _license_to_response(new_license).model_dump(), total_count
+
+
+def _insert_licenses(db: Session, event_id: int, fields_list: List[dict]) -> tuple:
+    """
+    受付番号をまとめて採番して複数の免許証をINSERTし、件数と統計を加算する（run_writeから呼び出す）
+
+    採番・件数の加算は1回のUPDATE、統計は (dimension, bucket) ごとに合計してからUPSERTする。
+
+    Returns:
+        tuple: (免許証のレスポンス用dictのリスト（fields_list と同じ順）, 加算後の件数)
+    """
+    receipt_numbers, total_count = event_repository.allocate_receipt_numbers(db, event_id, len(fields_list))
+    license_ids = license_repository.new_license_ids(db, len(fields_list))
+    new_licenses = [
+        License(id=license_id, event_id=event_id, receipt_number=receipt_number, **fields)
+        for license_id, receipt_number, fields in zip(license_ids, receipt_numbers, fields_list)
+    ]
+    db.add_all(new_licenses)
+    db.flush()
+    event_stats.record_licenses(db, event_id, new_licenses)
+    return [_license_to_response(lic).model_dump() for lic in new_licenses], total_count
+
+
+def _parse_birth_date(value: Optional[str]) -> Optional[date]:
+    """誕生日の文字列（YYYY-MM-DD）を変換（不正な値は未入力として扱う）"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _license_fields(values: dict, license_upload: dict, original_upload: Optional[dict]) -> dict:
+    """
+    入力値とアップロード結果からINSERTするカラムの値を組み立てる
+
+    Args:
+        values: 免許証の入力値（pet_name, owner_name など）
+        license_upload: 免許証画像のアップロード結果
+        original_upload: オリジナル画像のアップロード結果（なければNone）
+    """
+    return dict(
+        pet_name=values["pet_name"],
+        owner_name=values["owner_name"],
+        animal_type=values.get("animal_type"),
+        breed=values.get("breed"),
+        color=values.get("color"),
+        birth_date=_parse_birth_date(values.get("birth_date")),
+        gender=values.get("gender"),
+        favorite_food=values.get("favorite_food"),
+        favorite_word=values.get("favorite_word"),
+        microchip_no=values.get("microchip_no"),
+        confidence=values.get("confidence"),
+        license_image_url=license_upload["url"],
+        original_image_url=original_upload["url"] if original_upload else None,
+        s3_license_key=license_upload["key"],
+        s3_original_key=original_upload["key"] if original_upload else None,
+    )
+
+
+async def _upload_license_images(
+    s3_service: S3Service,
+    event_code: str,
+    license_bytes: bytes,
+    original_bytes: Optional[bytes],
+    semaphore: asyncio.Semaphore
+) -> Tuple[dict, Optional[dict]]:
+    """免許証画像とオリジナル画像をアップロード（同時実行数は semaphore で制限）"""
+    async with semaphore:
+        license_upload = await s3_service.upload_image(license_bytes, event_code=event_code)
+        original_upload = None
+        if original_bytes is not None:
+            original_upload = await s3_service.upload_original_image(original_bytes, event_code=event_code)
+        return license_upload, original_upload
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in detail['loc'])}: {detail['msg']}" if detail["loc"] else detail["msg"]
+        for detail in error.errors()
+    )
+
+
+def _delete_license(db: Session, license_id: int, event_id: int, archived: bool = False) -> Optional[int]:
+    """
+    免許証を削除し、件数と統計を減算する（run_writeから呼び出す）
+
+    Args:
+        archived: licenses_archive から削除する（アーカイブ済みのイベント）
+
+    Returns:
+        Optional[int]: 減算後の件数（既に削除されていた場合はNone）
+    """
+    deleted = license_repository.delete_license(db, license_id, archived)
+    if deleted is None:
+        return None
+    total_count = license_counter.increment(db, event_id, -1)
+    event_stats.record_license(db, event_id, deleted, sign=-1)
+    return total_count
+
+
 # ===========================================
 # 静的パスルート（by-event-id）を先に定義
 # FastAPIはルート定義順で照合するため、
@@ -84,20 +406,18 @@ def _license_to_response(lic: License) -> LicenseResponse:
 @router.get("/by-event-id/{event_id}", response_model=List[LicenseResponse])
 async def list_licenses_by_event_id(
     event_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     イベントIDに紐づく免許証一覧を取得（管理者向け・後方互換）
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await event_cache.get_by_id(db, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
 
-    licenses = db.query(License).filter(
-        License.event_id == event.id
-    ).order_by(License.created_at.desc()).all()
-
-    return [_license_to_response(lic) for lic in licenses]
+    archived = await event_repository.is_licenses_archived(db, event.id)
+    licenses = await license_repository.list_license_rows(db, event.id, archived=archived)
+    return ORJSONResponse(license_repository.rows_to_items(licenses))
 
 
 @router.get("/by-event-id/{event_id}/paginated", response_model=PaginatedLicenseResponse)
@@ -105,56 +425,87 @@ async def list_licenses_by_event_id_paginated(
     event_id: int,
     page: int = Query(1, ge=1, description="ページ番号（1から開始）"),
     per_page: int = Query(20, ge=1, le=100, description="1ページあたりの件数"),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     イベントIDに紐づく免許証一覧をページングで取得（管理者向け）
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await event_cache.get_by_id(db, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
 
-    total = db.query(License).filter(License.event_id == event.id).count()
-    total_pages = (total + per_page - 1) // per_page if total > 0 else 1
+    return await _paginated_page(db, event.id, page, per_page, if_none_match)
 
-    offset = (page - 1) * per_page
-    licenses = db.query(License).filter(
-        License.event_id == event.id
-    ).order_by(License.created_at.desc()).offset(offset).limit(per_page).all()
-
-    return PaginatedLicenseResponse(
-        items=[_license_to_response(lic) for lic in licenses],
-        total=total,
-        page=page,
-        per_page=per_page,
-        total_pages=total_pages
-    )
+
+@router.get("/by-event-id/{event_id}/cursor", response_model=CursorLicenseResponse)
+async def list_licenses_by_event_id_cursor(
+    event_id: int,
+    cursor: Optional[str] = Query(None, description="前ページのnext_cursor（省略時は先頭ページ）"),
+    limit: int = Query(20, ge=1, le=100, description="1ページあたりの件数"),
+    include_total: bool = Query(False, description="総件数を含める"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    イベントIDに紐づく免許証一覧をカーソルでページング取得（管理者向け）
+    """
+    event = await event_cache.get_by_id(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+
+    return await _cursor_page(db, event.id, cursor, limit, include_total)
+
+
+@router.get("/by-event-id/{event_id}/stream")
+async def stream_licenses_by_event_id(
+    event_id: int,
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    イベントIDに紐づく免許証の追加・削除をServer-Sent Eventsで受け取る（管理者向け）
+    再接続時は Last-Event-ID 以降の通知を再送する
+    """
+    event = await event_cache.get_by_id(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+    await db.close()
+
+    return _event_stream_response(request, event_id, last_event_id)
+
+
+@router.get("/by-event-id/{event_id}/ndjson")
+async def stream_licenses_ndjson_by_event_id(
+    event_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    イベントIDに紐づく免許証の全件を新しい順にNDJSONで取得（管理者向け）
+    一覧を一括で返さず、読み込んだ分から順に送信する
+    """
+    event = await event_cache.get_by_id(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+
+    return _ndjson_response(event.id, f"licenses_{event.event_code}.ndjson")
 
 
 @router.get("/by-event-id/{event_id}/new", response_model=NewLicensesResponse)
 async def list_new_licenses_by_event_id(
     event_id: int,
     since_id: int = Query(0, ge=0, description="このID以降の新規データを取得"),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     イベントIDに紐づく新規免許証のみ取得（管理者向けポーリング用）
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await event_cache.get_by_id(db, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
 
-    total_count = db.query(License).filter(License.event_id == event.id).count()
-
-    new_licenses = db.query(License).filter(
-        License.event_id == event.id,
-        License.id > since_id
-    ).order_by(License.created_at.desc()).all()
-
-    return NewLicensesResponse(
-        items=[_license_to_response(lic) for lic in new_licenses],
-        total_count=total_count
-    )
+    return await _new_licenses(db, event.id, since_id, if_none_match)
 
 
 # ===========================================
@@ -176,23 +527,26 @@ async def save_license(
     favorite_food: str = Form(None),
     favorite_word: str = Form(None),
     microchip_no: str = Form(None),
-    db: Session = Depends(get_db)
+    confidence: float = Form(None, ge=0, le=1),
+    db: AsyncSession = Depends(get_db),
+    services: ServiceContainer = Depends(get_services)
 ):
     """
     免許証を保存する
     """
-    event = db.query(Event).filter(Event.event_code == event_code).first()
+    event = await event_cache.get_by_code(db, event_code)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
     if not event.is_active:
         raise HTTPException(status_code=403, detail="このイベントは現在無効です")
+    event_id = event.id
 
-    existing_count = db.query(License).filter(License.event_id == event.id).count()
-    receipt_number = f"{existing_count + 1:04d}"
+    # アップロードや書き込み待ちの間に接続プールの接続を握り続けないよう、一旦セッションを閉じる
+    await db.close()
 
     try:
         license_bytes = await license_image.read()
-        license_upload = await s3_service.upload_image(
+        license_upload = await services.s3.upload_image(
             license_bytes,
             event_code=event_code
         )
@@ -200,70 +554,171 @@ async def save_license(
         original_upload = None
         if original_image:
             original_bytes = await original_image.read()
-            original_upload = await s3_service.upload_original_image(
+            original_upload = await services.s3.upload_original_image(
                 original_bytes,
                 event_code=event_code
             )
 
-        birth_date_obj = None
-        if birth_date:
-            try:
-                birth_date_obj = date.fromisoformat(birth_date)
-            except ValueError:
-                pass
-
-        new_license = License(
-            event_id=event.id,
-            receipt_number=receipt_number,
-            pet_name=pet_name,
-            owner_name=owner_name,
-            animal_type=animal_type,
-            breed=breed,
-            color=color,
-            birth_date=birth_date_obj,
-            gender=gender,
-            favorite_food=favorite_food,
-            favorite_word=favorite_word,
-            microchip_no=microchip_no,
-            license_image_url=license_upload["url"],
-            original_image_url=original_upload["url"] if original_upload else None,
-            s3_license_key=license_upload["key"],
-            s3_original_key=original_upload["key"] if original_upload else None,
+        fields = _license_fields(
+            dict(
+                pet_name=pet_name,
+                owner_name=owner_name,
+                animal_type=animal_type,
+                breed=breed,
+                color=color,
+                birth_date=birth_date,
+                gender=gender,
+                favorite_food=favorite_food,
+                favorite_word=favorite_word,
+                microchip_no=microchip_no,
+                confidence=confidence,
+            ),
+            license_upload,
+            original_upload
         )
-        db.add(new_license)
-        db.commit()
-        db.refresh(new_license)
+        saved, total_count = await run_write(lambda session: _insert_license(session, event_id, fields))
+
+        license_counter.store(event_id, total_count)
+        license_event_hub.publish(event_id, "created", {"item": saved, "total_count": total_count})
 
         return LicenseSaveResponse(
-            id=new_license.id,
-            license_image_url=new_license.license_image_url,
-            original_image_url=new_license.original_image_url,
-            receipt_number=receipt_number,
+            id=saved["id"],
+            license_image_url=saved["license_image_url"],
+            original_image_url=saved["original_image_url"],
+            receipt_number=saved["receipt_number"],
             message="免許証を保存しました"
         )
 
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"保存に失敗しました: {str(e)}")
 
 
+@router.post("/{event_code}/save-bulk", response_model=BulkLicenseSaveResponse)
+async def save_licenses_bulk(
+    event_code: str,
+    records: str = Form(..., description="免許証の入力値のJSON配列（license_image / original_image は files のファイル名）"),
+    files: List[UploadFile] = File(..., description="records から参照する画像"),
+    db: AsyncSession = Depends(get_db),
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    複数の免許証をまとめて保存する（オフライン端末の再送用）
+
+    画像は並行してアップロードし、受付番号はまとめて採番して、全件を1トランザクションで保存する。
+    入力値の不備や画像のアップロード失敗はその免許証だけを失敗として返し、残りは保存する。
+    """
+    event = await event_cache.get_by_code(db, event_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+    if not event.is_active:
+        raise HTTPException(status_code=403, detail="このイベントは現在無効です")
+    event_id = event.id
+
+    # アップロードや書き込み待ちの間に接続プールの接続を握り続けないよう、一旦セッションを閉じる
+    await db.close()
+
+    try:
+        raw_records = orjson.loads(records)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="records はJSONで指定してください")
+    if not isinstance(raw_records, list) or not raw_records:
+        raise HTTPException(status_code=400, detail="records は1件以上の配列で指定してください")
+    if len(raw_records) > BULK_SAVE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"一度に保存できるのは{BULK_SAVE_MAX_ITEMS}件までです")
+
+    contents = {}
+    for upload_file in files:
+        if upload_file.filename in contents:
+            raise HTTPException(status_code=400, detail=f"ファイル名が重複しています: {upload_file.filename}")
+        contents[upload_file.filename] = await upload_file.read()
+
+    results: List[Optional[dict]] = [None] * len(raw_records)
+
+    def fail(index: int, client_id: Optional[str], error: str):
+        results[index] = {"index": index, "client_id": client_id, "status": "failed", "error": error}
+
+    # 入力値を検証し、有効な免許証の画像をアップロードする
+    valid = []
+    for index, raw in enumerate(raw_records):
+        try:
+            record = BulkLicenseRecord.model_validate(raw)
+        except ValidationError as e:
+            fail(index, raw.get("client_id") if isinstance(raw, dict) else None, _validation_message(e))
+            continue
+        missing = [name for name in (record.license_image, record.original_image) if name and name not in contents]
+        if missing:
+            fail(index, record.client_id, f"画像が見つかりません: {', '.join(missing)}")
+            continue
+        valid.append((index, record))
+
+    semaphore = asyncio.Semaphore(BULK_UPLOAD_CONCURRENCY)
+    uploads = await asyncio.gather(*(
+        _upload_license_images(
+            services.s3,
+            event_code,
+            contents[record.license_image],
+            contents[record.original_image] if record.original_image else None,
+            semaphore
+        )
+        for _, record in valid
+    ), return_exceptions=True)
+
+    pending = []
+    for (index, record), upload in zip(valid, uploads):
+        if isinstance(upload, Exception):
+            fail(index, record.client_id, str(upload))
+            continue
+        pending.append((index, record, _license_fields(record.model_dump(), *upload)))
+
+    # アップロードに成功した分を1トランザクションで保存
+    # 失敗時にアップロード済みの画像は削除しない（重複排除したオリジナル画像は既存の免許証と共有しうるため。孤立した画像はgcで削除される）
+    if pending:
+        fields_list = [fields for _, _, fields in pending]
+        try:
+            saved_items, total_count = await run_write(lambda session: _insert_licenses(session, event_id, fields_list))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"保存に失敗しました: {str(e)}")
+
+        license_counter.store(event_id, total_count)
+        count_before = total_count - len(saved_items)
+        for offset, ((index, record, _), saved) in enumerate(zip(pending, saved_items)):
+            license_event_hub.publish(event_id, "created", {"item": saved, "total_count": count_before + offset + 1})
+            results[index] = {
+                "index": index,
+                "client_id": record.client_id,
+                "status": "saved",
+                "id": saved["id"],
+                "receipt_number": saved["receipt_number"],
+                "license_image_url": saved["license_image_url"],
+                "original_image_url": saved["original_image_url"],
+            }
+    else:
+        total_count = await license_counter.get(db, event_id)
+
+    saved_count = sum(1 for result in results if result["status"] == "saved")
+    return ORJSONResponse({
+        "items": results,
+        "saved_count": saved_count,
+        "failed_count": len(results) - saved_count,
+        "total_count": total_count,
+    })
+
+
 @router.get("/{event_code}", response_model=List[LicenseResponse])
 async def list_licenses(
     event_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     イベントに紐づく免許証一覧を取得（後方互換性のため残す）
     """
-    event = db.query(Event).filter(Event.event_code == event_code).first()
+    event = await event_cache.get_by_code(db, event_code)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
 
-    licenses = db.query(License).filter(
-        License.event_id == event.id
-    ).order_by(License.created_at.desc()).all()
-
-    return [_license_to_response(lic) for lic in licenses]
+    archived = await event_repository.is_licenses_archived(db, event.id)
+    licenses = await license_repository.list_license_rows(db, event.id, archived=archived)
+    return ORJSONResponse(license_repository.rows_to_items(licenses))
 
 
 @router.get("/{event_code}/paginated", response_model=PaginatedLicenseResponse)
@@ -271,79 +726,133 @@ async def list_licenses_paginated(
     event_code: str,
     page: int = Query(1, ge=1, description="ページ番号（1から開始）"),
     per_page: int = Query(20, ge=1, le=100, description="1ページあたりの件数"),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     イベントに紐づく免許証一覧をページングで取得
     """
-    event = db.query(Event).filter(Event.event_code == event_code).first()
+    event = await event_cache.get_by_code(db, event_code)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
 
-    total = db.query(License).filter(License.event_id == event.id).count()
-    total_pages = (total + per_page - 1) // per_page if total > 0 else 1
+    return await _paginated_page(db, event.id, page, per_page, if_none_match)
+
+
+@router.get("/{event_code}/cursor", response_model=CursorLicenseResponse)
+async def list_licenses_cursor(
+    event_code: str,
+    cursor: Optional[str] = Query(None, description="前ページのnext_cursor（省略時は先頭ページ）"),
+    limit: int = Query(20, ge=1, le=100, description="1ページあたりの件数"),
+    include_total: bool = Query(False, description="総件数を含める"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    イベントに紐づく免許証一覧をカーソルでページング取得
+    """
+    event = await event_cache.get_by_code(db, event_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+
+    return await _cursor_page(db, event.id, cursor, limit, include_total)
 
-    offset = (page - 1) * per_page
-    licenses = db.query(License).filter(
-        License.event_id == event.id
-    ).order_by(License.created_at.desc()).offset(offset).limit(per_page).all()
-
-    return PaginatedLicenseResponse(
-        items=[_license_to_response(lic) for lic in licenses],
-        total=total,
-        page=page,
-        per_page=per_page,
-        total_pages=total_pages
-    )
+
+@router.get("/{event_code}/stream")
+async def stream_licenses(
+    event_code: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    イベントに紐づく免許証の追加・削除をServer-Sent Eventsで受け取る
+    再接続時は Last-Event-ID 以降の通知を再送する
+    """
+    event = await event_cache.get_by_code(db, event_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+    event_id = event.id
+    await db.close()
+
+    return _event_stream_response(request, event_id, last_event_id)
+
+
+@router.get("/{event_code}/ndjson")
+async def stream_licenses_ndjson(
+    event_code: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    イベントに紐づく免許証の全件を新しい順にNDJSONで取得
+    一覧を一括で返さず、読み込んだ分から順に送信する
+    """
+    event = await event_cache.get_by_code(db, event_code)
+    if not event:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
+
+    return _ndjson_response(event.id, f"licenses_{event.event_code}.ndjson")
 
 
 @router.get("/{event_code}/new", response_model=NewLicensesResponse)
 async def list_new_licenses(
     event_code: str,
     since_id: int = Query(0, ge=0, description="このID以降の新規データを取得"),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     指定したID以降の新規免許証のみ取得（ポーリング用）
     """
-    event = db.query(Event).filter(Event.event_code == event_code).first()
+    event = await event_cache.get_by_code(db, event_code)
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
 
-    total_count = db.query(License).filter(License.event_id == event.id).count()
-
-    new_licenses = db.query(License).filter(
-        License.event_id == event.id,
-        License.id > since_id
-    ).order_by(License.created_at.desc()).all()
-
-    return NewLicensesResponse(
-        items=[_license_to_response(lic) for lic in new_licenses],
-        total_count=total_count
-    )
+    return await _new_licenses(db, event.id, since_id, if_none_match)
 
 
 @router.delete("/{license_id}")
 async def delete_license(
     license_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    services: ServiceContainer = Depends(get_services)
 ):
     """
     免許証を削除
     """
-    license = db.query(License).filter(License.id == license_id).first()
+    license = await license_repository.get_license(db, license_id)
+    archived = False
+    if not license:
+        # アーカイブ済みのイベントの免許証
+        license = await license_repository.get_archived_license(db, license_id)
+        archived = True
     if not license:
         raise HTTPException(status_code=404, detail="免許証が見つかりません")
 
+    keys = []
+    if license.s3_license_key:
+        keys.append(license.s3_license_key)
+    # 内容ハッシュのオリジナル画像は、削除と同時に別の保存が同じ画像を再利用する可能性があるため
+    # ここでは削除せず、参照がなくなった後に孤立画像のGC（python -m app.cli gc）で削除する
+    if (
+        license.s3_original_key
+        and not services.s3.is_content_addressed(license.s3_original_key)
+        and not await license_repository.is_original_key_shared(db, license)
+    ):
+        keys.append(license.s3_original_key)
+
+    event_id = license.event_id
+    total_count = await run_write(lambda session: _delete_license(session, license_id, event_id, archived))
+    if total_count is None:
+        raise HTTPException(status_code=404, detail="免許証が見つかりません")
+    license_counter.store(event_id, total_count)
+
+    # 画像は免許証の削除をコミットしてから消す（先に消すと削除に失敗した場合に参照切れになる）
     try:
-        if license.s3_license_key:
-            await s3_service.delete_image(license.s3_license_key)
-        if license.s3_original_key:
-            await s3_service.delete_image(license.s3_original_key)
+        if keys:
+            await run_in_threadpool(services.s3.delete_objects, keys)
     except Exception:
         pass
 
-    db.delete(license)
-    db.commit()
+    license_event_hub.publish(event_id, "deleted", {"id": license_id, "total_count": total_count})
 
     return {"message": "免許証を削除しました"}
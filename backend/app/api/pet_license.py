@@ -1,24 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from datetime import date
 from typing import Optional
 import base64
 
 from app.models.pet import PetInfo, LicenseResponse, ExtraFeatures
-from app.services.clarifai_service import ClarifaiService
-from app.services.s3_service import S3Service
-from app.services.license_generator import LicenseGenerator
-from app.services.openai_service import OpenAIService
+from app.services.container import ServiceContainer, get_services
 
 router = APIRouter()
 
-clarifai_service = ClarifaiService()
-s3_service = S3Service()
-license_generator = LicenseGenerator()
-openai_service = OpenAIService()
-
 @router.post("/analyze-pet")
-async def analyze_pet(file: UploadFile = File(...)):
+async def analyze_pet(file: UploadFile = File(...), services: ServiceContainer = Depends(get_services)):
     """
     ペット画像を分析してAIで動物種別・品種を判定
 
@@ -33,7 +25,7 @@ async def analyze_pet(file: UploadFile = File(...)):
         image_bytes = await file.read()
 
         # Clarifai APIで分析
-        result = await clarifai_service.identify_pet(image_bytes)
+        result = await services.clarifai.identify_pet(image_bytes)
 
         # 追加特徴を構築
         extra_features_data = result.get("extra_features")
@@ -72,7 +64,8 @@ async def generate_license(
     gender: str = Form(...),
     color: Optional[str] = Form(None),
     favorite_word: Optional[str] = Form(None),
-    microchip_no: Optional[str] = Form(None)
+    microchip_no: Optional[str] = Form(None),
+    services: ServiceContainer = Depends(get_services)
 ):
     """
     ペット健康免許証を生成
@@ -96,10 +89,10 @@ async def generate_license(
         pet_image_bytes = await pet_image.read()
 
         # 1. Clarifai APIでペット分析
-        pet_analysis = await clarifai_service.identify_pet(pet_image_bytes)
+        pet_analysis = await services.clarifai.identify_pet(pet_image_bytes)
 
         # 2. オリジナル画像をS3に保存
-        original_upload = await s3_service.upload_original_image(
+        original_upload = await services.s3.upload_original_image(
             pet_image_bytes,
             filename=f"originals/{pet_name}_{owner_name}_original.jpg"
         )
@@ -107,7 +100,7 @@ async def generate_license(
         # 3. 免許証画像を生成
         issue_date_obj = date.fromisoformat(issue_date)
 
-        license_image_bytes = await license_generator.generate_license(
+        license_image_bytes = await services.license_generator.generate_license(
             pet_image_bytes=pet_image_bytes,
             owner_name=owner_name,
             pet_name=pet_name,
@@ -122,7 +115,7 @@ async def generate_license(
         )
 
         # 4. 生成した免許証をS3に保存
-        license_upload = await s3_service.upload_image(
+        license_upload = await services.s3.upload_image(
             license_image_bytes,
             filename=f"licenses/{pet_name}_{owner_name}_license.png"
         )
@@ -160,7 +153,8 @@ async def generate_profile(
     fur_amount: Optional[str] = Form(None),
     size: Optional[str] = Form(None),
     age_estimate: Optional[str] = Form(None),
-    other_traits: Optional[str] = Form(None)
+    other_traits: Optional[str] = Form(None),
+    services: ServiceContainer = Depends(get_services)
 ):
     """
     OpenAI APIを使用してペットプロフィールを自動生成
@@ -197,7 +191,7 @@ async def generate_profile(
             "other_traits": other_traits_list
         }
 
-        profile = await openai_service.generate_pet_profile(
+        profile = await services.openai.generate_pet_profile(
             animal_type=animal_type,
             breed=breed,
             color=color,
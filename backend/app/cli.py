@@ -0,0 +1,245 @@
+"""
+管理用コマンド
+
+使い方:
+    python -m app.cli gc [--grace-hours 24] [--prefix events/] [--dry-run]
+    python -m app.cli repair-counts [--dry-run]
+    python -m app.cli rebuild-stats [--event-id 1]
+    python -m app.cli archive --older-than-days 90 [--event-id 1] [--dry-run]
+    python -m app.cli archive --restore --event-id 1
+    python -m app.cli migrate [--status]
+    python -m app.cli import-time [--budget-ms 1500] [--top 15]
+    python -m app.cli copy-sqlite --source /app/data/pet_license.db [--batch-size 1000] [--truncate]
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+from app.utils.env import load_environment
+
+load_environment()
+
+from sqlalchemy import create_engine
+
+from app.database import SessionLocal, engine
+from app.migrations import MIGRATIONS, applied_versions, run_migrations
+from app.services.auth_service import create_initial_admin
+from app.services.container import ServiceContainer
+from app.services.database_copy import copy_database
+from app.services.event_stats import rebuild_event_stats
+from app.services.job_service import job_registry
+from app.services.license_archive import archive_licenses, restore_licenses
+from app.services.license_counter import license_counter
+from app.services.storage_maintenance import collect_orphaned_objects
+from app.utils.import_time import measure_import_time
+
+# GCの既定の走査対象（イベント別・旧形式の保存先）
+DEFAULT_GC_PREFIXES = ["events/", "licenses/", "originals/"]
+# app.main のインポートにかけてよい時間（ワーカーの起動時間の目安）
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+
+def _run_job(kind: str, description: str, func) -> int:
+    job = job_registry.create(kind, description)
+    job_registry.run(job, func)
+    return 0 if job.status == "completed" else 1
+
+
+def cmd_gc(args: argparse.Namespace) -> int:
+    """参照されていない保存画像を削除"""
+    prefixes = args.prefix or DEFAULT_GC_PREFIXES
+    services = ServiceContainer()
+    return _run_job(
+        "gc_orphaned_objects",
+        ",".join(prefixes),
+        lambda job: collect_orphaned_objects(
+            services.s3,
+            job,
+            prefixes,
+            grace_period=timedelta(hours=args.grace_hours),
+            dry_run=args.dry_run
+        )
+    )
+
+
+def cmd_repair_counts(args: argparse.Namespace) -> int:
+    """イベントの免許証件数（events.license_count）を実件数と照合・修正"""
+    db = SessionLocal()
+    try:
+        mismatches = license_counter.repair(db, fix=not args.dry_run)
+    finally:
+        db.close()
+
+    for mismatch in mismatches:
+        print(f"[RepairCounts] event_id={mismatch['event_id']}: stored={mismatch['stored']} actual={mismatch['actual']}")
+    action = "found" if args.dry_run else "fixed"
+    print(f"[RepairCounts] {len(mismatches)} mismatched event(s) {action}")
+    return 0
+
+
+def cmd_rebuild_stats(args: argparse.Namespace) -> int:
+    """イベントの統計ロールアップ（event_stats）を免許証から作り直す"""
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_event_stats(db, event_id=args.event_id)
+    finally:
+        db.close()
+
+    for event_id, count in rebuilt.items():
+        print(f"[RebuildStats] event_id={event_id}: {count} license(s)")
+    print(f"[RebuildStats] {len(rebuilt)} event(s) rebuilt")
+    return 0
+
+
+def _format_bytes(size) -> str:
+    return "unknown" if size is None else f"{size / 1024 / 1024:.1f} MiB"
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    """無効なイベントの古い免許証を licenses_archive に移す（--restore で licenses に戻す）"""
+    db = SessionLocal()
+    try:
+        if args.restore:
+            if args.event_id is None:
+                print("[Archive] --restore requires --event-id")
+                return 1
+            moved = restore_licenses(db, args.event_id)
+            if moved is None:
+                print(f"[Archive] event_id={args.event_id} is not archived")
+                return 1
+            print(f"[Archive] Restored {moved} license(s) of event_id={args.event_id}")
+            return 0
+
+        if args.older_than_days is None:
+            print("[Archive] --older-than-days is required")
+            return 1
+        report = archive_licenses(db, args.older_than_days, event_id=args.event_id, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    for item in report["events"]:
+        print(f"[Archive] event_id={item['event_id']}: {item['licenses']} license(s)")
+    action = "would be archived" if args.dry_run else "archived"
+    print(f"[Archive] {report['archived_licenses']} license(s) of {len(report['events'])} event(s) {action}")
+    if not args.dry_run:
+        before, after = report["hot_bytes_before"], report["hot_bytes_after"]
+        reduction = f" (-{_format_bytes(before - after)})" if before is not None and after is not None else ""
+        print(f"[Archive] licenses rows: {report['hot_rows_before']} -> {report['hot_rows_after']}")
+        print(f"[Archive] licenses size: {_format_bytes(before)} -> {_format_bytes(after)}{reduction}")
+        if engine.dialect.name == "postgresql":
+            print("[Archive] PostgreSQL reuses the freed space after VACUUM (run VACUUM FULL licenses to shrink the files)")
+    return 0
+
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    """未適用のマイグレーションを適用（--status は適用状況の表示のみ）"""
+    if args.status:
+        applied = set(applied_versions(engine))
+        for version, name, _ in sorted(MIGRATIONS):
+            mark = "applied" if version in applied else "pending"
+            print(f"[Migrate] {version:04d} {name}: {mark}")
+        return 0
+
+    applied_now = run_migrations(engine)
+    print(f"[Migrate] {len(applied_now)} migration(s) applied")
+    db = SessionLocal()
+    try:
+        create_initial_admin(db)
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_import_time(args: argparse.Namespace) -> int:
+    """app.main のインポート時間を計測し、予算を超えていれば失敗する"""
+    timings = measure_import_time("app.main")
+    total_ms = next(t.cumulative_us for t in timings if t.module == "app.main") / 1000
+
+    for timing in sorted(timings, key=lambda t: t.self_us, reverse=True)[:args.top]:
+        print(f"[ImportTime] {timing.self_us / 1000:8.1f} ms  {timing.module}")
+    within = total_ms <= args.budget_ms
+    print(f"[ImportTime] app.main: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms) {'OK' if within else 'OVER BUDGET'}")
+    return 0 if within else 1
+
+
+def cmd_copy_sqlite(args: argparse.Namespace) -> int:
+    """SQLiteファイルのデータを DATABASE_URL のデータベースへコピー"""
+    source_path = Path(args.source)
+    if not source_path.exists():
+        print(f"[CopySQLite] Source database not found: {source_path}")
+        return 1
+    if engine.dialect.name == "sqlite":
+        print("[CopySQLite] Set DATABASE_URL to the destination database")
+        return 1
+
+    source = create_engine(f"sqlite:///{source_path}")
+    try:
+        # コピー元・コピー先ともに最新のスキーマにそろえる
+        run_migrations(source)
+        run_migrations(engine)
+        copied = copy_database(
+            source,
+            engine,
+            batch_size=args.batch_size,
+            truncate=args.truncate,
+            on_progress=lambda table, count: print(f"[CopySQLite] {table}: {count} rows", flush=True)
+        )
+    except ValueError as e:
+        print(f"[CopySQLite] {e} (use --truncate to overwrite)")
+        return 1
+    finally:
+        source.dispose()
+
+    for table, count in copied.items():
+        print(f"[CopySQLite] Copied {count} row(s) into {table}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Pet License 管理コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gc_parser = subparsers.add_parser("gc", help="参照されていない保存画像を削除")
+    gc_parser.add_argument("--grace-hours", type=float, default=24, help="この時間より新しいオブジェクトは削除しない")
+    gc_parser.add_argument("--prefix", action="append", help="走査するプレフィックス（複数指定可）")
+    gc_parser.add_argument("--dry-run", action="store_true", help="削除せず件数のみ表示")
+    gc_parser.set_defaults(func=cmd_gc)
+
+    repair_parser = subparsers.add_parser("repair-counts", help="イベントの免許証件数を実件数と照合・修正")
+    repair_parser.add_argument("--dry-run", action="store_true", help="修正せずずれのみ表示")
+    repair_parser.set_defaults(func=cmd_repair_counts)
+
+    stats_parser = subparsers.add_parser("rebuild-stats", help="イベントの統計ロールアップを免許証から作り直す")
+    stats_parser.add_argument("--event-id", type=int, help="対象のイベントID（省略時は全イベント）")
+    stats_parser.set_defaults(func=cmd_rebuild_stats)
+
+    archive_parser = subparsers.add_parser("archive", help="無効なイベントの古い免許証をアーカイブテーブルへ移す")
+    archive_parser.add_argument("--older-than-days", type=int, help="無効にしてからこの日数が経ったイベントを対象にする")
+    archive_parser.add_argument("--event-id", type=int, help="対象のイベントID（省略時は条件を満たす全イベント）")
+    archive_parser.add_argument("--dry-run", action="store_true", help="移さず対象のみ表示")
+    archive_parser.add_argument("--restore", action="store_true", help="アーカイブしたイベントの免許証を戻す（--event-id 必須）")
+    archive_parser.set_defaults(func=cmd_archive)
+
+    migrate_parser = subparsers.add_parser("migrate", help="未適用のスキーママイグレーションを適用")
+    migrate_parser.add_argument("--status", action="store_true", help="適用せず適用状況のみ表示")
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    import_parser = subparsers.add_parser("import-time", help="app.main のインポート時間を計測し、予算と比較")
+    import_parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS, help="インポート時間の上限（ミリ秒）")
+    import_parser.add_argument("--top", type=int, default=15, help="表示する時間の長いモジュール数")
+    import_parser.set_defaults(func=cmd_import_time)
+
+    copy_parser = subparsers.add_parser("copy-sqlite", help="SQLiteのデータをDATABASE_URLのデータベースへコピー")
+    copy_parser.add_argument("--source", required=True, help="コピー元のSQLiteファイル")
+    copy_parser.add_argument("--batch-size", type=int, default=1000, help="1回にコピーする行数")
+    copy_parser.add_argument("--truncate", action="store_true", help="コピー先の既存データを削除してからコピー")
+    copy_parser.set_defaults(func=cmd_copy_sqlite)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
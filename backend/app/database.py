@@ -1,33 +1,230 @@
-from sqlalchemy import create_engine
+import asyncio
+from sqlalchemy import URL, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
 import os
 
+# 接続先
+# DATABASE_URL を指定するとそのデータベース（PostgreSQLなど）を使用し、
+# 未指定の場合はSQLiteファイルを使用する
+DATABASE_URL = os.getenv("DATABASE_URL", "").strip()
+
 # SQLiteデータベースファイルのパス
 # Docker環境では/app/dataを使用、それ以外は相対パス
 if os.path.exists("/app"):
     DATABASE_PATH = Path("/app/data/pet_license.db")
 else:
     DATABASE_PATH = Path(__file__).parent.parent / "data" / "pet_license.db"
-DATABASE_PATH.parent.mkdir(exist_ok=True)
 
-print(f"[Database] Using database path: {DATABASE_PATH}")
-print(f"[Database] Database exists: {DATABASE_PATH.exists()}")
 
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+def _normalize_database_url(url: str) -> URL:
+    """postgres:// / postgresql:// はpsycopg（同期・非同期の両方に対応）のドライバ指定に揃える"""
+    parsed = make_url(url)
+    if parsed.drivername in ("postgres", "postgresql"):
+        parsed = parsed.set(drivername="postgresql+psycopg")
+    return parsed
+
+
+if DATABASE_URL:
+    SQLALCHEMY_DATABASE_URL = _normalize_database_url(DATABASE_URL)
+    SQLALCHEMY_ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL
+    if SQLALCHEMY_DATABASE_URL.get_backend_name() == "sqlite":
+        SQLALCHEMY_ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.set(drivername="sqlite+aiosqlite")
+else:
+    DATABASE_PATH.parent.mkdir(exist_ok=True)
+    print(f"[Database] Database exists: {DATABASE_PATH.exists()}")
+    SQLALCHEMY_DATABASE_URL = make_url(f"sqlite:///{DATABASE_PATH}")
+    SQLALCHEMY_ASYNC_DATABASE_URL = make_url(f"sqlite+aiosqlite:///{DATABASE_PATH}")
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.get_backend_name() == "sqlite"
+
+
+def postgres_conninfo() -> Optional[str]:
+    """SQLAlchemyを通さずにpsycopgで直接接続する場合の接続先（PostgreSQL以外はNone）"""
+    if SQLALCHEMY_DATABASE_URL.get_backend_name() != "postgresql":
+        return None
+    return SQLALCHEMY_DATABASE_URL.set(drivername="postgresql").render_as_string(hide_password=False)
+
+print(f"[Database] Using database: {SQLALCHEMY_DATABASE_URL.render_as_string(hide_password=True)}")
+
+# SQLiteのチューニング設定（環境変数で上書き可能）
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+# 同時に届いた書き込みを1回のコミットにまとめる（単一ライターキュー）
+SQLITE_GROUP_COMMIT = os.getenv("SQLITE_GROUP_COMMIT", "false").lower() == "true"
+
+# コネクションプールの設定（PostgreSQLなどサーバー型のデータベース用、ワーカープロセスごと）
+# 同期エンジン（書き込み・CLI）と非同期エンジン（読み込み）がそれぞれプールを持つため、
+# DBへの最大接続数は おおよそ ワーカー数 × 2 × (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+def _engine_options(for_async: bool) -> dict:
+    if IS_SQLITE:
+        connect_args = {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if not for_async:
+            connect_args["check_same_thread"] = False
+        return {"connect_args": connect_args}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        # フェイルオーバーやアイドル切断で死んだ接続を使う前に検出して張り直す
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+        # server_default=func.now() の日時をSQLite（CURRENT_TIMESTAMP）と同じUTCで記録する
+        "connect_args": {"options": "-c timezone=utc"},
+    }
+
+
+# 同期エンジン（書き込み・起動時のマイグレーション・CLI・バックグラウンドジョブ用）
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(for_async=False))
+
+# 非同期エンジン（APIルーター用）。クエリ実行中もイベントループをブロックしない
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, **_engine_options(for_async=True))
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    """
+    接続ごとのPRAGMA設定
+    WALで読み込みと書き込みが互いにブロックしないようにし、
+    ロック競合時は busy_timeout の間リトライさせる
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _configure_sqlite)
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# コミット後に属性を再読み込みすると暗黙のI/Oが発生するため、expire_on_commit=False
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    """APIルーター用の非同期セッション（読み込み用）"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+class WriteBatcher:
+    """
+    単一ライターキュー
+
+    submit() された書き込み処理を1つのタスクが順に受け取り、
+    同時に溜まっている分（最大 max_batch 件）を1トランザクションで実行して
+    まとめてコミットする。いずれかの処理が失敗した場合は、その回の処理を
+    1件ずつ個別のトランザクションでやり直し、失敗した処理にだけ例外を返す。
+
+    書き込み処理はセッションを受け取り、コミット後も参照できる値
+    （ORMオブジェクトではなくdictなど）を返すこと。
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_batch: int = 64):
+        self._session_factory = session_factory
+        self._max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, work: Callable[[Session], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        # 初回、またはイベントループが変わった場合（テストクライアントなど）はワーカーを作り直す
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((work, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            items = [await self._queue.get()]
+            while len(items) < self._max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            outcomes = await run_in_threadpool(self._execute, [work for work, _ in items])
+            for (_, future), (ok, value) in zip(items, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _execute(self, works: List[Callable[[Session], Any]]) -> List[Tuple[bool, Any]]:
+        try:
+            return [(True, result) for result in self._commit_batch(works)]
+        except Exception as e:
+            if len(works) == 1:
+                return [(False, e)]
+
+        outcomes = []
+        for work in works:
+            try:
+                outcomes.append((True, self._commit_batch([work])[0]))
+            except Exception as e:
+                outcomes.append((False, e))
+        return outcomes
+
+    def commit_one(self, work: Callable[[Session], Any]) -> Any:
+        """キューを通さずに1件を1トランザクションで実行（ワーカースレッドから呼び出す）"""
+        return self._commit_batch([work])[0]
+
+    def _commit_batch(self, works: List[Callable[[Session], Any]]) -> List[Any]:
+        db = self._session_factory()
+        try:
+            results = [work(db) for work in works]
+            db.commit()
+            return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+write_batcher = WriteBatcher(SessionLocal)
+
+
+async def run_write(work: Callable[[Session], Any]) -> Any:
+    """
+    書き込み処理を1トランザクションとしてワーカースレッドで実行し、コミットする
+
+    SQLiteは同時に1つのトランザクションしか書き込めない。非同期セッションで書き込むと
+    ステートメントごとにイベントループとの往復が入り、その間も書き込みロックを
+    握り続けるため、書き込みは同期セッションでまとめて実行してロック時間を短くする。
+    SQLITE_GROUP_COMMIT が有効な場合は単一ライターキューでまとめてコミットする。
+    PostgreSQLでも同じ経路で実行する（同期エンジンのプールから接続を取る）。
+
+    Args:
+        work: 同期セッションを受け取る書き込み処理。コミット後も参照できる値を返すこと
+
+    Returns:
+        work の戻り値
+    """
+    if SQLITE_GROUP_COMMIT:
+        return await write_batcher.submit(work)
+    return await run_in_threadpool(write_batcher.commit_one, work)
@@ -1,61 +1,74 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from dotenv import load_dotenv
 import os
 from pathlib import Path
 
-# .envファイルを明示的に読み込み（インポートより先に実行）
-# Docker環境では/app/.env、ローカルでは相対パス
-if os.path.exists("/app/.env"):
-    env_path = Path("/app/.env")
-else:
-    env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(dotenv_path=env_path)
-print(f"[Main] Loading .env from: {env_path}")
-print(f"[Main] AWS_ACCESS_KEY_ID loaded: {os.getenv('AWS_ACCESS_KEY_ID')}")
-print(f"[Main] AWS_S3_BUCKET loaded: {os.getenv('AWS_S3_BUCKET')}")
+from app.utils.env import load_environment
+
+# .envファイルを明示的に読み込み（各モジュールが読み込み時に環境変数を参照するため、インポートより先に実行）
+env_path = load_environment()
 
 # 環境変数読み込み後にインポート
 from app.api import pet_license, admin, events, licenses
-from app.database import engine, Base, SessionLocal
+from app.database import engine, SessionLocal, postgres_conninfo
+from app.migrations import run_migrations
 from app.models.database_models import Admin, Event, License
 from app.services.auth_service import create_initial_admin
-from sqlalchemy import text, inspect
+from app.services.container import ServiceContainer
+from app.services.license_events import license_event_hub
+
+# 起動時にマイグレーションの適用と初期管理者の作成を行うか
+# デプロイ時に python -m app.cli migrate を1回実行する場合は false にし、各ワーカーの起動では行わない
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
 
-# データベーステーブル作成
-Base.metadata.create_all(bind=engine)
+# 開発モードの保存画像を配信するディレクトリ（マウント先のパス → ディレクトリ）
+STORAGE_DIRECTORIES = {"storage": "./storage", "storage_cold": "./storage_cold"}
 
-# マイグレーション: 既存テーブルに新しいカラムを追加
-def run_migrations():
-    """既存データベースに不足しているカラムを追加"""
-    inspector = inspect(engine)
 
-    # licensesテーブルの既存カラムを取得
-    if 'licenses' in inspector.get_table_names():
-        existing_columns = {col['name'] for col in inspector.get_columns('licenses')}
+def run_startup_tasks():
+    """データベーステーブル作成・スキーマ更新（未適用のマイグレーションを適用）と初期管理者アカウント作成"""
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        create_initial_admin(db)
+    finally:
+        db.close()
 
-        # receipt_numberカラムを追加
-        if 'receipt_number' not in existing_columns:
-            print("[Migration] Adding receipt_number column to licenses table")
-            with engine.connect() as conn:
-                conn.execute(text("ALTER TABLE licenses ADD COLUMN receipt_number VARCHAR(20)"))
-                conn.commit()
-            print("[Migration] receipt_number column added successfully")
 
-run_migrations()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    ワーカーの起動・終了時の処理
+    インポート時には行わず、サーバーの起動時に1回だけ実行する。
+    サービスのウォームアップは受け付けを始めてから裏で行い、終わるまで /ready は503を返す
+    """
+    print(f"[Main] Loading .env from: {env_path}")
+    print(f"[Main] AWS_S3_BUCKET loaded: {os.getenv('AWS_S3_BUCKET')}")
+    if RUN_MIGRATIONS_ON_STARTUP:
+        run_startup_tasks()
+    for directory in STORAGE_DIRECTORIES.values():
+        Path(directory).mkdir(exist_ok=True)
+
+    # PostgreSQLの場合は免許証の追加・削除の通知をワーカー間で配る
+    await license_event_hub.start(postgres_conninfo())
+
+    app.state.services = ServiceContainer()
+    warmup_task = asyncio.create_task(app.state.services.warm_up())
+    yield
+    warmup_task.cancel()
+    await license_event_hub.stop()
 
-# 初期管理者アカウント作成
-db = SessionLocal()
-try:
-    create_initial_admin(db)
-finally:
-    db.close()
 
 app = FastAPI(
     title="Pet License API",
     description="ペット健康免許証生成API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS設定
@@ -70,9 +83,9 @@ app.add_middleware(
 )
 
 # ストレージディレクトリをマウント（開発モード用）
-storage_path = Path("./storage")
-storage_path.mkdir(exist_ok=True)
-app.mount("/storage", StaticFiles(directory=str(storage_path)), name="storage")
+# ディレクトリはインポート時ではなく lifespan で作成する
+for name, directory in STORAGE_DIRECTORIES.items():
+    app.mount(f"/{name}", StaticFiles(directory=directory, check_dir=False), name=name)
 
 # ルーター登録
 app.include_router(pet_license.router, prefix="/api", tags=["pet_license"])
@@ -87,3 +100,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    ワーカーがリクエストを受けられる状態か（ロードバランサーのヘルスチェック用）
+    サービスのウォームアップが終わるまでは503を返し、準備前のワーカーにトラフィックが送られないようにする
+    """
+    services = getattr(app.state, "services", None)
+    if services is None or not services.ready:
+        warmup = services.warmup_results if services else {}
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": warmup})
+    return {"status": "ready", "warmup": services.warmup_results}
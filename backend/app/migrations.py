@@ -0,0 +1,234 @@
+"""
+バージョン管理されたスキーママイグレーション
+
+適用済みのバージョンを schema_migrations テーブルに記録し、未適用のものだけを
+バージョン順に1つずつのトランザクションで適用する。複数のワーカー・ホストが同時に
+起動しても1プロセスだけが適用するよう、PostgreSQLではアドバイザリロック、
+SQLiteではDBファイル横のロックファイルで排他する。
+
+新しいマイグレーションは末尾に @migration(次の番号, "説明") で追加する。
+バージョン1は現在のモデル定義でテーブルを作成するため、以降のマイグレーションは
+カラム・インデックスの有無を確認してから追加すること（新規DBでは作成済みになる）。
+"""
+import fcntl
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import database_models  # noqa: F401  テーブル定義をBase.metadataに登録
+from app.models.database_models import ArchivedLicense, EventStat
+from app.services.event_stats import rebuild_event_stats
+
+# PostgreSQLのアドバイザリロックのキー（アプリ内で一意な任意の値）
+MIGRATION_LOCK_KEY = 7_311_040
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+
+def migration(version: int, name: str):
+    """マイグレーションを登録するデコレーター"""
+    def register(func: Callable[[Connection], None]):
+        MIGRATIONS.append((version, name, func))
+        return func
+    return register
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {col["name"] for col in inspect(conn).get_columns(table)}
+
+
+@migration(1, "create tables")
+def _create_tables(conn: Connection):
+    Base.metadata.create_all(bind=conn)
+
+
+@migration(2, "event receipt_counter and license_count")
+def _add_event_counters(conn: Connection):
+    columns = _columns(conn, "events")
+    # 既存の受付番号の最大値で初期化
+    if "receipt_counter" not in columns:
+        conn.execute(text("ALTER TABLE events ADD COLUMN receipt_counter INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text(
+            "UPDATE events SET receipt_counter = ("
+            "SELECT COALESCE(MAX(CAST(receipt_number AS INTEGER)), 0) "
+            "FROM licenses WHERE licenses.event_id = events.id)"
+        ))
+    if "license_count" not in columns:
+        conn.execute(text("ALTER TABLE events ADD COLUMN license_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text(
+            "UPDATE events SET license_count = ("
+            "SELECT COUNT(*) FROM licenses WHERE licenses.event_id = events.id)"
+        ))
+
+
+@migration(3, "license receipt_number and original_tiered_at")
+def _add_license_columns(conn: Connection):
+    columns = _columns(conn, "licenses")
+    if "receipt_number" not in columns:
+        conn.execute(text("ALTER TABLE licenses ADD COLUMN receipt_number VARCHAR(20)"))
+    if "original_tiered_at" not in columns:
+        conn.execute(text("ALTER TABLE licenses ADD COLUMN original_tiered_at TIMESTAMP"))
+
+
+@migration(4, "license indexes")
+def _add_license_indexes(conn: Connection):
+    # 共有オリジナル画像の参照確認用
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_licenses_s3_original_key ON licenses (s3_original_key)"
+    ))
+    # キーセットページング用
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_licenses_event_created_id "
+        "ON licenses (event_id, created_at, id)"
+    ))
+
+    # イベント内の受付番号の一意制約（既存データに重複がある場合はスキップ）
+    existing = {index["name"] for index in inspect(conn).get_indexes("licenses")}
+    existing.update(c["name"] for c in inspect(conn).get_unique_constraints("licenses"))
+    if "uq_licenses_event_receipt" in existing:
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(text(
+                "CREATE UNIQUE INDEX uq_licenses_event_receipt "
+                "ON licenses (event_id, receipt_number)"
+            ))
+    except Exception as e:
+        print(f"[Migration] Skipped unique index on (event_id, receipt_number): {e}")
+
+
+@migration(5, "license search index")
+def _add_license_search_index(conn: Connection):
+    # 検索対象: pet_name, owner_name, breed, receipt_number（repositories/licenses.py の検索と対応）
+    if conn.dialect.name == "sqlite":
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS licenses_fts USING fts5("
+            "pet_name, owner_name, breed, receipt_number, "
+            "content='licenses', content_rowid='id', tokenize='trigram')"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS licenses_fts_insert AFTER INSERT ON licenses BEGIN "
+            "INSERT INTO licenses_fts(rowid, pet_name, owner_name, breed, receipt_number) "
+            "VALUES (new.id, new.pet_name, new.owner_name, new.breed, new.receipt_number); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS licenses_fts_delete AFTER DELETE ON licenses BEGIN "
+            "INSERT INTO licenses_fts(licenses_fts, rowid, pet_name, owner_name, breed, receipt_number) "
+            "VALUES ('delete', old.id, old.pet_name, old.owner_name, old.breed, old.receipt_number); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS licenses_fts_update "
+            "AFTER UPDATE OF pet_name, owner_name, breed, receipt_number ON licenses BEGIN "
+            "INSERT INTO licenses_fts(licenses_fts, rowid, pet_name, owner_name, breed, receipt_number) "
+            "VALUES ('delete', old.id, old.pet_name, old.owner_name, old.breed, old.receipt_number); "
+            "INSERT INTO licenses_fts(rowid, pet_name, owner_name, breed, receipt_number) "
+            "VALUES (new.id, new.pet_name, new.owner_name, new.breed, new.receipt_number); END"
+        ))
+        # 既存の免許証を索引に登録
+        conn.execute(text("INSERT INTO licenses_fts(licenses_fts) VALUES ('rebuild')"))
+
+    elif conn.dialect.name == "postgresql":
+        # GIN索引はPostgreSQLが更新時に保守するためトリガーは不要
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception as e:
+            print(f"[Migration] Skipped license search index (pg_trgm is not available): {e}")
+            return
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_licenses_search_trgm ON licenses USING gin ("
+            "(coalesce(pet_name, '') || ' ' || coalesce(owner_name, '') || ' ' || "
+            "coalesce(breed, '') || ' ' || coalesce(receipt_number, '')) gin_trgm_ops)"
+        ))
+
+
+@migration(6, "license confidence and event stats rollup")
+def _add_event_stats(conn: Connection):
+    if "confidence" not in _columns(conn, "licenses"):
+        conn.execute(text("ALTER TABLE licenses ADD COLUMN confidence FLOAT"))
+    EventStat.__table__.create(bind=conn, checkfirst=True)
+    # 既存の免許証から集計（licenses_archive はマイグレーション8で作成するため、licenses のみ）
+    rebuild_event_stats(Session(bind=conn), include_archive=False)
+
+
+@migration(7, "event license_version")
+def _add_event_license_version(conn: Connection):
+    if "license_version" not in _columns(conn, "events"):
+        conn.execute(text("ALTER TABLE events ADD COLUMN license_version INTEGER NOT NULL DEFAULT 0"))
+
+
+@migration(8, "license archive")
+def _add_license_archive(conn: Connection):
+    if "licenses_archived_at" not in _columns(conn, "events"):
+        conn.execute(text("ALTER TABLE events ADD COLUMN licenses_archived_at TIMESTAMP"))
+    ArchivedLicense.__table__.create(bind=conn, checkfirst=True)
+
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    """マイグレーション中は他プロセスを待たせる"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                conn.commit()
+    elif engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        lock_path = Path(f"{engine.url.database}.migrate.lock")
+        with open(lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """適用済みのバージョン一覧"""
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return list(conn.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    未適用のマイグレーションを適用
+
+    Returns:
+        List[int]: 今回適用したバージョン
+    """
+    applied_now = []
+    with _migration_lock(engine):
+        applied = set(applied_versions(engine))
+        for version, name, upgrade in sorted(MIGRATIONS):
+            if version in applied:
+                continue
+            print(f"[Migration] Applying {version:04d} {name}")
+            with engine.begin() as conn:
+                upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                ))
+            applied_now.append(version)
+
+    if applied_now:
+        print(f"[Migration] Schema is at version {max(applied | set(applied_now))}")
+    return applied_now
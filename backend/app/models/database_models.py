@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Float, ForeignKey, Text, UniqueConstraint, Index
+from sqlalchemy.orm import declared_attr, relationship
 from sqlalchemy.sql import func
 import uuid
 
@@ -25,6 +25,10 @@ class Event(Base):
     issue_date = Column(Date, nullable=True)  # Nullの場合は「自動」（アクセス日）
     auto_issue_date = Column(Boolean, default=False)  # 交付日自動設定フラグ
     is_active = Column(Boolean, default=True)
+    receipt_counter = Column(Integer, nullable=False, default=0, server_default="0")  # 最後に発行した受付番号
+    license_count = Column(Integer, nullable=False, default=0, server_default="0")  # 免許証の件数（保存・削除と同時に更新）
+    license_version = Column(Integer, nullable=False, default=0, server_default="0")  # 免許証一覧の版（一覧の内容が変わるたびに加算。ETag用）
+    licenses_archived_at = Column(DateTime, nullable=True)  # 免許証を licenses_archive に移した日時（NULLは licenses にある）
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
@@ -32,12 +36,15 @@ class Event(Base):
     licenses = relationship("License", back_populates="event", cascade="all, delete-orphan")
 
 
-class License(Base):
-    """生成された免許証"""
-    __tablename__ = "licenses"
+class LicenseColumns:
+    """licenses と licenses_archive で共通のカラム"""
 
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
+
+    @declared_attr
+    def event_id(cls):
+        return Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
+
     receipt_number = Column(String(20), nullable=True, index=True)  # イベント内の受付番号
 
     # ペット情報
@@ -53,15 +60,59 @@ class License(Base):
     favorite_food = Column(String(100))
     favorite_word = Column(String(200))
     microchip_no = Column(String(50))
+    confidence = Column(Float, nullable=True)  # AI判定の信頼度（0〜1）
 
     # 画像URL
     license_image_url = Column(Text, nullable=False)
     original_image_url = Column(Text, nullable=True)
     s3_license_key = Column(String(500))
-    s3_original_key = Column(String(500))
+    s3_original_key = Column(String(500), index=True)  # 内容ハッシュ保存時は複数の免許証で共有
+    original_tiered_at = Column(DateTime, nullable=True)  # オリジナル画像を再圧縮・低コスト保存先へ移した日時
 
     # タイムスタンプ
     created_at = Column(DateTime, server_default=func.now())
 
+
+class License(LicenseColumns, Base):
+    """生成された免許証"""
+    __tablename__ = "licenses"
+    __table_args__ = (
+        UniqueConstraint("event_id", "receipt_number", name="uq_licenses_event_receipt"),
+        Index("ix_licenses_event_created_id", "event_id", "created_at", "id"),  # キーセットページング用
+    )
+
     # リレーション
     event = relationship("Event", back_populates="licenses")
+
+
+class ArchivedLicense(LicenseColumns, Base):
+    """
+    アーカイブした免許証（licenses と同じカラム・同じID）
+
+    無効なイベントの免許証をイベント単位で移し、licenses（と索引）を稼働中のイベント分だけに保つ。
+    どちらにあるかは events.licenses_archived_at で判断する。
+    """
+    __tablename__ = "licenses_archive"
+    __table_args__ = (
+        Index("ix_licenses_archive_event_created_id", "event_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # licenses のIDをそのまま使う
+
+
+class EventStat(Base):
+    """
+    イベントの統計ロールアップ（免許証の保存・削除と同じトランザクションで増減）
+
+    dimension ごとに bucket 単位の件数と信頼度の合計を持つ。
+    dimension: total（bucketは空文字）/ hour（UTCの時刻 "YYYY-MM-DDTHH:00:00"）/
+    animal_type / breed / color（未入力はbucketが空文字）
+    """
+    __tablename__ = "event_stats"
+
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    dimension = Column(String(20), primary_key=True)
+    bucket = Column(String(100), primary_key=True)
+    license_count = Column(Integer, nullable=False, default=0, server_default="0")
+    confidence_sum = Column(Float, nullable=False, default=0.0, server_default="0")
+    confidence_count = Column(Integer, nullable=False, default=0, server_default="0")  # 信頼度のある免許証の件数
@@ -0,0 +1,3 @@
+# データアクセス関数
+# 読み込みはAPIルーターの非同期セッション（AsyncSession）で実行し、
+# 書き込みは app.database.run_write から同期セッション（Session）で1トランザクションとして実行する
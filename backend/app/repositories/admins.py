@@ -0,0 +1,11 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database_models import Admin
+
+
+async def get_admin_by_username(db: AsyncSession, username: str) -> Optional[Admin]:
+    result = await db.execute(select(Admin).where(Admin.username == username))
+    return result.scalar_one_or_none()
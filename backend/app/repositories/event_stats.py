@@ -0,0 +1,83 @@
+from typing import Dict, Sequence, Tuple
+
+from sqlalchemy import Row, delete, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.database_models import EventStat
+
+# (dimension, bucket) -> (license_count, confidence_sum, confidence_count)
+StatDeltas = Dict[Tuple[str, str], Tuple[int, float, int]]
+
+
+def _upsert_statement(dialect_name: str):
+    insert = postgresql_insert if dialect_name == "postgresql" else sqlite_insert
+    stmt = insert(EventStat)
+    return stmt.on_conflict_do_update(
+        index_elements=[EventStat.event_id, EventStat.dimension, EventStat.bucket],
+        set_={
+            "license_count": EventStat.license_count + stmt.excluded.license_count,
+            "confidence_sum": EventStat.confidence_sum + stmt.excluded.confidence_sum,
+            "confidence_count": EventStat.confidence_count + stmt.excluded.confidence_count,
+        }
+    )
+
+
+# 方言ごとに1度だけ組み立て、以降は同じ文をパラメータだけ変えて実行する（SQLのコンパイルをキャッシュさせる）
+_UPSERT_STATEMENTS = {name: _upsert_statement(name) for name in ("sqlite", "postgresql")}
+
+
+def apply_deltas(db: Session, event_id: int, deltas: StatDeltas):
+    """
+    ロールアップに加算する（行がなければ作成。コミットは呼び出し側）
+
+    Args:
+        db: セッション
+        event_id: イベントID
+        deltas: (dimension, bucket) ごとの加算値
+    """
+    if not deltas:
+        return
+    stmt = _UPSERT_STATEMENTS[db.get_bind().dialect.name]
+    db.execute(stmt, [
+        dict(
+            event_id=event_id,
+            dimension=dimension,
+            bucket=bucket,
+            license_count=count,
+            confidence_sum=confidence_sum,
+            confidence_count=confidence_count,
+        )
+        for (dimension, bucket), (count, confidence_sum, confidence_count) in deltas.items()
+    ])
+
+
+def delete_empty_stats(db: Session, event_id: int):
+    """件数が0になった行を削除（コミットは呼び出し側）"""
+    db.execute(
+        delete(EventStat).where(EventStat.event_id == event_id, EventStat.license_count <= 0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_event_stats(db: Session, event_id: int):
+    """イベントのロールアップを削除（コミットは呼び出し側）"""
+    db.execute(
+        delete(EventStat).where(EventStat.event_id == event_id).execution_options(synchronize_session=False)
+    )
+
+
+async def list_event_stats(db: AsyncSession, event_id: int) -> Sequence[Row]:
+    """イベントのロールアップを全dimension分まとめて取得"""
+    result = await db.execute(
+        select(
+            EventStat.dimension,
+            EventStat.bucket,
+            EventStat.license_count,
+            EventStat.confidence_sum,
+            EventStat.confidence_count,
+        ).where(EventStat.event_id == event_id, EventStat.license_count > 0)
+    )
+    return result.all()
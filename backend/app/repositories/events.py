@@ -0,0 +1,172 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Row, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Event
+
+
+async def get_event_by_id(db: AsyncSession, event_id: int) -> Optional[Event]:
+    return await db.get(Event, event_id)
+
+
+async def get_event_by_code(db: AsyncSession, event_code: str) -> Optional[Event]:
+    result = await db.execute(select(Event).where(Event.event_code == event_code))
+    return result.scalar_one_or_none()
+
+
+async def list_events(db: AsyncSession) -> List[Event]:
+    """全イベントを作成日の新しい順に取得"""
+    result = await db.execute(select(Event).order_by(Event.created_at.desc()))
+    return list(result.scalars())
+
+
+async def list_active_events(db: AsyncSession) -> List[Event]:
+    """有効なイベントを取得"""
+    result = await db.execute(select(Event).where(Event.is_active.is_(True)))
+    return list(result.scalars())
+
+
+def add_event(db: Session, **fields) -> Event:
+    """イベントを追加（コミットは呼び出し側）"""
+    event = Event(**fields)
+    db.add(event)
+    db.flush()
+    return event
+
+
+def update_event(db: Session, event_id: int, changes: dict) -> Optional[Event]:
+    """
+    イベントを更新（コミットは呼び出し側）
+
+    Returns:
+        Optional[Event]: 更新後のイベント（存在しない場合はNone）
+    """
+    event = db.get(Event, event_id)
+    if event is None:
+        return None
+    for key, value in changes.items():
+        setattr(event, key, value)
+    db.flush()
+    return event
+
+
+def delete_event(db: Session, event_id: int):
+    """イベントを削除（免許証は呼び出し側で先に削除する。コミットは呼び出し側）"""
+    db.execute(delete(Event).where(Event.id == event_id).execution_options(synchronize_session=False))
+
+
+def allocate_receipt_numbers(db: Session, event_id: int, count: int) -> Tuple[List[str], int]:
+    """
+    イベントの受付番号を count 件分まとめて採番し、免許証の件数を count 加算する
+
+    カウンターのUPDATEは行（SQLiteではDB）の書き込みロックを取るため、
+    同時に保存しても番号は重複しない。呼び出し側のトランザクションで
+    免許証と一緒にコミットされ、ロールバック時は番号・件数も戻る。
+    採番と件数・一覧の版の加算は1回のUPDATE ... RETURNINGで行う。
+
+    Returns:
+        Tuple[List[str], int]: (連番の受付番号, 加算後の件数)
+    """
+    result = db.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            receipt_counter=Event.receipt_counter + count,
+            license_count=Event.license_count + count,
+            license_version=Event.license_version + 1,
+            updated_at=Event.updated_at
+        )
+        .returning(Event.receipt_counter, Event.license_count)
+    )
+    last_number, license_count = result.one()
+    numbers = [f"{number:04d}" for number in range(last_number - count + 1, last_number + 1)]
+    return numbers, license_count
+
+
+def allocate_receipt_number(db: Session, event_id: int) -> Tuple[str, int]:
+    """
+    イベントの受付番号を1件採番し、免許証の件数を1加算する（allocate_receipt_numbers を参照）
+
+    Returns:
+        Tuple[str, int]: (受付番号, 加算後の件数)
+    """
+    numbers, license_count = allocate_receipt_numbers(db, event_id, 1)
+    return numbers[0], license_count
+
+
+def increment_license_count(db: Session, event_id: int, delta: int) -> int:
+    """
+    免許証の件数を増減し、一覧の版を進める（コミットは呼び出し側）
+
+    Returns:
+        int: 増減後の件数
+    """
+    result = db.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            license_count=Event.license_count + delta,
+            license_version=Event.license_version + 1,
+            updated_at=Event.updated_at
+        )
+        .returning(Event.license_count)
+    )
+    return result.scalar_one()
+
+
+async def get_license_count(db: AsyncSession, event_id: int) -> int:
+    result = await db.execute(select(Event.license_count).where(Event.id == event_id))
+    return result.scalar() or 0
+
+
+def bump_license_version(db: Session, event_ids):
+    """
+    免許証の件数を変えずに一覧の内容を変えた場合（画像URLの書き換えなど）に一覧の版を進める（コミットは呼び出し側）
+
+    Args:
+        db: セッション
+        event_ids: イベントIDのリスト、またはイベントIDを返すSELECT
+    """
+    db.execute(
+        update(Event)
+        .where(Event.id.in_(event_ids))
+        .values(license_version=Event.license_version + 1, updated_at=Event.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def get_license_version(db: AsyncSession, event_id: int) -> Optional[Row]:
+    """
+    免許証一覧の版と件数（免許証の行を読まずにETagを作るため）
+
+    Returns:
+        Optional[Row]: (license_version, license_count, licenses_archived_at)（イベントが存在しない場合はNone）
+    """
+    result = await db.execute(
+        select(Event.license_version, Event.license_count, Event.licenses_archived_at).where(Event.id == event_id)
+    )
+    return result.first()
+
+
+async def is_licenses_archived(db: AsyncSession, event_id: int) -> bool:
+    """イベントの免許証が licenses_archive にあるか"""
+    result = await db.execute(select(Event.licenses_archived_at).where(Event.id == event_id))
+    return result.scalar() is not None
+
+
+def set_licenses_archived(db: Session, event_id: int, archived_at: Optional[datetime]):
+    """
+    免許証の保存先（アーカイブ日時。Noneは licenses）を記録し、一覧の版を進める（コミットは呼び出し側）
+    """
+    db.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            licenses_archived_at=archived_at,
+            license_version=Event.license_version + 1,
+            updated_at=Event.updated_at
+        )
+    )
@@ -0,0 +1,298 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Row, Select, String, column, delete, func, insert, literal, literal_column, or_, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.database_models import ArchivedLicense, License
+
+# 一覧APIで返すカラム（LicenseResponseのフィールドと同じ並び）
+LICENSE_LIST_COLUMNS = (
+    License.id,
+    License.receipt_number,
+    License.pet_name,
+    License.owner_name,
+    License.animal_type,
+    License.breed,
+    License.color,
+    License.birth_date,
+    License.gender,
+    License.favorite_food,
+    License.favorite_word,
+    License.microchip_no,
+    License.license_image_url,
+    License.original_image_url,
+    License.created_at,
+)
+LICENSE_LIST_FIELDS = tuple(c.key for c in LICENSE_LIST_COLUMNS)
+
+# CSV・Parquetで出力できるカラム（一覧のカラム + 信頼度）
+LICENSE_EXPORT_COLUMNS = LICENSE_LIST_COLUMNS + (License.confidence,)
+LICENSE_EXPORT_FIELDS = tuple(c.key for c in LICENSE_EXPORT_COLUMNS)
+
+# 管理画面の検索対象のカラム
+LICENSE_SEARCH_COLUMNS = (License.pet_name, License.owner_name, License.breed, License.receipt_number)
+
+# 検索索引（マイグレーション5で作成）
+# SQLite: FTS5のtrigram索引（licenses を外部コンテンツとし、トリガーで同期）
+# PostgreSQL: 検索対象カラムを連結した式へのpg_trgmのGIN索引（式は索引定義と完全に一致させる）
+licenses_fts = table("licenses_fts", column("rowid"))
+PG_SEARCH_DOCUMENT = literal_column(
+    "(coalesce(pet_name, '') || ' ' || coalesce(owner_name, '') || ' ' || "
+    "coalesce(breed, '') || ' ' || coalesce(receipt_number, ''))"
+)
+# trigram索引で引ける最短の語の長さ（これより短い語はLIKEで絞り込む）
+SEARCH_MIN_NGRAM = 3
+
+
+def license_model(archived: bool):
+    """免許証の読み込み先（アーカイブ済みのイベントは licenses_archive）"""
+    return ArchivedLicense if archived else License
+
+
+def license_rows_statement(
+    event_id: int,
+    columns: Sequence = LICENSE_LIST_COLUMNS,
+    oldest_first: bool = False,
+    archived: bool = False
+) -> Select:
+    """
+    一覧用に必要なカラムだけをタプルで取得するクエリ（新しい順。oldest_first=Trueで古い順）
+    ORMオブジェクトを生成しないため、件数が多い場合のロードが速い
+
+    Args:
+        columns: 取得するカラム（License のカラム。archived=True の場合は同名のカラムに置き換える）
+        archived: licenses_archive から読む
+    """
+    model = license_model(archived)
+    if archived:
+        columns = [getattr(model, c.key) for c in columns]
+    order = (model.created_at, model.id) if oldest_first else (model.created_at.desc(), model.id.desc())
+    return select(*columns).where(model.event_id == event_id).order_by(*order)
+
+
+async def list_license_rows(
+    db: AsyncSession,
+    event_id: int,
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    since_id: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    archived: bool = False
+) -> Sequence[Row]:
+    """
+    イベントの免許証一覧をタプルで取得
+
+    Args:
+        db: セッション
+        event_id: イベントID
+        offset: 読み飛ばす件数
+        limit: 最大件数
+        since_id: このIDより新しい免許証のみ
+        before: (created_at, id) がこれより前の免許証のみ（キーセットページング）
+        archived: licenses_archive から読む（アーカイブ済みのイベント）
+    """
+    model = license_model(archived)
+    stmt = license_rows_statement(event_id, archived=archived)
+    if since_id is not None:
+        stmt = stmt.where(model.id > since_id)
+    if before is not None:
+        created_at, license_id = before
+        if db.bind.dialect.name == "sqlite":
+            # SQLiteではcreated_atが文字列で保存されているため、同じ形式で比較する
+            # （CURRENT_TIMESTAMPは秒まで、日時を指定して保存した場合はマイクロ秒まで。
+            # 秒で切り捨てると同じ秒の免許証を読み飛ばす）
+            created_at = literal(created_at.isoformat(" "), String)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, license_id))
+    if offset:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return (await db.execute(stmt)).all()
+
+
+def _like_escape(term: str) -> str:
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+async def search_license_rows(
+    db: AsyncSession,
+    event_id: int,
+    query: str,
+    prefix: bool = False,
+    limit: int = 50,
+    archived: bool = False
+) -> Sequence[Row]:
+    """
+    イベント内の免許証をペット名・飼い主名・品種・受付番号で検索（新しい順）
+
+    空白で区切った語はすべてを含む免許証に絞り込む（AND）。日本語は単語に
+    区切らずtrigram（3文字単位）で索引しているため、語の途中にも一致する。
+    3文字未満の語とアーカイブ（検索索引なし）は、イベント内をLIKEで絞り込む。
+
+    Args:
+        db: セッション
+        event_id: イベントID
+        query: 検索語
+        prefix: Trueの場合、各語がいずれかのカラムの先頭に一致するもののみ
+        limit: 最大件数
+        archived: licenses_archive から検索する（アーカイブ済みのイベント）
+    """
+    stmt = license_rows_statement(event_id, archived=archived)
+    search_columns = [getattr(license_model(archived), c.key) for c in LICENSE_SEARCH_COLUMNS]
+    dialect = None if archived else db.bind.dialect.name
+    fts_phrases = []
+    for term in query.split():
+        if prefix:
+            stmt = stmt.where(or_(*(c.istartswith(term, autoescape=True) for c in search_columns)))
+
+        if dialect == "postgresql":
+            stmt = stmt.where(PG_SEARCH_DOCUMENT.ilike(f"%{_like_escape(term)}%", escape="/"))
+        elif dialect == "sqlite" and len(term) >= SEARCH_MIN_NGRAM:
+            fts_phrases.append('"' + term.replace('"', '""') + '"')
+        elif not prefix:
+            stmt = stmt.where(or_(*(c.icontains(term, autoescape=True) for c in search_columns)))
+
+    if fts_phrases:
+        # 結合ではなく IN にすると、イベントの索引を新しい順にたどって一致したものから返せる
+        stmt = stmt.where(License.id.in_(
+            select(licenses_fts.c.rowid).where(literal_column("licenses_fts").op("MATCH")(" ".join(fts_phrases)))
+        ))
+    return (await db.execute(stmt.limit(limit))).all()
+
+
+async def stream_license_rows(
+    db: AsyncSession,
+    event_id: int,
+    chunk_size: int = 1000,
+    columns: Sequence = LICENSE_LIST_COLUMNS,
+    oldest_first: bool = False,
+    archived: bool = False
+) -> AsyncIterator[Sequence[Row]]:
+    """イベントの免許証一覧を chunk_size 件ずつ順に取得（件数によらずメモリ使用量は一定）"""
+    stmt = license_rows_statement(event_id, columns, oldest_first, archived)
+    result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions():
+        yield rows
+
+
+async def get_license(db: AsyncSession, license_id: int) -> Optional[License]:
+    return await db.get(License, license_id)
+
+
+async def get_archived_license(db: AsyncSession, license_id: int) -> Optional[ArchivedLicense]:
+    return await db.get(ArchivedLicense, license_id)
+
+
+async def is_original_key_shared(db: AsyncSession, lic: License) -> bool:
+    """オリジナル画像のキーを他の免許証（アーカイブを含む）も参照しているか"""
+    for model in (License, ArchivedLicense):
+        result = await db.execute(
+            select(model.id).where(
+                model.s3_original_key == lic.s3_original_key,
+                model.id != lic.id
+            ).limit(1)
+        )
+        if result.first() is not None:
+            return True
+    return False
+
+
+async def list_keys_outside_prefix(db: AsyncSession, event_id: int, prefix: str) -> Set[str]:
+    """イベントの免許証（アーカイブを含む）が参照する保存画像のうち、prefix の外にあるキー（旧形式の保存先）"""
+    keys = set()
+    for model in (License, ArchivedLicense):
+        result = await db.execute(
+            select(model.s3_license_key, model.s3_original_key).where(
+                model.event_id == event_id,
+                or_(~model.s3_license_key.startswith(prefix), ~model.s3_original_key.startswith(prefix))
+            )
+        )
+        for license_key, original_key in result:
+            keys.update(k for k in (license_key, original_key) if k and not k.startswith(prefix))
+    return keys
+
+
+def delete_license(db: Session, license_id: int, archived: bool = False) -> Optional[Row]:
+    """
+    免許証を削除（コミットは呼び出し側）
+
+    Args:
+        archived: licenses_archive から削除する
+
+    Returns:
+        Optional[Row]: 削除した免許証のイベントIDと統計用のカラム（存在しない場合はNone）
+    """
+    model = license_model(archived)
+    result = db.execute(
+        delete(model).where(model.id == license_id).returning(
+            model.event_id, model.created_at, model.animal_type, model.breed, model.color, model.confidence
+        ).execution_options(synchronize_session=False)
+    )
+    return result.first()
+
+
+def delete_licenses_by_event(db: Session, event_id: int) -> int:
+    """
+    イベントの免許証（アーカイブを含む）を一括削除（コミットは呼び出し側）
+    ORMのカスケードは全件をロードするため、集合単位のDELETEで削除する
+
+    Returns:
+        int: 削除件数
+    """
+    deleted = 0
+    for model in (License, ArchivedLicense):
+        result = db.execute(
+            delete(model).where(model.event_id == event_id).execution_options(synchronize_session=False)
+        )
+        deleted += result.rowcount
+    return deleted
+
+
+def new_license_ids(db: Session, count: int) -> List[Optional[int]]:
+    """
+    新しく保存する免許証のID（Noneは通常の自動採番。書き込みトランザクション内で呼び出す）
+
+    SQLiteのINTEGER PRIMARY KEYは「licenses内の最大ID + 1」で採番するため、最大IDの免許証を
+    アーカイブすると同じIDが再び使われ、戻すときに衝突する。licenses_archive の最大IDの方が
+    大きい場合のみ、その続きのIDを明示する。PostgreSQLのシーケンスはIDを再利用しない。
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return [None] * count
+    archived_max = db.execute(select(func.max(ArchivedLicense.id))).scalar()
+    if archived_max is None or archived_max <= (db.execute(select(func.max(License.id))).scalar() or 0):
+        return [None] * count
+    return list(range(archived_max + 1, archived_max + 1 + count))
+
+
+def move_event_licenses(db: Session, event_id: int, to_archive: bool) -> int:
+    """
+    イベントの免許証を licenses と licenses_archive の間で移動（IDはそのまま。コミットは呼び出し側）
+
+    INSERT ... SELECT と DELETE の2文で移すため、行をPythonに読み込まない。
+
+    Args:
+        to_archive: Trueで licenses → licenses_archive、Falseでその逆
+
+    Returns:
+        int: 移動した件数
+    """
+    source, target = (License, ArchivedLicense) if to_archive else (ArchivedLicense, License)
+    names = [c.name for c in target.__table__.columns]
+    db.execute(insert(target).from_select(
+        names,
+        select(*(source.__table__.c[name] for name in names)).where(source.event_id == event_id)
+    ))
+    result = db.execute(
+        delete(source).where(source.event_id == event_id).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def rows_to_items(rows) -> List[dict]:
+    """
+    取得したタプルをレスポンス用のdictに変換
+    日付はorjsonがisoformat()と同じ形式で出力するためそのまま渡す
+    """
+    return [dict(zip(LICENSE_LIST_FIELDS, row)) for row in rows]
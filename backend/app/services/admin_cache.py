@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+
+from app.models.database_models import Admin
+
+# 検証済みトークンを保持する最大秒数（トークンの有効期限がこれより早い場合はそちらまで）
+# 複数ワーカーで動かす場合、他プロセスでの管理者の変更・削除はこの秒数以内に反映される
+ADMIN_AUTH_CACHE_TTL = float(os.getenv("ADMIN_AUTH_CACHE_TTL", "60"))
+# 保持するトークンの最大数
+ADMIN_AUTH_CACHE_MAX_ENTRIES = int(os.getenv("ADMIN_AUTH_CACHE_MAX_ENTRIES", "1024"))
+
+
+@dataclass(frozen=True)
+class AdminPrincipal:
+    """認証済みの管理者（セッションに紐づかない読み取り専用のコピー）"""
+    id: int
+    username: str
+
+    @classmethod
+    def from_model(cls, admin: Admin) -> "AdminPrincipal":
+        return cls(id=admin.id, username=admin.username)
+
+
+def _token_key(token: str) -> str:
+    """トークンそのものはメモリに残さず、ハッシュをキーにする"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AdminAuthCache:
+    """
+    検証済みトークンのキャッシュ（トークンのハッシュ → 管理者）
+
+    管理画面はポーリングのたびに認証するため、JWTの検証と admins の問い合わせを省く。
+    保持期限はトークンの有効期限とTTLの早い方。同じプロセスでの管理者の変更・削除は
+    ORMのイベントで即座に破棄し、他プロセスでの変更はTTL経過後に反映される。
+    """
+
+    def __init__(self, ttl_seconds: float = ADMIN_AUTH_CACHE_TTL, max_entries: int = ADMIN_AUTH_CACHE_MAX_ENTRIES):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: Dict[str, Tuple[AdminPrincipal, float]] = {}
+        self._keys_by_username: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[AdminPrincipal]:
+        cached = self._entries.get(_token_key(token))
+        if cached and cached[1] > time.monotonic():
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        return None
+
+    def store(self, token: str, principal: AdminPrincipal, token_expires_at: Optional[float] = None):
+        """
+        検証済みのトークンを保持
+
+        Args:
+            token: アクセストークン
+            principal: トークンの管理者
+            token_expires_at: トークンの有効期限（UNIX時刻。JWTのexp）
+        """
+        ttl = self._ttl
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        key = _token_key(token)
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self._max_entries:
+                self._evict(now)
+            self._entries[key] = (principal, now + ttl)
+            self._keys_by_username.setdefault(principal.username, set()).add(key)
+
+    def _evict(self, now: float):
+        """期限切れを削除し、それでも上限に達している場合は古いものから削除（ロック内で呼び出す）"""
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        while len(self._entries) >= self._max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        cached = self._entries.pop(key, None)
+        if cached:
+            keys = self._keys_by_username.get(cached[0].username)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_username[cached[0].username]
+
+    def invalidate(self, username: str):
+        """管理者のトークンをすべて破棄"""
+        with self._lock:
+            for key in self._keys_by_username.pop(username, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_username.clear()
+
+    def stats(self) -> dict:
+        """ヒット率・省いたDB問い合わせ数などの統計"""
+        total = self.hits + self.misses
+        minutes = (time.monotonic() - self._started) / 60
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            # ヒットのたびに admins への問い合わせを1回省いている
+            "db_queries_saved": self.hits,
+            "db_queries_saved_per_minute": round(self.hits / minutes, 2) if minutes > 0 else 0.0,
+            "ttl_seconds": self._ttl,
+        }
+
+
+admin_auth_cache = AdminAuthCache()
+
+
+@event.listens_for(Admin, "after_update")
+@event.listens_for(Admin, "after_delete")
+def _invalidate_admin(mapper, connection, target: Admin):
+    """管理者の変更・削除時に、その管理者の検証済みトークンを破棄（ユーザー名を変えた場合は変更前の名前も）"""
+    renamed_from = inspect(target).attrs.username.history.deleted or ()
+    for username in {target.username, *renamed_from}:
+        admin_auth_cache.invalidate(username)
@@ -1,3 +1,6 @@
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 import os
@@ -6,10 +9,15 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.database_models import Admin
+from app.repositories import admins as admin_repository
+from app.services.admin_cache import AdminPrincipal, admin_auth_cache
+from app.services.rate_limit import login_ip_limiter, login_username_limiter
 
 # パスワードハッシュ化設定
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -21,6 +29,15 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24時間
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/admin/login")
 
+# bcryptの照合（1回100ms前後のCPU処理）を実行するスレッド数
+# イベントループでは実行せず、このスレッドで処理するため他のリクエストを止めない
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# 照合待ちの上限（超えた分は照合せずに429を返す）
+LOGIN_MAX_PENDING = int(os.getenv("LOGIN_MAX_PENDING", "32"))
+
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending_verifications = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -41,19 +58,70 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def authenticate_admin(db: Session, username: str, password: str) -> Optional[Admin]:
-    admin = db.query(Admin).filter(Admin.username == username).first()
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))},
+    )
+
+
+def check_login_rate(client_ip: Optional[str], username: str):
+    """
+    ログインの試行回数を接続元IP・ユーザー名ごとに制限
+
+    Raises:
+        HTTPException: 上限を超えた場合（429）
+    """
+    retry_after = login_ip_limiter.acquire(client_ip or "unknown")
+    if not retry_after:
+        retry_after = login_username_limiter.acquire(username)
+    if retry_after:
+        print(f"[Auth] Login rate limited: ip={client_ip} username={username!r}")
+        raise _too_many_requests("ログインの試行回数が多すぎます。しばらくしてから再度お試しください", retry_after)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """パスワードを照合（照合用のスレッドで実行し、イベントループを止めない）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def authenticate_admin(db: AsyncSession, username: str, password: str) -> Optional[Admin]:
+    """
+    ユーザー名とパスワードで管理者を認証
+
+    Raises:
+        HTTPException: 照合待ちが LOGIN_MAX_PENDING 件を超えている場合（429）
+    """
+    global _pending_verifications
+    admin = await admin_repository.get_admin_by_username(db, username)
     if not admin:
         return None
-    if not verify_password(password, admin.hashed_password):
-        return None
+
+    if _pending_verifications >= LOGIN_MAX_PENDING:
+        raise _too_many_requests("ログインが混み合っています。しばらくしてから再度お試しください", 1)
+    _pending_verifications += 1
+    try:
+        if not await verify_password_async(password, admin.hashed_password):
+            return None
+    finally:
+        _pending_verifications -= 1
     return admin
 
 
 async def get_current_admin(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Admin:
+    db: AsyncSession = Depends(get_db)
+) -> AdminPrincipal:
+    """
+    トークンから管理者を取得
+    検証済みのトークンはキャッシュから返し、JWTの検証と admins の問い合わせを省く
+    """
+    principal = admin_auth_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="認証情報が無効です",
@@ -67,18 +135,25 @@ async def get_current_admin(
     except JWTError:
         raise credentials_exception
 
-    admin = db.query(Admin).filter(Admin.username == username).first()
+    admin = await admin_repository.get_admin_by_username(db, username)
     if admin is None:
         raise credentials_exception
-    return admin
+    principal = AdminPrincipal.from_model(admin)
+    admin_auth_cache.store(token, principal, payload.get("exp"))
+    return principal
 
 
 def create_initial_admin(db: Session):
-    """初期管理者アカウントを作成"""
+    """初期管理者アカウントを作成（起動時に同期セッションで実行）"""
     admin = db.query(Admin).filter(Admin.username == "admin").first()
     if not admin:
         hashed_password = get_password_hash("admin123")
         admin = Admin(username="admin", hashed_password=hashed_password)
         db.add(admin)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # 同時に起動した他のワーカーが先に作成した
+            db.rollback()
+            return
         print("[Auth] Initial admin account created: admin / admin123")
@@ -1,14 +1,24 @@
-from clarifai.client.model import Model
 import os
 import base64
 from typing import Dict
 
+
+def _model(url: str, pat: str):
+    """Clarifaiのモデル（SDKの読み込みが重いため、起動時ではなく初回の判定時に読み込む）"""
+    from clarifai.client.model import Model
+    return Model(url=url, pat=pat)
+
+
 class ClarifaiService:
     """Clarifai APIを使用したペット認識サービス（ハイブリッド方式）"""
 
     def __init__(self):
         self.api_key = os.getenv("CLARIFAI_API_KEY")
 
+    def warm_up(self):
+        """ClarifaiのSDKを読み込んでおく（同期処理）"""
+        from clarifai.client.model import Model  # noqa: F401
+
     async def identify_pet(self, image_bytes: bytes) -> Dict:
         """
         ハイブリッド方式でペット画像を分析
@@ -23,7 +33,7 @@ class ClarifaiService:
         """
         try:
             # ステップ1: 一般画像認識モデルで犬/猫を判別
-            general_model = Model(
+            general_model = _model(
                 url="https://clarifai.com/clarifai/main/models/general-image-recognition",
                 pat=self.api_key
             )
@@ -93,7 +103,7 @@ class ClarifaiService:
         """
         try:
             # 一般画像認識モデルを使用
-            general_model = Model(
+            general_model = _model(
                 url="https://clarifai.com/clarifai/main/models/general-image-recognition",
                 pat=self.api_key
             )
@@ -166,7 +176,7 @@ class ClarifaiService:
         """
         try:
             # 一般画像認識モデルを使用
-            general_model = Model(
+            general_model = _model(
                 url="https://clarifai.com/clarifai/main/models/general-image-recognition",
                 pat=self.api_key
             )
@@ -247,7 +257,7 @@ class ClarifaiService:
             # 失敗した場合は元の画像全体から色を検出
             target_bytes = face_region_bytes if face_region_bytes else image_bytes
 
-            color_model = Model(
+            color_model = _model(
                 url="https://clarifai.com/clarifai/main/models/color-recognition",
                 pat=self.api_key
             )
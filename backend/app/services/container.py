@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.database import AsyncSessionLocal
+from app.services.clarifai_service import ClarifaiService
+from app.services.event_cache import event_cache
+from app.services.license_generator import LicenseGenerator
+from app.services.openai_service import OpenAIService
+from app.services.s3_service import S3Service
+
+# ウォームアップの各処理を待つ最大秒数（超えた処理は失敗として記録し、待たずに準備完了にする）
+SERVICE_WARMUP_TIMEOUT = float(os.getenv("SERVICE_WARMUP_TIMEOUT", "30"))
+
+
+class ServiceContainer:
+    """
+    リクエストの処理で使うサービス（ワーカーごとに1つずつ）
+
+    アプリの lifespan で作成して app.state.services に置き、各APIは get_services で受け取る。
+    バックグラウンドジョブにはAPIが受け取ったインスタンスを渡し、CLIはコマンドごとに作成する。
+    warm_up() でフォント・SDKクライアント・接続・キャッシュを並行して準備し、終わるまで
+    /ready は503を返す。
+    """
+
+    def __init__(self):
+        self.clarifai = ClarifaiService()
+        self.s3 = S3Service()
+        self.license_generator = LicenseGenerator()
+        self.openai = OpenAIService()
+        self.ready = False
+        self.warmup_results: Dict[str, dict] = {}
+
+    def _warmup_steps(self) -> Dict[str, Callable[[], Awaitable]]:
+        """ウォームアップの処理（名前 → 処理）。同期処理はスレッドプールで実行する"""
+        return {
+            "license_generator": lambda: run_in_threadpool(self.license_generator.warm_up),
+            "openai": lambda: run_in_threadpool(self.openai.warm_up),
+            "s3": lambda: run_in_threadpool(self.s3.warm_up),
+            "clarifai": lambda: run_in_threadpool(self.clarifai.warm_up),
+            "event_cache": self._preload_event_cache,
+        }
+
+    async def _preload_event_cache(self) -> dict:
+        """データベースへの接続を確立し、有効なイベントをキャッシュに読み込む"""
+        async with AsyncSessionLocal() as db:
+            return {"events": await event_cache.preload(db)}
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable]):
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(step(), SERVICE_WARMUP_TIMEOUT)
+            result = {"status": "ok", **(detail or {})}
+        except Exception as e:
+            # 失敗しても各サービスは初回の利用時に改めて準備するため、起動は止めない
+            print(f"[Services] Warm-up of {name} failed: {e!r}")
+            result = {"status": "failed", "error": repr(e)}
+        result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.warmup_results[name] = result
+
+    async def warm_up(self):
+        """各サービスを並行してウォームアップし、すべて終わったら準備完了にする"""
+        started = time.perf_counter()
+        await asyncio.gather(*(self._run_step(name, step) for name, step in self._warmup_steps().items()))
+        self.ready = True
+        failed = [name for name, result in self.warmup_results.items() if result["status"] != "ok"]
+        print(
+            f"[Services] Warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms"
+            + (f" (failed: {', '.join(failed)})" if failed else "")
+        )
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """APIルーター用のサービス（lifespan で作成したもの）"""
+    return request.app.state.services
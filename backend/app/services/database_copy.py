@@ -0,0 +1,70 @@
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+
+
+def copy_database(
+    source: Engine,
+    target: Engine,
+    batch_size: int = 1000,
+    truncate: bool = False,
+    on_progress: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, int]:
+    """
+    全テーブルのデータを別のデータベースへコピー（SQLite → PostgreSQLの移行用）
+
+    両方のスキーマは最新のバージョンにしておくこと。コピー先への書き込みは
+    1トランザクションで行うため、途中で失敗した場合は何もコピーされない。
+    IDはそのまま引き継ぎ、PostgreSQLではコピー後にシーケンスを最大IDに合わせる。
+
+    Args:
+        source: コピー元
+        target: コピー先
+        batch_size: 1回に読み込み・INSERTする行数
+        truncate: コピー先の既存データを削除してからコピーする
+        on_progress: テーブル名とコピー済み行数を受け取るコールバック
+
+    Returns:
+        Dict[str, int]: テーブルごとのコピー件数
+
+    Raises:
+        ValueError: コピー先にデータがあり truncate が指定されていない場合
+    """
+    tables = Base.metadata.sorted_tables  # 外部キーの参照先から順に
+
+    copied = {}
+    with source.connect() as src, target.begin() as dst:
+        if truncate:
+            for table in reversed(tables):
+                dst.execute(table.delete())
+        else:
+            non_empty = [t.name for t in tables if dst.execute(select(func.count()).select_from(t)).scalar()]
+            if non_empty:
+                raise ValueError(f"コピー先にデータがあります: {', '.join(non_empty)}")
+
+        for table in tables:
+            count = 0
+            result = src.execution_options(yield_per=batch_size).execute(select(table))
+            for rows in result.mappings().partitions():
+                dst.execute(table.insert(), [dict(row) for row in rows])
+                count += len(rows)
+                if on_progress:
+                    on_progress(table.name, count)
+            copied[table.name] = count
+
+        if target.dialect.name == "postgresql":
+            for table in tables:
+                if "id" not in table.c or not table.c.id.autoincrement:
+                    continue
+                # アーカイブした免許証はlicensesと同じIDを使い続けるため、licenses_archiveのIDも含める
+                id_source = table.name
+                if table.name == "licenses":
+                    id_source = "(SELECT id FROM licenses UNION ALL SELECT id FROM licenses_archive) ids"
+                dst.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {id_source}"
+                ))
+    return copied
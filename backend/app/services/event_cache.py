@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database_models import Event
+from app.repositories import events as event_repository
+from app.utils.etag import weak_etag
+
+# 複数ワーカーで動かす場合に他プロセスでの更新を取り込むまでの最大秒数
+EVENT_CACHE_TTL = float(os.getenv("EVENT_CACHE_TTL", "30"))
+
+
+@dataclass(frozen=True)
+class EventSnapshot:
+    """キャッシュするイベント情報（セッションに紐づかない読み取り専用のコピー）"""
+    id: int
+    event_code: str
+    name: str
+    issue_location: str
+    issue_date: Optional[date]
+    auto_issue_date: bool
+    is_active: bool
+    etag: str = field(default="", compare=False)  # 公開APIのレスポンス内容から作るETag
+
+    @classmethod
+    def from_model(cls, event: Event) -> "EventSnapshot":
+        fields = (
+            event.id,
+            event.event_code,
+            event.name,
+            event.issue_location,
+            event.issue_date,
+            event.auto_issue_date or False,
+            bool(event.is_active),
+        )
+        # updated_atはSQLiteでは秒単位のため、1秒以内の連続した更新でも変わるよう内容から作る
+        digest = hashlib.blake2b(repr(fields).encode(), digest_size=8).hexdigest()
+        return cls(*fields, etag=weak_etag("event", event.id, digest))
+
+
+class EventCache:
+    """
+    イベントの読み込みキャッシュ（イベントコード・IDの両方で引ける）
+
+    公開APIはリクエストごとにイベントコードからイベントを引くため、
+    プロセス内に保持してDB問い合わせを省く。管理画面での作成・更新・削除時に
+    invalidate() で破棄し、他プロセスでの更新はTTL経過後に反映される。
+    存在しないイベントはキャッシュしない。
+    """
+
+    def __init__(self, ttl_seconds: float = EVENT_CACHE_TTL):
+        self._ttl = ttl_seconds
+        self._by_id: Dict[int, Tuple[EventSnapshot, float]] = {}
+        self._id_by_code: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, event_id: Optional[int]) -> Optional[EventSnapshot]:
+        cached = self._by_id.get(event_id) if event_id is not None else None
+        if cached and cached[1] > time.monotonic():
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        return None
+
+    def _store(self, event: Optional[Event]) -> Optional[EventSnapshot]:
+        if event is None:
+            return None
+        snapshot = EventSnapshot.from_model(event)
+        with self._lock:
+            self._by_id[snapshot.id] = (snapshot, time.monotonic() + self._ttl)
+            self._id_by_code[snapshot.event_code] = snapshot.id
+        return snapshot
+
+    async def get_by_code(self, db: AsyncSession, event_code: str) -> Optional[EventSnapshot]:
+        """
+        イベントコードからイベントを取得
+
+        Returns:
+            Optional[EventSnapshot]: イベント（存在しない場合はNone）
+        """
+        snapshot = self._lookup(self._id_by_code.get(event_code))
+        if snapshot and snapshot.event_code == event_code:
+            return snapshot
+        return self._store(await event_repository.get_event_by_code(db, event_code))
+
+    async def get_by_id(self, db: AsyncSession, event_id: int) -> Optional[EventSnapshot]:
+        """
+        イベントIDからイベントを取得
+
+        Returns:
+            Optional[EventSnapshot]: イベント（存在しない場合はNone）
+        """
+        snapshot = self._lookup(event_id)
+        if snapshot:
+            return snapshot
+        return self._store(await event_repository.get_event_by_id(db, event_id))
+
+    async def preload(self, db: AsyncSession) -> int:
+        """
+        有効なイベントを読み込んでおく（起動時のウォームアップ用）
+
+        Returns:
+            int: 読み込んだイベント数
+        """
+        events = await event_repository.list_active_events(db)
+        for event in events:
+            self._store(event)
+        return len(events)
+
+    def invalidate(self, event_id: Optional[int] = None, event_code: Optional[str] = None):
+        """イベントのキャッシュを破棄（IDとコードのどちらか、または両方を指定）"""
+        with self._lock:
+            if event_id is None and event_code is not None:
+                event_id = self._id_by_code.get(event_code)
+            cached = self._by_id.pop(event_id, None) if event_id is not None else None
+            if cached:
+                self._id_by_code.pop(cached[0].event_code, None)
+            if event_code is not None:
+                self._id_by_code.pop(event_code, None)
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._id_by_code.clear()
+
+    def stats(self) -> dict:
+        """ヒット率などの統計"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "ttl_seconds": self._ttl,
+        }
+
+
+event_cache = EventCache()
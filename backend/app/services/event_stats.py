@@ -0,0 +1,140 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session
+
+from app.models.database_models import ArchivedLicense, Event, License
+from app.repositories import event_stats as event_stats_repository
+from app.repositories.event_stats import StatDeltas
+
+# 分布を集計するカラム（dimension名と同じ）
+DISTRIBUTION_DIMENSIONS = ("animal_type", "breed", "color")
+
+# 統計に使う免許証のカラム
+STAT_SOURCE_COLUMNS = (License.created_at, License.animal_type, License.breed, License.color, License.confidence)
+
+
+def hour_bucket(created_at: Optional[datetime]) -> str:
+    """時間帯の集計単位（UTCの時刻）"""
+    return created_at.strftime("%Y-%m-%dT%H:00:00") if created_at else ""
+
+
+def license_stat_deltas(lic, sign: int = 1) -> StatDeltas:
+    """
+    免許証1件分のロールアップの増減
+
+    Args:
+        lic: created_at / animal_type / breed / color / confidence を持つ免許証（ORMオブジェクトまたは行）
+        sign: 保存時は1、削除時は-1
+    """
+    has_confidence = lic.confidence is not None
+    delta = (sign, lic.confidence * sign if has_confidence else 0.0, sign if has_confidence else 0)
+    keys = [("total", ""), ("hour", hour_bucket(lic.created_at))]
+    keys.extend((dimension, (getattr(lic, dimension) or "")[:100]) for dimension in DISTRIBUTION_DIMENSIONS)
+    return {key: delta for key in keys}
+
+
+def sum_license_stat_deltas(licenses: Iterable, sign: int = 1) -> StatDeltas:
+    """複数の免許証のロールアップの増減を (dimension, bucket) ごとに合計"""
+    totals: Dict = defaultdict(lambda: [0, 0.0, 0])
+    for lic in licenses:
+        for key, (license_count, confidence_sum, confidence_count) in license_stat_deltas(lic, sign).items():
+            total = totals[key]
+            total[0] += license_count
+            total[1] += confidence_sum
+            total[2] += confidence_count
+    return {key: tuple(total) for key, total in totals.items()}
+
+
+def record_license(db: Session, event_id: int, lic, sign: int = 1):
+    """
+    免許証の保存・削除をロールアップに反映（書き込みトランザクション内で呼び出す。コミットは呼び出し側）
+    """
+    record_licenses(db, event_id, [lic], sign)
+
+
+def record_licenses(db: Session, event_id: int, licenses: Iterable, sign: int = 1):
+    """
+    複数の免許証の保存・削除をまとめてロールアップに反映（コミットは呼び出し側）
+
+    同じ (dimension, bucket) への加算は1行にまとめてからUPSERTする。
+    """
+    event_stats_repository.apply_deltas(db, event_id, sum_license_stat_deltas(licenses, sign))
+    if sign < 0:
+        event_stats_repository.delete_empty_stats(db, event_id)
+
+
+def rebuild_event_stats(db: Session, event_id: Optional[int] = None, include_archive: bool = True) -> Dict[int, int]:
+    """
+    免許証からロールアップを作り直す（CLI・マイグレーション用の同期セッション）
+
+    イベントごとに1トランザクションで作り直す。保存処理は採番時にイベントの行をロックするため、
+    先にイベントの行をロックして作り直し中の保存を待たせる。
+
+    Args:
+        db: セッション
+        event_id: 対象のイベントID（Noneの場合は全イベント）
+        include_archive: licenses_archive の免許証も集計する（テーブル作成前のマイグレーションではFalse）
+
+    Returns:
+        Dict[int, int]: イベントIDごとの免許証の件数
+    """
+    stmt = select(Event.id).order_by(Event.id)
+    if event_id is not None:
+        stmt = stmt.where(Event.id == event_id)
+    event_ids = list(db.execute(stmt).scalars())
+
+    rebuilt = {}
+    for target_id in event_ids:
+        db.execute(select(Event.id).where(Event.id == target_id).with_for_update())
+        event_stats_repository.delete_event_stats(db, target_id)
+
+        stmt = select(*STAT_SOURCE_COLUMNS).where(License.event_id == target_id)
+        if include_archive:
+            # アーカイブ済みのイベントの免許証は licenses_archive にある
+            archived_columns = [getattr(ArchivedLicense, c.key) for c in STAT_SOURCE_COLUMNS]
+            stmt = stmt.union_all(select(*archived_columns).where(ArchivedLicense.event_id == target_id))
+        result = db.execute(stmt.execution_options(yield_per=1000))
+        deltas = sum_license_stat_deltas(result)
+
+        event_stats_repository.apply_deltas(db, target_id, deltas)
+        db.commit()
+        rebuilt[target_id] = deltas[("total", "")][0] if deltas else 0
+    return rebuilt
+
+
+def _average(confidence_sum: float, confidence_count: int) -> Optional[float]:
+    return round(confidence_sum / confidence_count, 4) if confidence_count else None
+
+
+def summarize_event_stats(event_id: int, rows: Sequence[Row]) -> dict:
+    """
+    ロールアップの行をダッシュボード用のレスポンスに整形
+
+    Returns:
+        dict: {event_id, total, average_confidence, per_hour, animal_types, breeds, colors}
+    """
+    summary = {"event_id": event_id, "total": 0, "average_confidence": None, "per_hour": []}
+    distributions: Dict[str, List[dict]] = {dimension: [] for dimension in DISTRIBUTION_DIMENSIONS}
+
+    for dimension, bucket, count, confidence_sum, confidence_count in rows:
+        if dimension == "total":
+            summary["total"] = count
+            summary["average_confidence"] = _average(confidence_sum, confidence_count)
+        elif dimension == "hour":
+            summary["per_hour"].append({"hour": bucket, "count": count})
+        elif dimension in distributions:
+            distributions[dimension].append({
+                "value": bucket or None,
+                "count": count,
+                "average_confidence": _average(confidence_sum, confidence_count),
+            })
+
+    summary["per_hour"].sort(key=lambda item: item["hour"])
+    by_count = lambda item: (-item["count"], item["value"] or "")
+    summary["animal_types"] = sorted(distributions["animal_type"], key=by_count)
+    summary["breeds"] = sorted(distributions["breed"], key=by_count)
+    summary["colors"] = sorted(distributions["color"], key=by_count)
+    return summary
@@ -0,0 +1,277 @@
+import asyncio
+import csv
+import io
+import zipfile
+from collections import deque
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy import Date, DateTime, Float, Integer, String
+
+from app.database import AsyncSessionLocal
+from app.repositories import events as event_repository
+from app.repositories import licenses as license_repository
+from app.repositories.licenses import LICENSE_EXPORT_COLUMNS, LICENSE_EXPORT_FIELDS
+from app.services.s3_service import S3Service
+
+# 免許証のCSV・Parquet出力で1回に読み込む行数（Parquetでは1つの行グループになる）
+LICENSE_EXPORT_CHUNK_SIZE = 5000
+
+_EXPORT_COLUMNS_BY_FIELD = {c.key: c for c in LICENSE_EXPORT_COLUMNS}
+
+# Excelなどで開いたときに数式として解釈される先頭の文字（CSVインジェクション対策）
+_CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _StreamBuffer(io.RawIOBase):
+    """ZipFile・ParquetWriterの書き込み先。書かれたバイト列を溜めておき、drain()で取り出す（シーク不可）"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._position += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _iter_keys(s3_service: S3Service, prefix: str) -> AsyncIterator[str]:
+    """オブジェクトキーをページ単位で取得（一覧取得のブロッキングI/Oはスレッドで実行）"""
+    pages = s3_service.iter_object_pages(prefix)
+    while True:
+        page = await asyncio.to_thread(next, pages, None)
+        if page is None:
+            break
+        for obj in page:
+            yield obj["key"]
+
+
+async def stream_event_images_zip(
+    s3_service: S3Service,
+    event_code: str,
+    concurrency: int = 4
+) -> AsyncIterator[bytes]:
+    """
+    events/{event_code}/ 配下の全オブジェクトをZIPとしてストリーミング生成
+
+    一時ファイルは作らず、最大 concurrency 件のオブジェクトを先読みしながら
+    キー順にエントリを書き出す。メモリ使用量は先読み件数分で一定。
+
+    Args:
+        s3_service: ストレージサービス
+        event_code: イベントコード
+        concurrency: 同時に読み込むオブジェクト数
+
+    Yields:
+        bytes: ZIPデータのチャンク
+    """
+    prefix = f"events/{event_code}/"
+    buffer = _StreamBuffer()
+    window = deque()
+
+    try:
+        # 画像は圧縮済みのため無圧縮（ZIP_STORED）で格納
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as zf:
+            async for key in _iter_keys(s3_service, prefix):
+                window.append((key, asyncio.create_task(s3_service.download_image(key))))
+                if len(window) < concurrency:
+                    continue
+                key, task = window.popleft()
+                zf.writestr(key[len(prefix):], await task)
+                yield buffer.drain()
+
+            while window:
+                key, task = window.popleft()
+                zf.writestr(key[len(prefix):], await task)
+                yield buffer.drain()
+
+        # セントラルディレクトリ
+        yield buffer.drain()
+    finally:
+        # クライアント切断時などに先読み中のタスクを破棄
+        for _, task in window:
+            task.cancel()
+
+
+def resolve_export_fields(columns: Optional[str]) -> List[str]:
+    """
+    出力するカラムを決める
+
+    Args:
+        columns: カンマ区切りのカラム名（指定順に出力。省略時は全カラム）
+
+    Raises:
+        ValueError: 出力できないカラム名が含まれる場合
+    """
+    if not columns:
+        return list(LICENSE_EXPORT_FIELDS)
+    fields = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in _EXPORT_COLUMNS_BY_FIELD]
+    if unknown or not fields:
+        raise ValueError(
+            f"出力できないカラムです: {', '.join(unknown)}（指定できるカラム: {', '.join(LICENSE_EXPORT_FIELDS)}）"
+        )
+    return list(dict.fromkeys(fields))
+
+
+def _date_indexes(fields: Sequence[str]) -> List[int]:
+    """日付・日時のカラムの位置（一覧APIのレスポンス（_license_to_response）と同じisoformat()の文字列にする）"""
+    return [
+        i for i, name in enumerate(fields)
+        if isinstance(_EXPORT_COLUMNS_BY_FIELD[name].type, (Date, DateTime))
+    ]
+
+
+def _text_indexes(fields: Sequence[str]) -> List[int]:
+    """文字列のカラムの位置（ペット名・飼い主名など利用者の入力した値を含む）"""
+    return [
+        i for i, name in enumerate(fields)
+        if isinstance(_EXPORT_COLUMNS_BY_FIELD[name].type, String)
+    ]
+
+
+def escape_csv_formula(value: str) -> str:
+    """数式として解釈される文字で始まる値は、先頭に ' を付けて文字列として表示させる"""
+    if value.startswith(_CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_rows(rows: Sequence[Sequence], date_indexes: Sequence[int], text_indexes: Sequence[int]) -> List[list]:
+    """
+    CSVに書き出す行（日付はisoformat()の文字列、文字列は数式にならないよう変換。Noneは空欄になる）
+    """
+    converted = []
+    for row in rows:
+        row = list(row)
+        for i in date_indexes:
+            if row[i] is not None:
+                row[i] = row[i].isoformat()
+        for i in text_indexes:
+            if row[i] is not None:
+                row[i] = escape_csv_formula(row[i])
+        converted.append(row)
+    return converted
+
+
+async def _iter_license_chunks(event_id: int, fields: Sequence[str], chunk_size: int):
+    """
+    免許証を受付順（古い順）に chunk_size 件ずつ読み込む
+    リクエストのセッションはレスポンス開始前に閉じられるため、専用のセッションを使う
+    """
+    columns = [_EXPORT_COLUMNS_BY_FIELD[name] for name in fields]
+    async with AsyncSessionLocal() as db:
+        archived = await event_repository.is_licenses_archived(db, event_id)
+        async for rows in license_repository.stream_license_rows(
+            db, event_id, chunk_size, columns=columns, oldest_first=True, archived=archived
+        ):
+            yield rows
+
+
+async def stream_licenses_csv(
+    event_id: int,
+    fields: Sequence[str],
+    chunk_size: int = LICENSE_EXPORT_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    イベントの免許証をCSV（UTF-8）でストリーミング生成
+
+    サーバー側カーソルから chunk_size 件ずつ読み込んで書き出すため、件数によらずメモリ使用量は一定。
+    Excelで文字化けしないよう、先頭にBOMを付ける。利用者の入力した値が数式として
+    実行されないよう、= + - @ タブ 改行(CR) で始まる文字列には先頭に ' を付ける。
+
+    Args:
+        event_id: イベントID
+        fields: 出力するカラム（resolve_export_fields の戻り値）
+        chunk_size: 1回に読み込む行数
+
+    Yields:
+        bytes: CSVデータのチャンク
+    """
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    yield ("\ufeff" + out.getvalue()).encode("utf-8")
+
+    date_indexes = _date_indexes(fields)
+    text_indexes = _text_indexes(fields)
+    async for rows in _iter_license_chunks(event_id, fields, chunk_size):
+        out.seek(0)
+        out.truncate()
+        writer.writerows(csv_rows(rows, date_indexes, text_indexes))
+        yield out.getvalue().encode("utf-8")
+
+
+def _import_pyarrow():
+    """pyarrowは読み込みが重く、Parquetを出力しない環境では不要なため、使うときに初めて読み込む"""
+    import pyarrow
+    import pyarrow.parquet
+    return pyarrow, pyarrow.parquet
+
+
+def parquet_available() -> bool:
+    """Parquetを出力できるか（pyarrowがインストールされているか）"""
+    try:
+        _import_pyarrow()
+    except ImportError:
+        return False
+    return True
+
+
+async def stream_licenses_parquet(
+    event_id: int,
+    fields: Sequence[str],
+    chunk_size: int = LICENSE_EXPORT_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    イベントの免許証をParquetでストリーミング生成（pyarrowが必要）
+
+    chunk_size 件ごとに1つの行グループとして書き出し、最後にフッターを出力する。
+    日時はCSVと同じくisoformat()の文字列で格納する。
+
+    Args:
+        event_id: イベントID
+        fields: 出力するカラム（resolve_export_fields の戻り値）
+        chunk_size: 1回に読み込む行数（行グループの行数）
+
+    Yields:
+        bytes: Parquetデータのチャンク
+    """
+    pa, pq = _import_pyarrow()
+
+    def arrow_type(name: str):
+        column_type = _EXPORT_COLUMNS_BY_FIELD[name].type
+        if isinstance(column_type, Integer):
+            return pa.int64()
+        if isinstance(column_type, Float):
+            return pa.float64()
+        return pa.string()
+
+    schema = pa.schema([(name, arrow_type(name)) for name in fields])
+    date_indexes = set(_date_indexes(fields))
+    buffer = _StreamBuffer()
+    writer = pq.ParquetWriter(buffer, schema)
+    try:
+        async for rows in _iter_license_chunks(event_id, fields, chunk_size):
+            arrays = []
+            for i, values in enumerate(zip(*rows)):
+                if i in date_indexes:
+                    values = [value.isoformat() if value is not None else None for value in values]
+                arrays.append(pa.array(values, type=schema.field(i).type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield buffer.drain()
+    finally:
+        writer.close()
+    # フッター（メタデータ）
+    yield buffer.drain()
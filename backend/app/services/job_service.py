@@ -0,0 +1,83 @@
+import threading
+import traceback
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class Job:
+    """バックグラウンドジョブの進捗状態"""
+
+    def __init__(self, kind: str, description: str = ""):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.description = description
+        self.status = "pending"  # pending / running / completed / failed
+        self.processed = 0
+        self.total: Optional[int] = None
+        self.result: dict = {}
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def advance(self, count: int = 1):
+        self.processed += count
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "processed": self.processed,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobRegistry:
+    """プロセス内のジョブ一覧（完了済みは古いものから破棄）"""
+
+    def __init__(self, max_jobs: int = 200):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._max_jobs = max_jobs
+
+    def create(self, kind: str, description: str = "") -> Job:
+        job = Job(kind, description)
+        with self._lock:
+            self._jobs[job.id] = job
+            if len(self._jobs) > self._max_jobs:
+                for job_id in [j.id for j in self._jobs.values() if j.finished_at][:len(self._jobs) - self._max_jobs]:
+                    del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def run(self, job: Job, func: Callable[[Job], dict]):
+        """
+        ジョブを実行し、状態を更新する（BackgroundTasksやCLIから呼び出す）
+
+        Args:
+            job: 実行するジョブ
+            func: ジョブ本体。進捗はjobに書き込み、結果をdictで返す
+        """
+        job.status = "running"
+        try:
+            job.result = func(job) or {}
+            job.status = "completed"
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.utcnow()
+            print(f"[Job] {job.kind} {job.id} {job.status}: {job.result or job.error}")
+        return job
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import exists, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Event, License
+from app.repositories import events as event_repository
+from app.repositories import licenses as license_repository
+
+
+def archive_event_licenses(db: Session, event_id: int) -> int:
+    """
+    イベントの免許証を licenses_archive に移す（コミットは呼び出し側）
+
+    件数・統計ロールアップは免許証の保存先によらないため変更しない。
+    一覧の内容は変わらないが、読み込み先が変わるため一覧の版は進める。
+
+    Returns:
+        int: 移動した件数
+    """
+    moved = license_repository.move_event_licenses(db, event_id, to_archive=True)
+    event_repository.set_licenses_archived(db, event_id, datetime.utcnow())
+    return moved
+
+
+def restore_event_licenses(db: Session, event_id: int) -> int:
+    """
+    イベントの免許証を licenses_archive から licenses に戻す（コミットは呼び出し側）
+
+    Returns:
+        int: 移動した件数
+    """
+    moved = license_repository.move_event_licenses(db, event_id, to_archive=False)
+    event_repository.set_licenses_archived(db, event_id, None)
+    return moved
+
+
+def find_archivable_events(db: Session, older_than_days: int, event_id: Optional[int] = None) -> List[int]:
+    """
+    アーカイブの対象になるイベント
+
+    無効にしてから（最後に編集してから）older_than_days 日以上経ち、その間に
+    免許証の保存もないイベント。無効化の直後は各ワーカーのイベントキャッシュに
+    有効な状態が残っている可能性があるため、十分な日数を空けて対象にする。
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    stmt = select(Event.id).where(
+        Event.is_active.is_(False),
+        Event.licenses_archived_at.is_(None),
+        Event.updated_at < cutoff,
+        ~exists().where(License.event_id == Event.id, License.created_at >= cutoff),
+    ).order_by(Event.id)
+    if event_id is not None:
+        stmt = stmt.where(Event.id == event_id)
+    return list(db.execute(stmt).scalars())
+
+
+def hot_table_size(db: Session) -> Optional[int]:
+    """
+    licenses テーブルと索引の使用量（バイト）
+
+    SQLite: dbstat仮想テーブルのページ使用量。検索索引（licenses_fts）を含む
+            （削除した行のページは空きページとして再利用される）
+    PostgreSQL: pg_total_relation_size（削除した行の領域はVACUUM後に再利用される）
+    取得できない場合はNone
+    """
+    dialect = db.get_bind().dialect.name
+    try:
+        if dialect == "sqlite":
+            return db.execute(text(
+                "SELECT SUM(pgsize) FROM dbstat "
+                "WHERE name IN (SELECT name FROM sqlite_master "
+                "WHERE tbl_name = 'licenses' OR tbl_name LIKE 'licenses/_fts%' ESCAPE '/')"
+            )).scalar()
+        if dialect == "postgresql":
+            return db.execute(text("SELECT pg_total_relation_size('licenses')")).scalar()
+    except Exception as e:
+        db.rollback()
+        print(f"[Archive] Could not measure the licenses table size: {e}")
+    return None
+
+
+def archive_licenses(
+    db: Session,
+    older_than_days: int,
+    event_id: Optional[int] = None,
+    dry_run: bool = False
+) -> dict:
+    """
+    無効なイベントの古い免許証を licenses_archive に移す（CLI用の同期セッション）
+
+    イベントごとに1トランザクションで移す。移す前にイベントの行をロックし、
+    対象の条件を満たしているかを確認し直す。
+
+    Args:
+        db: セッション
+        older_than_days: 無効化してからの日数
+        event_id: 対象のイベントID（省略時は条件を満たす全イベント）
+        dry_run: Trueの場合は移さず対象のみ集計
+
+    Returns:
+        dict: {events: [{event_id, licenses}], archived_licenses, hot_rows_before, hot_rows_after,
+               hot_bytes_before, hot_bytes_after, dry_run}
+    """
+    hot_rows_before = db.execute(select(func.count()).select_from(License)).scalar()
+    hot_bytes_before = hot_table_size(db)
+
+    archived = []
+    for target_id in find_archivable_events(db, older_than_days, event_id):
+        if dry_run:
+            count = db.execute(select(func.count()).where(License.event_id == target_id)).scalar()
+            archived.append({"event_id": target_id, "licenses": count})
+            continue
+
+        db.execute(select(Event.id).where(Event.id == target_id).with_for_update())
+        if target_id not in find_archivable_events(db, older_than_days, target_id):
+            db.rollback()
+            continue
+        moved = archive_event_licenses(db, target_id)
+        db.commit()
+        archived.append({"event_id": target_id, "licenses": moved})
+
+    hot_rows_after = db.execute(select(func.count()).select_from(License)).scalar()
+    return {
+        "events": archived,
+        "archived_licenses": sum(item["licenses"] for item in archived),
+        "hot_rows_before": hot_rows_before,
+        "hot_rows_after": hot_rows_after,
+        "hot_bytes_before": hot_bytes_before,
+        "hot_bytes_after": hot_table_size(db),
+        "dry_run": dry_run,
+    }
+
+
+def restore_licenses(db: Session, event_id: int) -> Optional[int]:
+    """
+    アーカイブしたイベントの免許証を licenses に戻す（CLI用の同期セッション）
+
+    Returns:
+        Optional[int]: 戻した件数（アーカイブされていない場合はNone）
+    """
+    archived_at = db.execute(
+        select(Event.licenses_archived_at).where(Event.id == event_id).with_for_update()
+    ).scalar()
+    if archived_at is None:
+        db.rollback()
+        return None
+    moved = restore_event_licenses(db, event_id)
+    db.commit()
+    return moved
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.database_models import ArchivedLicense, Event, License
+from app.repositories import events as event_repository
+
+# 複数ワーカーで動かす場合に他プロセスの更新を取り込むまでの最大秒数
+LICENSE_COUNT_CACHE_TTL = float(os.getenv("LICENSE_COUNT_CACHE_TTL", "2"))
+
+
+class LicenseCounter:
+    """
+    イベントごとの免許証件数
+
+    events.license_count を免許証のINSERT/DELETEと同じトランザクションで増減し、
+    コミット後の値をメモリに書き込む（ライトスルー）。読み出しはメモリから行い、
+    COUNT(*) を使わないため件数によらず O(1)。
+    """
+
+    def __init__(self, ttl_seconds: float = LICENSE_COUNT_CACHE_TTL):
+        self._ttl = ttl_seconds
+        self._cache: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, db: Session, event_id: int, delta: int) -> int:
+        """
+        件数を増減する（書き込みトランザクション内で呼び出す。コミットは呼び出し側）
+
+        Returns:
+            int: 増減後の件数（コミット後に store() に渡す）
+        """
+        return event_repository.increment_license_count(db, event_id, delta)
+
+    def store(self, event_id: int, count: int):
+        """コミット済みの件数をキャッシュに書き込む"""
+        with self._lock:
+            self._cache[event_id] = (count, time.monotonic() + self._ttl)
+
+    def invalidate(self, event_id: int):
+        with self._lock:
+            self._cache.pop(event_id, None)
+
+    async def get(self, db: AsyncSession, event_id: int) -> int:
+        """件数を取得（キャッシュになければevents.license_countを読む）"""
+        cached = self._cache.get(event_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        count = await event_repository.get_license_count(db, event_id)
+        self.store(event_id, count)
+        return count
+
+    def repair(self, db: Session, fix: bool = True) -> List[dict]:
+        """
+        events.license_count を実際の件数（アーカイブを含む）と照合し、ずれていれば修正する（CLI用の同期セッション）
+
+        Returns:
+            List[dict]: ずれていたイベント [{event_id, stored, actual}]
+        """
+        actual_counts = {}
+        for model in (License, ArchivedLicense):
+            for event_id, count in db.query(model.event_id, func.count(model.id)).group_by(model.event_id):
+                actual_counts[event_id] = actual_counts.get(event_id, 0) + count
+        mismatches = []
+        for event_id, stored in db.query(Event.id, Event.license_count).all():
+            actual = actual_counts.get(event_id, 0)
+            if stored != actual:
+                mismatches.append({"event_id": event_id, "stored": stored, "actual": actual})
+                if fix:
+                    db.execute(
+                        update(Event)
+                        .where(Event.id == event_id)
+                        .values(license_count=actual, updated_at=Event.updated_at)
+                    )
+        if fix:
+            db.commit()
+            for mismatch in mismatches:
+                self.invalidate(mismatch["event_id"])
+        return mismatches
+
+
+license_counter = LicenseCounter()
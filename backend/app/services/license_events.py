@@ -0,0 +1,193 @@
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# ワーカー間で通知を配るPostgreSQLのチャンネル（LISTEN/NOTIFY）
+LICENSE_EVENTS_CHANNEL = "license_events"
+
+
+class LicenseEventHub:
+    """
+    イベント単位の免許証の追加・削除通知（Pub/Sub）
+
+    直近 history_size 件の通知をイベントごとに保持し、再接続時に
+    Last-Event-ID 以降の分を再送する。IDは「プロセス起動時刻-連番」で、
+    別プロセスのIDや保持範囲より古いIDを受け取った場合は reset を送って
+    クライアントに全件再読み込みさせる。
+
+    start() にPostgreSQLの接続先を渡すと、publish() した通知を NOTIFY で全ワーカーに送り、
+    各ワーカーは LISTEN で受け取った通知を自分の購読者に配る（別ワーカーでの保存も届く）。
+    渡さない場合（SQLite）はプロセス内でのみ配るため、ワーカーは1つで動かすこと。
+    """
+
+    def __init__(self, history_size: int = 500, queue_size: int = 100):
+        self._epoch = str(int(time.time()))
+        self._seq: Dict[int, int] = defaultdict(int)
+        self._history: Dict[int, Deque[Tuple[int, str]]] = defaultdict(lambda: deque(maxlen=history_size))
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._queue_size = queue_size
+        self._conninfo: Optional[str] = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, conninfo: Optional[str]):
+        """
+        ワーカー間の通知の送受信を開始（アプリの lifespan から呼び出す）
+
+        Args:
+            conninfo: PostgreSQLの接続先（libpq形式）。Noneの場合はプロセス内でのみ配る
+        """
+        if conninfo is None:
+            return
+        self._conninfo = conninfo
+        self._outbox = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._send_loop()), asyncio.create_task(self._listen_loop())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._outbox = None
+
+    def publish(self, event_id: int, kind: str, data: dict):
+        """
+        通知を発行（イベントループ上から呼び出す）
+
+        Args:
+            event_id: イベントID
+            kind: 通知の種類（created / deleted）
+            data: 通知内容
+        """
+        if self._outbox is not None:
+            # 自分の購読者にも LISTEN で受け取ってから配る（全ワーカーで同じ順序になる）
+            self._outbox.put_nowait((event_id, kind, data))
+            return
+        self._deliver(event_id, kind, data)
+
+    def _deliver(self, event_id: int, kind: str, data: dict):
+        """このプロセスの購読者に通知を配る"""
+        self._seq[event_id] += 1
+        seq = self._seq[event_id]
+        message = self._format(f"{self._epoch}-{seq}", kind, data)
+        self._history[event_id].append((seq, message))
+
+        for queue in list(self._subscribers[event_id]):
+            try:
+                queue.put_nowait((seq, message))
+            except asyncio.QueueFull:
+                # 受信が追いつかない購読者は切断（Last-Event-IDで再接続させる）
+                self._subscribers[event_id].discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _send_loop(self):
+        """publish() された通知を NOTIFY で送る"""
+        import psycopg
+
+        conn = None
+        while True:
+            event_id, kind, data = await self._outbox.get()
+            payload = json.dumps({"event_id": event_id, "kind": kind, "data": data}, ensure_ascii=False)
+            try:
+                if conn is None or conn.closed:
+                    conn = await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True)
+                await conn.execute("SELECT pg_notify(%s, %s)", (LICENSE_EVENTS_CHANNEL, payload))
+            except Exception as e:
+                # 送れない場合は少なくともこのワーカーの購読者には配る
+                print(f"[LicenseEvents] NOTIFY failed, delivering locally: {e}")
+                conn = None
+                self._deliver(event_id, kind, data)
+
+    async def _listen_loop(self):
+        """LISTEN で受け取った通知をこのプロセスの購読者に配る（切断時は再接続）"""
+        import psycopg
+
+        delay = 1
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {LICENSE_EVENTS_CHANNEL}")
+                    delay = 1
+                    # 接続していない間の通知は受け取れていないため、購読者に全件再読み込みさせる
+                    self._reset_subscribers()
+                    async for notify in conn.notifies():
+                        message = json.loads(notify.payload)
+                        self._deliver(message["event_id"], message["kind"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[LicenseEvents] LISTEN connection lost, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _reset_subscribers(self):
+        for event_id, subscribers in list(self._subscribers.items()):
+            if subscribers:
+                self._deliver(event_id, "reset", {})
+
+    def _format(self, message_id: str, kind: str, data: dict) -> str:
+        return f"id: {message_id}\nevent: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def _replay(self, event_id: int, last_event_id: Optional[str]) -> List[Tuple[int, str]]:
+        """Last-Event-ID以降の通知（連番, 本文）。再送できない場合はresetのみ"""
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        history = self._history[event_id]
+        current = self._seq[event_id]
+        if epoch != self._epoch or not seq.isdigit():
+            return [(current, self._format(f"{self._epoch}-{current}", "reset", {}))]
+
+        seq = int(seq)
+        if history and seq < history[0][0] - 1:
+            return [(current, self._format(f"{self._epoch}-{current}", "reset", {}))]
+        return [(message_seq, message) for message_seq, message in history if message_seq > seq]
+
+    async def stream(
+        self,
+        event_id: int,
+        last_event_id: Optional[str],
+        is_disconnected: Callable[[], Awaitable[bool]],
+        heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[str]:
+        """
+        Server-Sent Events形式で通知を配信
+
+        Args:
+            event_id: イベントID
+            last_event_id: クライアントが最後に受け取ったID
+            is_disconnected: クライアント切断判定
+            heartbeat_seconds: 通知がないときにコメント行を送る間隔
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        # 再送分の取り出しと購読の登録は間にawaitを挟まずに行い、その間に通知が入らないようにする
+        replay = self._replay(event_id, last_event_id)
+        replayed_seq = replay[-1][0] if replay else self._seq[event_id]
+        self._subscribers[event_id].add(queue)
+        try:
+            yield "retry: 3000\n\n"
+            for _, message in replay:
+                yield message
+
+            while not await is_disconnected():
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                seq, message = item
+                # 再送済みの通知は送らない
+                if seq <= replayed_seq:
+                    continue
+                yield message
+        finally:
+            self._subscribers[event_id].discard(queue)
+
+
+license_event_hub = LicenseEventHub()
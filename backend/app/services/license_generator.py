@@ -1,10 +1,13 @@
-from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
 from datetime import date, timedelta
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 import os
 from pathlib import Path
 
+# Pillowは起動を速くするため、免許証の生成時に読み込む
+if TYPE_CHECKING:
+    from PIL import Image, ImageDraw
+
 class LicenseGenerator:
     """ペット健康免許証画像生成サービス"""
 
@@ -14,6 +17,9 @@ class LicenseGenerator:
             os.path.dirname(__file__),
             "../../../image/template.png"
         )
+        # フォント・テンプレート画像は一度読み込んだものを使い回す（warm_up で起動時に読み込む）
+        self._fonts: Optional[Tuple] = None
+        self._template: Optional["Image.Image"] = None
 
     def _find_japanese_font(self) -> Optional[str]:
         """日本語フォントを検索"""
@@ -41,7 +47,15 @@ class LicenseGenerator:
         return None
 
     def _load_japanese_fonts(self) -> Tuple:
-        """日本語フォントを読み込む"""
+        """日本語フォントを読み込む（2回目以降は読み込み済みのものを返す）"""
+        if self._fonts is None:
+            self._fonts = self._read_japanese_fonts()
+        return self._fonts
+
+    def _read_japanese_fonts(self) -> Tuple:
+        """日本語フォントをファイルから読み込む"""
+        from PIL import ImageFont
+
         font_path = self._find_japanese_font()
 
         try:
@@ -65,7 +79,27 @@ class LicenseGenerator:
 
         return font_large, font_medium, font_small
 
-    def _crop_and_resize_for_license(self, img: Image.Image, target_size: tuple) -> Image.Image:
+    def _load_template(self) -> "Image.Image":
+        """テンプレート画像を読み込む（なければ白背景で作成。2回目以降は読み込み済みのものを返す）"""
+        from PIL import Image
+
+        if self._template is None:
+            if os.path.exists(self.template_path):
+                with Image.open(self.template_path) as template:
+                    template.load()
+                    self._template = template.copy()
+            else:
+                # テンプレートがない場合は白背景で作成
+                width, height = 680, 430
+                self._template = Image.new('RGB', (width, height), 'white')
+        return self._template
+
+    def warm_up(self):
+        """Pillow・フォント・テンプレート画像を読み込んでおき、最初の生成を速くする（同期処理）"""
+        self._load_japanese_fonts()
+        self._load_template()
+
+    def _crop_and_resize_for_license(self, img: "Image.Image", target_size: tuple) -> "Image.Image":
         """
         免許証用に画像を中央トリミング&リサイズ
 
@@ -110,13 +144,15 @@ class LicenseGenerator:
         cropped_img = img.crop((left, top, right, bottom))
 
         # リサイズ
+        from PIL import Image
+
         resized_img = cropped_img.resize(target_size, Image.Resampling.LANCZOS)
 
         print(f"画像トリミング: 元サイズ {img.size} -> クロップ {cropped_img.size} -> リサイズ {resized_img.size}")
 
         return resized_img
 
-    def _draw_borders_and_lines(self, draw: ImageDraw.Draw, width: int, height: int):
+    def _draw_borders_and_lines(self, draw: "ImageDraw.ImageDraw", width: int, height: int):
         """罫線と枠線を描画"""
         border_color = (0, 0, 0)
         line_width = 2
@@ -203,14 +239,11 @@ class LicenseGenerator:
         Returns:
             bytes: 生成された免許証画像のバイトデータ
         """
+        from PIL import Image, ImageDraw
+
         try:
-            # テンプレート画像を読み込み（なければ新規作成）
-            if os.path.exists(self.template_path):
-                license_img = Image.open(self.template_path).copy()
-            else:
-                # テンプレートがない場合は白背景で作成
-                width, height = 680, 430
-                license_img = Image.new('RGB', (width, height), 'white')
+            # テンプレート画像を複製して描画する
+            license_img = self._load_template().copy()
 
             # 描画オブジェクト作成
             draw = ImageDraw.Draw(license_img)
@@ -1,6 +1,5 @@
 import os
 import json
-from openai import AsyncOpenAI
 from typing import Optional
 
 
@@ -9,12 +8,22 @@ class OpenAIService:
 
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        if self.api_key:
-            self.client = AsyncOpenAI(api_key=self.api_key)
-        else:
-            self.client = None
+        self._client = None
+        if not self.api_key:
             print("[OpenAIService] Warning: OPENAI_API_KEY not set")
 
+    @property
+    def client(self):
+        """OpenAIのクライアント（SDKの読み込みが重いため、起動時ではなく初回の利用時に作成。キー未設定はNone）"""
+        if self._client is None and self.api_key:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        return self._client
+
+    def warm_up(self):
+        """SDKの読み込みとクライアントの作成を済ませておく（キー未設定の場合は何もしない。同期処理）"""
+        self.client
+
     async def generate_pet_profile(
         self,
         animal_type: str,
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+# ログインの試行回数の上限（トークンバケット。burst回まで連続で試行でき、1分あたりper_minute回ずつ回復）
+LOGIN_RATE_PER_IP_BURST = int(os.getenv("LOGIN_RATE_PER_IP_BURST", "20"))
+LOGIN_RATE_PER_IP_PER_MINUTE = float(os.getenv("LOGIN_RATE_PER_IP_PER_MINUTE", "20"))
+LOGIN_RATE_PER_USER_BURST = int(os.getenv("LOGIN_RATE_PER_USER_BURST", "10"))
+LOGIN_RATE_PER_USER_PER_MINUTE = float(os.getenv("LOGIN_RATE_PER_USER_PER_MINUTE", "10"))
+
+
+class TokenBucketLimiter:
+    """
+    キーごとのトークンバケットによる回数制限
+
+    キーごとに最大 capacity 個のトークンを持ち、1分あたり per_minute 個ずつ回復する。
+    1回の試行で1個消費し、残っていなければ拒否する。保持するキーが max_keys を超えたら、
+    満タンまで回復したキー（しばらく試行のないキー）から破棄する。
+    """
+
+    def __init__(self, capacity: int, per_minute: float, max_keys: int = 10000):
+        self._capacity = float(capacity)
+        self._rate = per_minute / 60
+        self._max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # キー → (残りトークン, 更新時刻)
+        self._lock = threading.Lock()
+
+    def _refill(self, key: str, now: float) -> float:
+        tokens, updated_at = self._buckets.get(key, (self._capacity, now))
+        return min(self._capacity, tokens + (now - updated_at) * self._rate)
+
+    def acquire(self, key: str) -> float:
+        """
+        トークンを1個消費
+
+        Returns:
+            float: 0（許可）または次のトークンが回復するまでの秒数（拒否）
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self._rate if self._rate > 0 else float("inf")
+
+            if key not in self._buckets and len(self._buckets) >= self._max_keys:
+                self._evict(now)
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+
+    def _evict(self, now: float):
+        """満タンまで回復したキーを破棄し、それでも上限に達している場合は古いものから破棄（ロック内で呼び出す）"""
+        idle = [key for key in self._buckets if self._refill(key, now) >= self._capacity]
+        for key in idle:
+            del self._buckets[key]
+        while len(self._buckets) >= self._max_keys:
+            del self._buckets[next(iter(self._buckets))]
+
+
+login_ip_limiter = TokenBucketLimiter(LOGIN_RATE_PER_IP_BURST, LOGIN_RATE_PER_IP_PER_MINUTE)
+login_username_limiter = TokenBucketLimiter(LOGIN_RATE_PER_USER_BURST, LOGIN_RATE_PER_USER_PER_MINUTE)
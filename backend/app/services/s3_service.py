@@ -1,11 +1,15 @@
-import boto3
-from botocore.exceptions import ClientError
+import asyncio
+import hashlib
 import os
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
 import uuid
 from pathlib import Path
 
+# DeleteObjects APIの1リクエストあたりの上限
+DELETE_BATCH_SIZE = 1000
+
+
 class S3Service:
     """AWS S3ストレージサービス（開発モードはローカル保存）"""
 
@@ -17,26 +21,48 @@ class S3Service:
         aws_key = os.getenv("AWS_ACCESS_KEY_ID")
         self.dev_mode = not aws_key or aws_key == "your_aws_access_key"
 
-        # デバッグログ
-        print(f"[S3Service Init] AWS_ACCESS_KEY_ID: {aws_key}")
+        # オリジナル画像を内容ハッシュのキーで保存し、同一画像の重複保存を避ける
+        self.dedup_originals = os.getenv("DEDUP_ORIGINALS", "false").lower() == "true"
+
+        # 参照頻度の低い画像の保存先（S3はストレージクラス、開発モードは別ディレクトリ）
+        self.cold_storage_class = os.getenv("S3_COLD_STORAGE_CLASS", "STANDARD_IA")
+
+        # デバッグログ（認証情報は出力しない）
         print(f"[S3Service Init] AWS_S3_BUCKET: {self.bucket_name}")
         print(f"[S3Service Init] AWS_REGION: {self.region}")
         print(f"[S3Service Init] Dev mode: {self.dev_mode}")
 
         if self.dev_mode:
-            # 開発モード: ローカルディレクトリに保存
+            # 開発モード: ローカルディレクトリに保存（ディレクトリは初回の書き込み時に作成）
             self.local_storage = Path("./storage")
-            self.local_storage.mkdir(exist_ok=True)
-            (self.local_storage / "licenses").mkdir(exist_ok=True)
-            (self.local_storage / "originals").mkdir(exist_ok=True)
-        else:
-            # 本番モード: S3を使用
-            self.s3_client = boto3.client(
+            self.cold_storage = Path("./storage_cold")
+        self._aws_key = aws_key
+        self._s3_client = None
+
+    @property
+    def s3_client(self):
+        """
+        本番モードのS3クライアント
+        boto3の読み込みとクライアントの作成は重いため、起動時ではなく初回の利用時に行う
+        """
+        if self._s3_client is None:
+            import boto3
+            self._s3_client = boto3.client(
                 's3',
-                aws_access_key_id=aws_key,
+                aws_access_key_id=self._aws_key,
                 aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
                 region_name=self.region
             )
+        return self._s3_client
+
+    def warm_up(self):
+        """
+        S3クライアントを作成し、バケットへの接続（TLSハンドシェイク）を済ませておく（同期処理）
+        接続はクライアントのコネクションプールに残り、最初のアップロードで再利用される。開発モードでは何もしない
+        """
+        if self.dev_mode:
+            return
+        self.s3_client.head_bucket(Bucket=self.bucket_name)
 
     async def upload_image(
         self,
@@ -69,9 +95,7 @@ class S3Service:
 
             if self.dev_mode:
                 # 開発モード: ローカルに保存
-                file_path = self.local_storage / filename
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_bytes(image_data)
+                await asyncio.to_thread(self._write_local, filename, image_data)
 
                 # ローカルファイルのURLを生成
                 url = f"http://localhost:8000/storage/{filename}"
@@ -81,8 +105,9 @@ class S3Service:
                     "url": url
                 }
             else:
-                # 本番モード: S3にアップロード
-                self.s3_client.put_object(
+                # 本番モード: S3にアップロード（待ち時間中にイベントループを止めないようスレッドで実行）
+                await asyncio.to_thread(
+                    self.s3_client.put_object,
                     Bucket=self.bucket_name,
                     Key=filename,
                     Body=image_data,
@@ -104,7 +129,8 @@ class S3Service:
         self,
         image_data: bytes,
         filename: Optional[str] = None,
-        event_code: Optional[str] = None
+        event_code: Optional[str] = None,
+        content_addressed: Optional[bool] = None
     ) -> dict:
         """
         オリジナル画像をS3またはローカルにアップロード
@@ -113,11 +139,32 @@ class S3Service:
             image_data: 画像のバイトデータ
             filename: ファイル名
             event_code: イベントコード（指定するとイベントフォルダーに保存）
+            content_addressed: 内容ハッシュ（SHA-256）をキーにする
+                （未指定時は環境変数 DEDUP_ORIGINALS に従う）
+                同じキーが既に存在する場合はアップロードを省略し、更新日時だけ現在時刻にする
+                （参照されていない古いオブジェクトでも、保存のコミット前にGCで消されないように）
 
         Returns:
-            dict: {key, url}
+            dict: {key, url, deduplicated}
         """
+        if content_addressed is None:
+            content_addressed = self.dedup_originals
+
         try:
+            if not filename and content_addressed:
+                digest = hashlib.sha256(image_data).hexdigest()
+                if event_code:
+                    filename = f"events/{event_code}/originals/sha256/{digest}.jpg"
+                else:
+                    filename = f"originals/sha256/{digest}.jpg"
+
+                if await self.touch_object(filename):
+                    return {
+                        "key": filename,
+                        "url": self._build_url(filename),
+                        "deduplicated": True
+                    }
+
             if not filename:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 unique_id = str(uuid.uuid4())[:8]
@@ -128,38 +175,133 @@ class S3Service:
 
             if self.dev_mode:
                 # 開発モード: ローカルに保存
-                file_path = self.local_storage / filename
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_bytes(image_data)
-
-                url = f"http://localhost:8000/storage/{filename}"
+                await asyncio.to_thread(self._write_local, filename, image_data)
 
                 return {
                     "key": filename,
-                    "url": url
+                    "url": self._build_url(filename),
+                    "deduplicated": False
                 }
             else:
                 # 本番モード: S3にアップロード
-                self.s3_client.put_object(
+                await asyncio.to_thread(
+                    self.s3_client.put_object,
                     Bucket=self.bucket_name,
                     Key=filename,
                     Body=image_data,
                     ContentType="image/jpeg"
                 )
 
-                url = f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{filename}"
-
                 return {
                     "key": filename,
-                    "url": url
+                    "url": self._build_url(filename),
+                    "deduplicated": False
                 }
 
         except Exception as e:
             raise Exception(f"画像アップロードエラー: {str(e)}")
 
+    def _write_local(self, key: str, data: bytes) -> None:
+        """開発モードのローカル保存"""
+        file_path = self.local_storage / key
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(data)
+
+    def _build_url(self, key: str) -> str:
+        """オブジェクトキーから公開URLを生成"""
+        if self.dev_mode:
+            if self._local_path(key).is_relative_to(self.cold_storage):
+                return f"http://localhost:8000/storage_cold/{key}"
+            return f"http://localhost:8000/storage/{key}"
+        return f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{key}"
+
+    @staticmethod
+    def is_content_addressed(key: str) -> bool:
+        """内容ハッシュをキーにしたオリジナル画像か（複数の免許証から参照されうる）"""
+        return "/sha256/" in f"/{key}"
+
+    async def touch_object(self, key: str) -> bool:
+        """
+        既存オブジェクトの更新日時を現在時刻にする（S3は同じキーへのコピー）
+
+        Args:
+            key: S3オブジェクトキー
+
+        Returns:
+            bool: オブジェクトが存在した場合True
+        """
+        if self.dev_mode:
+            try:
+                os.utime(self.local_storage / key)
+            except FileNotFoundError:
+                return False
+            return True
+
+        from botocore.exceptions import ClientError
+        try:
+            await asyncio.to_thread(
+                self.s3_client.copy_object,
+                Bucket=self.bucket_name,
+                Key=key,
+                CopySource={"Bucket": self.bucket_name, "Key": key},
+                MetadataDirective="REPLACE",
+                ContentType="image/jpeg"
+            )
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def get_last_modified(self, key: str) -> Optional[datetime]:
+        """
+        オブジェクトの現在の更新日時（S3はHEADリクエスト。同期版）
+
+        Args:
+            key: S3オブジェクトキー
+
+        Returns:
+            Optional[datetime]: 更新日時（UTC）。存在しない場合はNone
+        """
+        if self.dev_mode:
+            try:
+                return datetime.fromtimestamp(self._local_path(key).stat().st_mtime, tz=timezone.utc)
+            except FileNotFoundError:
+                return None
+
+        from botocore.exceptions import ClientError
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=key)["LastModified"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def object_exists(self, key: str) -> bool:
+        """
+        オブジェクトが存在するか確認（S3はHEADリクエスト）
+
+        Args:
+            key: S3オブジェクトキー
+
+        Returns:
+            bool: 存在する場合True
+        """
+        if self.dev_mode:
+            return self._local_path(key).is_file()
+
+        from botocore.exceptions import ClientError
+        try:
+            await asyncio.to_thread(self.s3_client.head_object, Bucket=self.bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
     async def delete_image(self, key: str) -> bool:
         """
-        S3から画像を削除
+        S3またはローカルから画像を削除
 
         Args:
             key: S3オブジェクトキー
@@ -167,6 +309,11 @@ class S3Service:
         Returns:
             bool: 削除成功かどうか
         """
+        if self.dev_mode:
+            self._local_path(key).unlink(missing_ok=True)
+            return True
+
+        from botocore.exceptions import ClientError
         try:
             self.s3_client.delete_object(
                 Bucket=self.bucket_name,
@@ -175,3 +322,184 @@ class S3Service:
             return True
         except ClientError as e:
             raise Exception(f"S3削除エラー: {str(e)}")
+
+    def delete_objects(self, keys: List[str]) -> int:
+        """
+        複数オブジェクトを一括削除（S3はDeleteObjectsで1000件ずつ）
+
+        Args:
+            keys: S3オブジェクトキーのリスト
+
+        Returns:
+            int: 削除した件数
+        """
+        deleted = 0
+        if self.dev_mode:
+            for key in keys:
+                file_path = self._local_path(key)
+                if file_path.is_file():
+                    file_path.unlink()
+                    deleted += 1
+            return deleted
+
+        from botocore.exceptions import ClientError
+        for i in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[i:i + DELETE_BATCH_SIZE]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                )
+            except ClientError as e:
+                raise Exception(f"S3削除エラー: {str(e)}")
+            errors = response.get("Errors", [])
+            if errors:
+                raise Exception(f"S3削除エラー: {errors[0].get('Key')}: {errors[0].get('Message')}")
+            deleted += len(batch)
+        return deleted
+
+    def remove_empty_dirs(self, prefix: str) -> None:
+        """開発モードでプレフィックス配下の空ディレクトリを削除（S3では何もしない）"""
+        if not self.dev_mode:
+            return
+        for root in (self.local_storage / prefix, self.cold_storage / prefix):
+            if not root.is_dir():
+                continue
+            for dir_path, _, _ in sorted(os.walk(root), key=lambda w: len(w[0]), reverse=True):
+                try:
+                    os.rmdir(dir_path)
+                except OSError:
+                    pass
+
+    def iter_object_pages(self, prefix: str, page_size: int = 1000) -> Iterator[List[dict]]:
+        """
+        プレフィックス配下のオブジェクトをページ単位で列挙（キー昇順）
+
+        Args:
+            prefix: キーのプレフィックス（例: events/{event_code}/）
+            page_size: 1ページあたりの最大件数
+
+        Yields:
+            List[dict]: [{key, size, last_modified}]
+        """
+        if self.dev_mode:
+            # 通常ディレクトリ → コールドディレクトリの順に列挙
+            page = []
+            for base in (self.local_storage, self.cold_storage):
+                root = base / prefix
+                if not root.exists():
+                    continue
+                for file_path, stat in self._walk_local(root):
+                    page.append({
+                        "key": file_path.relative_to(base).as_posix(),
+                        "size": stat.st_size,
+                        "last_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                    })
+                    if len(page) >= page_size:
+                        yield page
+                        page = []
+            if page:
+                yield page
+        else:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for response in paginator.paginate(
+                Bucket=self.bucket_name,
+                Prefix=prefix,
+                PaginationConfig={"PageSize": page_size}
+            ):
+                contents = response.get("Contents", [])
+                if contents:
+                    yield [
+                        {
+                            "key": obj["Key"],
+                            "size": obj["Size"],
+                            "last_modified": obj["LastModified"],
+                        }
+                        for obj in contents
+                    ]
+
+    def _walk_local(self, directory: Path) -> Iterator[tuple]:
+        """ディレクトリを名前順に再帰走査（メモリ使用量はディレクトリ1階層分のみ）"""
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk_local(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                yield Path(entry.path), entry.stat()
+
+    def _local_path(self, key: str) -> Path:
+        """開発モードでキーに対応するファイルパス（コールドディレクトリにのみ存在する場合はそちら）"""
+        hot_path = self.local_storage / key
+        if not hot_path.exists():
+            cold_path = self.cold_storage / key
+            if cold_path.exists():
+                return cold_path
+        return hot_path
+
+    def get_object_bytes(self, key: str) -> bytes:
+        """
+        S3またはローカルから画像を読み込む（同期版）
+
+        Args:
+            key: S3オブジェクトキー
+
+        Returns:
+            bytes: 画像のバイトデータ
+        """
+        try:
+            if self.dev_mode:
+                return self._local_path(key).read_bytes()
+
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            return response["Body"].read()
+        except Exception as e:
+            raise Exception(f"画像読み込みエラー: {str(e)}")
+
+    async def download_image(self, key: str) -> bytes:
+        """
+        S3またはローカルから画像を読み込む（ブロッキングI/Oはスレッドで実行）
+
+        Args:
+            key: S3オブジェクトキー
+
+        Returns:
+            bytes: 画像のバイトデータ
+        """
+        return await asyncio.to_thread(self.get_object_bytes, key)
+
+    def put_cold_object(self, key: str, data: bytes, content_type: str = "image/jpeg") -> dict:
+        """
+        参照頻度の低いオブジェクトを低コストの保存先に書き込む
+        （S3は S3_COLD_STORAGE_CLASS のストレージクラス、開発モードは ./storage_cold）
+
+        Args:
+            key: S3オブジェクトキー
+            data: バイトデータ
+            content_type: MIMEタイプ
+
+        Returns:
+            dict: {key, url}
+        """
+        try:
+            if self.dev_mode:
+                file_path = self.cold_storage / key
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_bytes(data)
+                return {
+                    "key": key,
+                    "url": f"http://localhost:8000/storage_cold/{key}"
+                }
+
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=data,
+                ContentType=content_type,
+                StorageClass=self.cold_storage_class
+            )
+            return {
+                "key": key,
+                "url": self._build_url(key)
+            }
+        except Exception as e:
+            raise Exception(f"画像アップロードエラー: {str(e)}")
+
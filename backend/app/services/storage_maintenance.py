@@ -0,0 +1,261 @@
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from pathlib import PurePosixPath
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.database_models import ArchivedLicense, License
+from app.repositories import events as event_repository
+from app.services.job_service import Job
+from app.services.s3_service import S3Service
+
+
+def purge_event_objects(
+    s3_service: S3Service,
+    job: Job,
+    event_code: str,
+    extra_keys: List[str]
+) -> dict:
+    """
+    削除済みイベントの保存画像をまとめて削除
+
+    events/{event_code}/ 配下をページ単位（1000件）で列挙し、ページごとに
+    一括削除する。プレフィックス外のキー（旧形式の保存先）は extra_keys で渡す。
+
+    Args:
+        s3_service: ストレージサービス
+        job: 進捗を書き込むジョブ
+        event_code: イベントコード
+        extra_keys: プレフィックス外で削除するキー
+
+    Returns:
+        dict: {deleted_objects}
+    """
+    prefix = f"events/{event_code}/"
+    deleted = 0
+
+    for page in s3_service.iter_object_pages(prefix):
+        deleted += s3_service.delete_objects([obj["key"] for obj in page])
+        job.advance(len(page))
+
+    if extra_keys:
+        deleted += s3_service.delete_objects(extra_keys)
+        job.advance(len(extra_keys))
+
+    s3_service.remove_empty_dirs(prefix)
+    return {"deleted_objects": deleted}
+
+
+def _recompress_jpeg(image_data: bytes, quality: int, max_dimension: int) -> bytes:
+    """画像を長辺 max_dimension 以下のJPEGに再圧縮"""
+    from PIL import Image, ImageOps
+
+    img = Image.open(BytesIO(image_data))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    output = BytesIO()
+    img.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def _cold_key(key: str) -> str:
+    """
+    再圧縮した画像のキー（元のキーと同じ階層の cold/ 配下。再圧縮後は必ずJPEGのため拡張子は.jpg）
+
+    内容ハッシュのキーは「キー = 内容のハッシュ」を保つため、再圧縮した内容で上書きせず別のキーにする
+    """
+    path = PurePosixPath(key)
+    return str(path.parent / "cold" / path.with_suffix(".jpg").name)
+
+
+def tier_original_images(
+    s3_service: S3Service,
+    job: Job,
+    event_id: Optional[int] = None,
+    older_than_days: Optional[int] = None,
+    quality: int = 80,
+    max_dimension: int = 2048,
+    batch_size: int = 200
+) -> dict:
+    """
+    オリジナル画像を再圧縮し、低コストの保存先へ移動
+
+    対象キーはキー順に batch_size 件ずつ取得して処理する。1キーごとに
+    コールド保存先（元とは別のキー）へ書き込み → 参照する全免許証のキー・URLを更新 → 元オブジェクトを削除
+    の順で進めるため、途中で失敗しても参照切れにはならない。内容ハッシュのオリジナル画像は
+    同時に保存された免許証が再利用している可能性があるため、ここでは削除せず孤立画像のGCに任せる。
+
+    Args:
+        s3_service: ストレージサービス
+        job: 進捗を書き込むジョブ
+        event_id: 対象イベントID（指定しない場合は全イベント）
+        older_than_days: この日数より前に作成された免許証のみ対象
+        quality: JPEG品質
+        max_dimension: 長辺の最大ピクセル数
+        batch_size: 1回に取得するキー数
+
+    Returns:
+        dict: {processed_objects, failed_objects, bytes_before, bytes_after, bytes_reclaimed}
+    """
+    bytes_before = 0
+    bytes_after = 0
+    failed = 0
+
+    db = SessionLocal()
+    try:
+        # アーカイブ済みのイベントの免許証（licenses_archive）も対象にする
+        for model in (License, ArchivedLicense):
+            query = db.query(model.s3_original_key).filter(
+                model.s3_original_key.isnot(None),
+                model.original_tiered_at.is_(None)
+            )
+            if event_id is not None:
+                query = query.filter(model.event_id == event_id)
+            if older_than_days is not None:
+                query = query.filter(model.created_at < datetime.utcnow() - timedelta(days=older_than_days))
+
+            last_key = ""
+            while True:
+                keys = [key for (key,) in query.filter(
+                    model.s3_original_key > last_key
+                ).distinct().order_by(model.s3_original_key).limit(batch_size)]
+                if not keys:
+                    break
+                last_key = keys[-1]
+
+                for key in keys:
+                    try:
+                        original_data = s3_service.get_object_bytes(key)
+                        new_data = _recompress_jpeg(original_data, quality, max_dimension)
+                        # 元がJPEGで再圧縮しても小さくならない場合はそのまま移す
+                        if len(new_data) >= len(original_data) and original_data[:2] == b"\xff\xd8":
+                            new_data = original_data
+
+                        upload = s3_service.put_cold_object(_cold_key(key), new_data, "image/jpeg")
+
+                        for target in (License, ArchivedLicense):
+                            db.query(target).filter(target.s3_original_key == key).update({
+                                target.s3_original_key: upload["key"],
+                                target.original_image_url: upload["url"],
+                                target.original_tiered_at: datetime.utcnow(),
+                            }, synchronize_session=False)
+                            # 一覧のURLが変わるため、ETagが変わるよう一覧の版を進める
+                            event_repository.bump_license_version(
+                                db, select(target.event_id).where(target.s3_original_key == upload["key"])
+                            )
+                        db.commit()
+
+                        if not s3_service.is_content_addressed(key):
+                            s3_service.delete_objects([key])
+
+                        bytes_before += len(original_data)
+                        bytes_after += len(new_data)
+                    except Exception as e:
+                        db.rollback()
+                        failed += 1
+                        print(f"[Tiering] Failed to tier {key}: {e}")
+                    job.advance()
+    finally:
+        db.close()
+
+    return {
+        "processed_objects": job.processed - failed,
+        "failed_objects": failed,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_reclaimed": bytes_before - bytes_after,
+    }
+
+
+def _referenced_keys(db, keys: List[str]) -> Set[str]:
+    """キーのうち免許証（アーカイブを含む）から参照されているものを返す"""
+    referenced = set()
+    for column in (License.s3_license_key, License.s3_original_key,
+                   ArchivedLicense.s3_license_key, ArchivedLicense.s3_original_key):
+        referenced.update(key for (key,) in db.query(column).filter(column.in_(keys)))
+    return referenced
+
+
+def _recheck_content_addressed(s3_service: S3Service, db, orphans: List[dict], cutoff: datetime) -> List[dict]:
+    """
+    内容ハッシュの孤立候補を削除直前に確かめ直す
+
+    列挙した後に同じ画像の保存が更新日時を進め（touch_object）、参照をコミットしている
+    可能性があるため、現在の更新日時を読み直して cutoff 以降のものを除き、
+    残ったものの参照を改めて問い合わせる（更新日時 → 参照の順で確認する）
+    """
+    candidates = [obj for obj in orphans if s3_service.is_content_addressed(obj["key"])]
+    if not candidates:
+        return orphans
+
+    touched = set()
+    for obj in candidates:
+        last_modified = s3_service.get_last_modified(obj["key"])
+        if last_modified is None or last_modified >= cutoff:
+            touched.add(obj["key"])
+    referenced = _referenced_keys(db, [obj["key"] for obj in candidates if obj["key"] not in touched])
+    return [obj for obj in orphans if obj["key"] not in touched and obj["key"] not in referenced]
+
+
+def collect_orphaned_objects(
+    s3_service: S3Service,
+    job: Job,
+    prefixes: Iterable[str],
+    grace_period: timedelta,
+    dry_run: bool = False
+) -> dict:
+    """
+    どの免許証からも参照されていない保存画像を削除（ガベージコレクション）
+
+    プレフィックス配下をページ単位（1000件）で列挙し、ページごとに
+    licenses・licenses_archiveテーブルへ参照有無を問い合わせる。全キーをメモリに載せないため、
+    数百万件でもメモリ使用量はページサイズ分で一定。
+    保存直後でまだコミットされていない画像を消さないよう、grace_period より
+    新しいオブジェクトは対象外とする（内容ハッシュの画像は削除直前に更新日時を読み直す）。
+
+    Args:
+        s3_service: ストレージサービス
+        job: 進捗を書き込むジョブ
+        prefixes: 走査するキーのプレフィックス
+        grace_period: 削除対象とする最小経過時間
+        dry_run: Trueの場合は削除せず件数のみ集計
+
+    Returns:
+        dict: {scanned_objects, orphaned_objects, deleted_objects, orphaned_bytes, dry_run}
+    """
+    cutoff = datetime.now(timezone.utc) - grace_period
+    orphaned = 0
+    orphaned_bytes = 0
+    deleted = 0
+
+    db = SessionLocal()
+    try:
+        for prefix in prefixes:
+            for page in s3_service.iter_object_pages(prefix):
+                referenced = _referenced_keys(db, [obj["key"] for obj in page])
+                orphans = [
+                    obj for obj in page
+                    if obj["key"] not in referenced and obj["last_modified"] < cutoff
+                ]
+                orphans = _recheck_content_addressed(s3_service, db, orphans, cutoff)
+                orphaned += len(orphans)
+                orphaned_bytes += sum(obj["size"] for obj in orphans)
+                if orphans and not dry_run:
+                    deleted += s3_service.delete_objects([obj["key"] for obj in orphans])
+                job.advance(len(page))
+            s3_service.remove_empty_dirs(prefix)
+    finally:
+        db.close()
+
+    return {
+        "scanned_objects": job.processed,
+        "orphaned_objects": orphaned,
+        "deleted_objects": deleted,
+        "orphaned_bytes": orphaned_bytes,
+        "dry_run": dry_run,
+    }
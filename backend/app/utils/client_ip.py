@@ -0,0 +1,56 @@
+import ipaddress
+import os
+from typing import List, Optional, Union
+
+from starlette.requests import Request
+
+# X-Forwarded-For を信頼するリバースプロキシ・ロードバランサーのアドレス（カンマ区切り、CIDR可、* はすべて）
+# 未指定の場合は直接の接続元をクライアントのIPとする（プロキシの背後ではプロキシのIPになる）
+TRUSTED_PROXY_IPS = os.getenv("TRUSTED_PROXY_IPS", "")
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def _parse_networks(value: str) -> List[Network]:
+    networks = []
+    for item in value.split(","):
+        item = item.strip()
+        if item == "*":
+            networks += [ipaddress.ip_network("0.0.0.0/0"), ipaddress.ip_network("::/0")]
+        elif item:
+            networks.append(ipaddress.ip_network(item, strict=False))
+    return networks
+
+
+_trusted_networks = _parse_networks(TRUSTED_PROXY_IPS)
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_networks)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    リクエストを送ったクライアントのIP
+
+    直接の接続元が信頼するプロキシの場合は X-Forwarded-For を右（プロキシに近い側）からたどり、
+    信頼するプロキシでない最初のアドレスを返す。左側はクライアントが自由に書けるため使わない。
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not _is_trusted_proxy(peer):
+        return peer
+
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else peer
@@ -0,0 +1,20 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+def load_environment() -> Path:
+    """
+    .envファイルを読み込む
+    Docker環境では/app/.env、ローカルでは相対パス
+
+    Returns:
+        Path: 読み込んだ.envのパス
+    """
+    if os.path.exists("/app/.env"):
+        env_path = Path("/app/.env")
+    else:
+        env_path = Path(__file__).parent.parent.parent / ".env"
+    load_dotenv(dotenv_path=env_path)
+    return env_path
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import Response
+
+# ブラウザにキャッシュさせつつ、毎回ETagで再検証させる
+ETAG_CACHE_CONTROL = "no-cache"
+
+
+def weak_etag(*parts) -> str:
+    """
+    弱いETagを作る（同じ内容を表す値から組み立てる）
+
+    Args:
+        parts: 版を表す値（イベントID・版番号など）
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Matchヘッダーが現在のETagと一致するか（弱い比較）"""
+    if not if_none_match:
+        return False
+    current = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == current:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """304 Not Modified（本文なし）"""
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
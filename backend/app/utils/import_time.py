@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, NamedTuple
+
+# バックエンドのディレクトリ（app パッケージの親）
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def measure_import_time(module: str = "app.main") -> List[ImportTiming]:
+    """
+    新しいPythonプロセスで module をインポートし、python -X importtime の結果を返す
+
+    既に読み込まれたモジュールの影響を受けないよう、別プロセスで計測する。
+
+    Returns:
+        List[ImportTiming]: インポートしたモジュールごとの時間（インポートした順）
+
+    Raises:
+        RuntimeError: インポートに失敗した場合
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us)))
+    return timings
@@ -0,0 +1,51 @@
+"""
+条件付きGETのスループット：200（本文あり）と 304 Not Modified（If-None-Matchが一致）
+
+rows 件の免許証があるイベントで、一覧のページ・/new・公開イベント情報を
+同じクライアントから連続で requests 回取得し、毎秒リクエスト数と応答の大きさを比べる。
+
+    cd backend
+    python -m benchmarks.bench_etag [--rows 2000] [--requests 300]
+"""
+import argparse
+import time
+
+from benchmarks.common import admin_headers, app_client, create_event, seed_uniform_licenses, use_temporary_database
+
+
+def _throughput(client, url: str, headers: dict, requests: int):
+    client.get(url, headers=headers)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+    return response.status_code, requests / (time.perf_counter() - started), len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="イベントの免許証の件数")
+    parser.add_argument("--requests", type=int, default=300, help="URL・条件ごとのリクエスト数")
+    args = parser.parse_args()
+
+    use_temporary_database()
+    with app_client() as client:
+        event = create_event(client, admin_headers(client))
+        code = event["event_code"]
+        seed_uniform_licenses(event["id"], args.rows)
+
+        for url in (
+            f"/api/licenses/{code}/paginated?per_page=100",
+            f"/api/licenses/{code}/new?since_id={max(0, args.rows - 500)}",
+            f"/api/events/{code}",
+        ):
+            etag = client.get(url).headers["etag"]
+            results = []
+            for label, headers in (("200", {}), ("304", {"If-None-Match": etag})):
+                status, rps, size = _throughput(client, url, headers, args.requests)
+                assert str(status) == label, f"{url}: {status}"
+                results.append(f"{label} {rps:6.0f} req/s {size / 1024:6.1f} KB")
+            print(f"{url:<48} " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
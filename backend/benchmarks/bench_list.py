@@ -0,0 +1,71 @@
+"""
+免許証一覧（GET /api/licenses/{event_code}）の応答時間
+
+1k・10k・50k件のイベントで、全件一覧と100件のページを計測する。比較として、
+同じ免許証をORMオブジェクトで読み込みpydanticで変換する従来の方式の時間も計測し、
+一覧の内容が従来の方式と一致することを確認する。
+
+    cd backend
+    python -m benchmarks.bench_list [--sizes 1000,10000,50000] [--repeat 5]
+"""
+import argparse
+from statistics import median
+
+from benchmarks.common import (
+    admin_headers,
+    app_client,
+    create_event,
+    measure_ms,
+    seed_uniform_licenses,
+    use_temporary_database,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="計測する件数（カンマ区切り、昇順）")
+    parser.add_argument("--repeat", type=int, default=5, help="各計測の回数（中央値を表示）")
+    args = parser.parse_args()
+
+    use_temporary_database()
+    from app.api.licenses import _license_to_response
+    from app.database import SessionLocal
+    from app.models.database_models import License
+
+    with app_client() as client:
+        event = create_event(client, admin_headers(client))
+        code = event["event_code"]
+
+        seeded = 0
+        for size in (int(size) for size in args.sizes.split(",")):
+            seed_uniform_licenses(event["id"], size - seeded, start=seeded + 1)
+            seeded = size
+
+            response = client.get(f"/api/licenses/{code}")
+            full = measure_ms(lambda: client.get(f"/api/licenses/{code}"), args.repeat)
+            page = measure_ms(lambda: client.get(f"/api/licenses/{code}/paginated?per_page=100&page=5"), args.repeat)
+
+            db = SessionLocal()
+            try:
+                def orm_conversion():
+                    return [
+                        _license_to_response(lic).model_dump(mode="json")
+                        for lic in db.query(License)
+                        .filter(License.event_id == event["id"])
+                        .order_by(License.created_at.desc(), License.id.desc())
+                    ]
+                expected = orm_conversion()
+                orm = measure_ms(orm_conversion, args.repeat)
+            finally:
+                db.close()
+            assert response.json() == expected, "一覧の内容が従来の方式と一致しません"
+
+            print(
+                f"{size:>7} rows: full list {median(full):7.1f} ms"
+                f" (ORM + pydantic conversion alone {median(orm):7.1f} ms),"
+                f" page of 100 {median(page):5.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
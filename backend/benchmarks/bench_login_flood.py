@@ -0,0 +1,114 @@
+"""
+ログインの連続試行（フラッド）中の公開エンドポイントの応答時間
+
+uvicorn（ワーカー1つ）を起動し、公開イベント情報（GET /api/events/{event_code}）を
+10ミリ秒ごとに取得して応答時間を計測する。まず負荷なしで idle 秒、次に clients 個の
+クライアントが誤ったパスワードでのログインを休みなく送り続ける中で duration 秒計測する。
+ログインはbcryptの照合とレート制限を通るため、制限が効いていれば公開エンドポイントの
+応答時間は負荷なしの場合とほぼ変わらない。
+    --no-limits  ログインのレート制限を実質なしにしたサーバーで比較する
+    --control    ログインの代わりに GET / を送り続ける（同じ数の接続による負荷の比較用）
+
+    cd backend
+    python -m benchmarks.bench_login_flood [--clients 20] [--duration 5] [--cpu 0] [--no-limits] [--control]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import List
+
+from benchmarks.common import ADMIN_LOGIN, running_server, summarize, use_temporary_database
+
+PROBE_INTERVAL = 0.01
+
+# --no-limits で使うレート制限（実質なし）
+NO_LIMITS_ENV = {
+    "LOGIN_RATE_PER_IP_BURST": "1000000",
+    "LOGIN_RATE_PER_IP_PER_MINUTE": "1000000",
+    "LOGIN_RATE_PER_USER_BURST": "1000000",
+    "LOGIN_RATE_PER_USER_PER_MINUTE": "1000000",
+}
+
+
+async def _probe(client, event_code: str, duration: float) -> List[float]:
+    """公開イベント情報を一定の間隔で取得し、各回の応答時間（ミリ秒）を返す"""
+    latencies = []
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        started = time.perf_counter()
+        response = await client.get(f"/api/events/{event_code}")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+    return latencies
+
+
+async def _run(base_url: str, event_code: str, clients: int, idle: float, duration: float, control: bool):
+    import httpx
+
+    statuses: Counter = Counter()
+    stopped = asyncio.Event()
+
+    async def flood(index: int):
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+            while not stopped.is_set():
+                if control:
+                    response = await client.get("/")
+                else:
+                    response = await client.post(
+                        "/api/admin/login",
+                        data={"username": ADMIN_LOGIN["username"], "password": f"wrong{index}"},
+                    )
+                statuses[response.status_code] += 1
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        idle_latencies = await _probe(client, event_code, idle)
+
+        tasks = [asyncio.create_task(flood(i)) for i in range(clients)]
+        await asyncio.sleep(0.5)
+        flood_latencies = await _probe(client, event_code, duration)
+        stopped.set()
+        await asyncio.gather(*tasks)
+
+    return idle_latencies, flood_latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20, help="フラッドを送るクライアントの数")
+    parser.add_argument("--idle", type=float, default=3, help="負荷なしで計測する秒数")
+    parser.add_argument("--duration", type=float, default=5, help="フラッド中に計測する秒数")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--cpu", type=int, help="サーバーをこのCPUだけで動かす（Linuxのみ）")
+    parser.add_argument("--no-limits", action="store_true", help="ログインのレート制限を実質なしにして起動")
+    parser.add_argument("--control", action="store_true", help="ログインの代わりに GET / を送り続ける")
+    args = parser.parse_args()
+
+    use_temporary_database()
+    import httpx
+
+    env = NO_LIMITS_ENV if args.no_limits else None
+    with running_server(args.port, env=env, cpu=args.cpu) as base_url:
+        # フラッドで管理者のログインが制限される前にイベントを作成しておく
+        token = httpx.post(f"{base_url}/api/admin/login", data=ADMIN_LOGIN).json()["access_token"]
+        event = httpx.post(
+            f"{base_url}/api/admin/events",
+            json={"name": "ベンチマーク", "issue_location": "東京"},
+            headers={"Authorization": f"Bearer {token}"},
+        ).json()
+
+        idle, flood, statuses = asyncio.run(
+            _run(base_url, event["event_code"], args.clients, args.idle, args.duration, args.control)
+        )
+
+    target = "GET /" if args.control else "POST /api/admin/login"
+    limits = "off" if args.no_limits else "on"
+    print(f"{args.clients} clients flooding {target}, login rate limits {limits}")
+    print(f"  idle   {summarize(idle)}")
+    print(f"  flood  {summarize(flood)}")
+    print(f"  flood responses by status: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    main()
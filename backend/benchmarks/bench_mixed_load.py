@@ -0,0 +1,99 @@
+"""
+読み込みと保存が混在する負荷での応答時間（p50 / p95 / p99）
+
+uvicorn（ワーカー1つ）を起動し、rows 件の免許証があるイベントに対して、次の3種類の
+リクエストをそれぞれ一定の間隔で duration 秒間送る（オープンループ：応答を待たずに次を送る）。
+    heavy       深いOFFSETのページ（/paginated の最終ページ付近。遅いクエリ）
+    light_read  20件のカーソルページ（/cursor）
+    save        免許証の保存（/save）
+遅いクエリがイベントループを止めると、軽い読み込みと保存の裾の応答時間が伸びる。
+
+    cd backend
+    python -m benchmarks.bench_mixed_load [--rows 400000] [--duration 20] [--heavy-rps 3] [--cpu 0] [--group-commit]
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from benchmarks.common import ADMIN_LOGIN, running_server, seed_uniform_licenses, summarize, use_temporary_database
+
+
+async def _run_load(base_url: str, event_code: str, rows: int, rates: Dict[str, float], duration: float) -> Dict[str, List[float]]:
+    import httpx
+
+    latencies: Dict[str, List[float]] = {kind: [] for kind in rates}
+    errors: Dict[str, int] = {kind: 0 for kind in rates}
+
+    async def send(client: httpx.AsyncClient, kind: str):
+        started = time.perf_counter()
+        if kind == "heavy":
+            response = await client.get(f"/api/licenses/{event_code}/paginated", params={"page": rows // 100 - 1, "per_page": 100})
+        elif kind == "light_read":
+            response = await client.get(f"/api/licenses/{event_code}/cursor", params={"limit": 20})
+        else:
+            response = await client.post(
+                f"/api/licenses/{event_code}/save",
+                files={"license_image": ("license.png", b"PNG")},
+                data={"pet_name": "ポチ", "owner_name": "山田 太郎"},
+            )
+        if response.status_code != 200:
+            errors[kind] += 1
+            return
+        latencies[kind].append((time.perf_counter() - started) * 1000)
+
+    async def generate(client: httpx.AsyncClient, kind: str):
+        tasks = []
+        interval = 1 / rates[kind]
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            tasks.append(asyncio.create_task(send(client, kind)))
+            await asyncio.sleep(interval)
+        await asyncio.gather(*tasks)
+
+    limits = httpx.Limits(max_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await asyncio.gather(*(generate(client, kind) for kind, rate in rates.items() if rate > 0))
+
+    for kind, count in errors.items():
+        if count:
+            print(f"[MixedLoad] {kind}: {count} request(s) failed")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=400000, help="イベントの免許証の件数")
+    parser.add_argument("--duration", type=float, default=20, help="負荷をかける秒数")
+    parser.add_argument("--heavy-rps", type=float, default=3, help="深いOFFSETのページの毎秒リクエスト数")
+    parser.add_argument("--read-rps", type=float, default=40, help="カーソルページの毎秒リクエスト数")
+    parser.add_argument("--save-rps", type=float, default=20, help="保存の毎秒リクエスト数")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cpu", type=int, help="サーバーをこのCPUだけで動かす（Linuxのみ）")
+    parser.add_argument("--group-commit", action="store_true", help="SQLITE_GROUP_COMMIT=true でサーバーを起動")
+    args = parser.parse_args()
+
+    use_temporary_database()
+    import httpx
+
+    env = {"SQLITE_GROUP_COMMIT": "true" if args.group_commit else "false"}
+    with running_server(args.port, env=env, cpu=args.cpu) as base_url:
+        token = httpx.post(f"{base_url}/api/admin/login", data=ADMIN_LOGIN).json()["access_token"]
+        event = httpx.post(
+            f"{base_url}/api/admin/events",
+            json={"name": "ベンチマーク", "issue_location": "東京"},
+            headers={"Authorization": f"Bearer {token}"},
+        ).json()
+        seed_uniform_licenses(event["id"], args.rows)
+
+        rates = {"heavy": args.heavy_rps, "light_read": args.read_rps, "save": args.save_rps}
+        latencies = asyncio.run(_run_load(base_url, event["event_code"], args.rows, rates, args.duration))
+
+    print(f"{args.rows} rows, {args.duration:.0f}s, rates {rates}, group commit {args.group_commit}")
+    for kind, values in latencies.items():
+        if rates[kind] > 0:
+            print(f"  {kind:<10} {summarize(values)}")
+
+
+if __name__ == "__main__":
+    main()
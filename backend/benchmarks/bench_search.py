@@ -0,0 +1,163 @@
+"""
+免許証検索（search_license_rows）の応答時間：FTS5 trigram索引 と LIKEでの走査
+
+100k件（検索するイベントに90k件、別のイベントに10k件）のランダムな免許証を投入し、
+検索語ごとにリポジトリの呼び出し時間（limit 50）の p50 / p95 を計測する。
+    FTS (IN)    現在の実装（id IN (MATCHのサブクエリ) でイベントの索引を新しい順にたどる）
+    FTS (JOIN)  MATCHの結果と免許証を結合する形（プランの選択の確認用）
+    LIKE        検索索引を使わず、イベント内を各カラムのLIKEで絞り込む
+すべての方式で結果が一致することを確認し、最後にINとJOINのクエリプランを表示する。
+
+    cd backend
+    python -m benchmarks.bench_search [--rows 100000] [--repeat 30]
+"""
+import argparse
+import asyncio
+import random
+import time
+from statistics import median
+from typing import List
+
+from benchmarks.common import admin_headers, app_client, create_event, percentile, seed_licenses, use_temporary_database
+
+FAMILY_NAMES = ["田中", "佐藤", "鈴木", "高橋", "伊藤", "渡辺", "山本", "中村", "小林", "加藤", "吉田", "山田", "佐々木", "山口", "松本"]
+GIVEN_NAMES = ["太郎", "花子", "健", "美咲", "翔太", "さくら", "大輔", "陽菜"]
+PET_NAMES = ["ポチ", "タマ", "モモ", "ココ", "ソラ", "レオ", "マロン", "チョコ", "ハナ", "ムギ", "Max", "Bella", "Charlie", "Luna"]
+BREEDS = ["柴犬", "トイプードル", "チワワ", "ミニチュアダックスフンド", "ラブラドール", "スコティッシュフォールド", "マンチカン", "雑種", "Golden Retriever"]
+
+# 検索語（選択性の高い語・1件だけの語・一致しない語・複数語・多くが一致する語・3文字未満の語）
+QUERIES = ["佐々木", "マロン12", "ミニチュア", "golden", "12345", "佐藤 ダックス", "存在しない名前", "ポチ", "健"]
+
+
+def _random_rows(count: int, searched_share: float) -> List[tuple]:
+    """(検索するイベントか, 免許証の内容) のリスト（乱数のシードは固定）"""
+    random.seed(1)
+    rows = []
+    for i in range(1, count + 1):
+        rows.append((i <= count * searched_share, {
+            "receipt_number": "%04d" % i,
+            "pet_name": random.choice(PET_NAMES) + str(random.randint(1, 999)),
+            "owner_name": random.choice(FAMILY_NAMES) + " " + random.choice(GIVEN_NAMES),
+            "breed": random.choice(BREEDS),
+        }))
+    return rows
+
+
+def _like_statement(event_id: int, query: str):
+    """検索索引を使わない検索（各語がいずれかのカラムに含まれるもの）"""
+    from sqlalchemy import or_
+
+    from app.repositories import licenses as license_repository
+
+    stmt = license_repository.license_rows_statement(event_id)
+    for term in query.split():
+        stmt = stmt.where(or_(*(c.icontains(term, autoescape=True) for c in license_repository.LICENSE_SEARCH_COLUMNS)))
+    return stmt
+
+
+def _join_statement(event_id: int, query: str):
+    """FTSの結果と免許証を結合する形（3文字以上の語のみの検索語で使う）"""
+    from sqlalchemy import literal_column
+
+    from app.models.database_models import License
+    from app.repositories import licenses as license_repository
+
+    phrases = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+    fts = license_repository.licenses_fts
+    return (
+        license_repository.license_rows_statement(event_id)
+        .join(fts, fts.c.rowid == License.id)
+        .where(literal_column("licenses_fts").op("MATCH")(phrases))
+    )
+
+
+async def _measure(run, repeat: int):
+    """run() を repeat 回実行し、(p50, p95, 最後の結果) を返す"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = await run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return median(timings), percentile(timings, 0.95), rows
+
+
+async def _benchmark(event_id: int, repeat: int, limit: int):
+    from app.database import AsyncSessionLocal, async_engine
+    from app.repositories import licenses as license_repository
+
+    # テストクライアントのイベントループで作った接続を使わないよう、接続プールを作り直す
+    await async_engine.dispose()
+
+    def cell(result) -> str:
+        return f"{result[0]:7.1f}/{result[1]:7.1f}" if result else f"{'-':>15}"
+
+    print(f"{'query':<16}{'hits':>5}  {'FTS (IN) p50/p95':>16}  {'FTS (JOIN) p50/p95':>18}  {'LIKE p50/p95 ms':>16}")
+    async with AsyncSessionLocal() as db:
+        for query in QUERIES:
+            fts = await _measure(lambda: license_repository.search_license_rows(db, event_id, query, limit=limit), repeat)
+            like = await _measure(lambda: _execute(db, _like_statement(event_id, query).limit(limit)), max(3, repeat // 3))
+            expected = {row.id for row in like[2]}
+            assert {row.id for row in fts[2]} == expected, query
+
+            join = None
+            if all(len(term) >= license_repository.SEARCH_MIN_NGRAM for term in query.split()):
+                join = await _measure(lambda: _execute(db, _join_statement(event_id, query).limit(limit)), max(3, repeat // 3))
+                assert {row.id for row in join[2]} == expected, query
+
+            print(f"{query:<16}{len(fts[2]):>5}  {cell(fts):>16}  {cell(join):>18}  {cell(like):>16}")
+
+        for label, stmt in (
+            ("IN", license_repository.license_rows_statement(event_id).where(
+                license_repository.License.id.in_(_fts_rowids('"マロン12"'))
+            )),
+            ("JOIN", _join_statement(event_id, "マロン12")),
+        ):
+            plan = await db.execute(_explain(db, stmt.limit(limit)))
+            print(f"\nquery plan ({label}):")
+            for row in plan:
+                print(f"  {row[-1]}")
+
+
+def _fts_rowids(phrases: str):
+    from sqlalchemy import literal_column, select
+
+    from app.repositories.licenses import licenses_fts
+
+    return select(licenses_fts.c.rowid).where(literal_column("licenses_fts").op("MATCH")(phrases))
+
+
+def _explain(db, stmt):
+    from sqlalchemy import text
+
+    compiled = stmt.compile(db.bind, compile_kwargs={"literal_binds": True})
+    return text(f"EXPLAIN QUERY PLAN {compiled}")
+
+
+async def _execute(db, stmt):
+    return (await db.execute(stmt)).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="投入する免許証の件数（9割を検索するイベントに入れる）")
+    parser.add_argument("--repeat", type=int, default=30, help="FTSの計測回数（LIKE・JOINはその1/3）")
+    parser.add_argument("--limit", type=int, default=50, help="検索の最大件数")
+    args = parser.parse_args()
+
+    use_temporary_database()
+    with app_client() as client:
+        headers = admin_headers(client)
+        searched = create_event(client, headers, "検索するイベント")
+        other = create_event(client, headers, "別のイベント")
+
+    rows = _random_rows(args.rows, 0.9)
+    started = time.perf_counter()
+    seed_licenses(searched["id"], [row for in_searched, row in rows if in_searched])
+    seed_licenses(other["id"], [row for in_searched, row in rows if not in_searched])
+    print(f"seeded {args.rows} licenses (FTS triggers on) in {time.perf_counter() - started:.1f}s")
+
+    asyncio.run(_benchmark(searched["id"], args.repeat, args.limit))
+
+
+if __name__ == "__main__":
+    main()
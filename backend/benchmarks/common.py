@@ -0,0 +1,184 @@
+"""
+ベンチマークの共通処理
+
+各ベンチマークは backend ディレクトリから python -m benchmarks.<名前> で実行する。
+一時ディレクトリのSQLiteと開発モード（ローカル保存）を使い、.env のデータベース・S3には触れない。
+use_temporary_database() は app をインポートする前に呼び出すこと。
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+# backend ディレクトリ（app パッケージの親）
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+ADMIN_LOGIN = {"username": "admin", "password": "admin123"}
+
+
+def use_temporary_database() -> Path:
+    """
+    一時ディレクトリのSQLiteと開発モードを環境変数で指定し、そのディレクトリに移動する
+    （保存画像 ./storage も一時ディレクトリに書かれる。終了時に削除）
+
+    Returns:
+        Path: SQLiteファイルのパス
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix="pet_license_bench_"))
+    database_path = work_dir / "pet_license.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["AWS_ACCESS_KEY_ID"] = ""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(work_dir)
+
+    import atexit
+    atexit.register(shutil.rmtree, work_dir, ignore_errors=True)
+    return database_path
+
+
+@contextmanager
+def app_client():
+    """lifespan を実行したテストクライアント（プロセス内でアプリを呼び出す）"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def admin_headers(client) -> Dict[str, str]:
+    response = client.post("/api/admin/login", data=ADMIN_LOGIN)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def create_event(client, headers: Dict[str, str], name: str = "ベンチマーク") -> dict:
+    response = client.post("/api/admin/events", json={"name": name, "issue_location": "東京"}, headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+
+def seed_uniform_licenses(event_id: int, count: int, start: int = 1) -> None:
+    """
+    同じ内容の免許証を count 件まとめて追加（SQLiteの再帰CTEで生成するため数百万件でも速い）
+
+    受付番号は start から連番。件数・一覧の版も進める（統計ロールアップは更新しない）
+    """
+    from sqlalchemy import text
+
+    from app.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO licenses (event_id, receipt_number, pet_name, owner_name, animal_type, breed, "
+            "birth_date, license_image_url, s3_license_key) "
+            "SELECT :event_id, printf('%04d', value), 'ポチ', '山田 太郎', 'dog', '柴犬', '2020-01-01', "
+            "'http://localhost:8000/storage/l/' || value || '.png', 'l/' || value || '.png' "
+            "FROM (WITH RECURSIVE s(value) AS (SELECT :start UNION ALL SELECT value + 1 FROM s WHERE value < :end) "
+            "SELECT value FROM s)"
+        ), {"event_id": event_id, "start": start, "end": start + count - 1})
+        _bump_event(conn, event_id, count)
+
+
+def seed_licenses(event_id: int, rows: List[dict], batch_size: int = 10000) -> None:
+    """
+    指定した内容の免許証を追加（rows は License のカラム名 → 値。license_image_url は省略可）
+
+    件数・一覧の版も進める（統計ロールアップは更新しない）
+    """
+    from sqlalchemy import insert
+
+    from app.database import engine
+    from app.models.database_models import License
+
+    with engine.begin() as conn:
+        for i in range(0, len(rows), batch_size):
+            conn.execute(insert(License), [
+                {"license_image_url": "http://localhost:8000/storage/l.png", **row, "event_id": event_id}
+                for row in rows[i:i + batch_size]
+            ])
+        _bump_event(conn, event_id, len(rows))
+
+
+def _bump_event(conn, event_id: int, count: int) -> None:
+    from sqlalchemy import update
+
+    from app.models.database_models import Event
+    from app.services.license_counter import license_counter
+
+    conn.execute(update(Event).where(Event.id == event_id).values(
+        license_count=Event.license_count + count,
+        receipt_counter=Event.receipt_counter + count,
+        license_version=Event.license_version + 1,
+    ))
+    license_counter.invalidate(event_id)
+
+
+@contextmanager
+def running_server(port: int, env: Optional[Dict[str, str]] = None, cpu: Optional[int] = None) -> Iterator[str]:
+    """
+    uvicorn（ワーカー1つ）を別プロセスで起動し、/health に応答するまで待つ
+
+    Args:
+        port: 待ち受けるポート
+        env: 追加・上書きする環境変数（DATABASE_URL などは use_temporary_database() の値を引き継ぐ）
+        cpu: 指定するとサーバーをこのCPUだけで動かす（Linuxのみ）
+
+    Yields:
+        str: ベースURL
+    """
+    import httpx
+
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--app-dir", str(BACKEND_DIR)]
+    process = subprocess.Popen(command, env={**os.environ, **(env or {})}, stdout=subprocess.DEVNULL)
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(process.pid, {cpu})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure_ms(func: Callable, repeat: int) -> List[float]:
+    """func を repeat 回呼び出した各回の時間（ミリ秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(values: List[float]) -> str:
+    """件数・p50・p95・p99・最大（ミリ秒）"""
+    if not values:
+        return "n=0"
+    return (
+        f"n={len(values)} p50={statistics.median(values):.1f} p95={percentile(values, 0.95):.1f} "
+        f"p99={percentile(values, 0.99):.1f} max={max(values):.1f} ms"
+    )
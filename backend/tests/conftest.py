@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# app の各モジュールは読み込み時に環境変数を参照するため、インポートより先に
+# 一時ディレクトリのSQLiteと開発モード（ローカル保存）を指定する（.env の値より優先される）
+_TEST_DIR = tempfile.mkdtemp(prefix="pet_license_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DIR}/pet_license.db"
+os.environ["AWS_ACCESS_KEY_ID"] = ""
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """lifespan（マイグレーション・初期管理者の作成・サービスの作成）を実行したテストクライアント"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    # 開発モードの保存画像（./storage, ./storage_cold）を一時ディレクトリに書く
+    cwd = os.getcwd()
+    os.chdir(_TEST_DIR)
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/api/admin/login", data={"username": "admin", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def event(client, admin_headers):
+    """テストごとの新しいイベント"""
+    response = client.post("/api/admin/events", json={"name": "テストイベント", "issue_location": "東京"}, headers=admin_headers)
+    assert response.status_code == 200
+    return response.json()
@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+from io import BytesIO
+
+import pytest
+from sqlalchemy import event as sqlalchemy_event
+
+from app.cli import main as cli_main
+from app.database import async_engine
+
+
+def _jpeg() -> bytes:
+    from PIL import Image
+
+    output = BytesIO()
+    Image.new("RGB", (64, 48), (200, 120, 40)).save(output, format="JPEG")
+    return output.getvalue()
+
+
+@contextmanager
+def _recorded_statements():
+    """APIの読み込み（非同期エンジン）で実行したSQL"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sqlalchemy_event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        sqlalchemy_event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _save(client, event_code: str) -> dict:
+    response = client.post(
+        f"/api/licenses/{event_code}/save",
+        files={"license_image": ("license.png", b"PNG"), "original_image": ("original.jpg", _jpeg())},
+        data={"pet_name": "ポチ", "owner_name": "飼い主"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _list_urls(event: dict):
+    return [f"/api/licenses/{event['event_code']}/paginated", f"/api/licenses/{event['event_code']}/new?since_id=0"]
+
+
+def test_get_endpoints_return_etag(client, event):
+    _save(client, event["event_code"])
+    for url in [f"/api/events/{event['event_code']}"] + _list_urls(event):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('W/"')
+        assert response.headers["cache-control"] == "no-cache"
+
+
+@pytest.mark.parametrize("form", ["weak", "list", "strong"])
+def test_matching_if_none_match_returns_bodiless_304_without_reading_licenses(client, event, form):
+    _save(client, event["event_code"])
+    for url in [f"/api/events/{event['event_code']}"] + _list_urls(event):
+        etag = client.get(url).headers["etag"]
+        if_none_match = {
+            "weak": etag,
+            "list": f'"other", {etag}',
+            "strong": etag.removeprefix("W/"),
+        }[form]
+
+        with _recorded_statements() as statements:
+            response = client.get(url, headers={"If-None-Match": if_none_match})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert not [s for s in statements if "FROM licenses" in s]
+
+
+def test_etag_mismatch_returns_200_and_reads_licenses(client, event):
+    _save(client, event["event_code"])
+    for url in _list_urls(event):
+        with _recorded_statements() as statements:
+            response = client.get(url, headers={"If-None-Match": 'W/"licenses-0-0"'})
+
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 1
+        assert [s for s in statements if "FROM licenses" in s]
+
+
+def test_list_etag_changes_after_save_delete_tiering_and_archive(client, admin_headers, event):
+    def etags():
+        return [client.get(url).headers["etag"] for url in _list_urls(event)]
+
+    seen = [etags()]
+
+    saved = _save(client, event["event_code"])
+    _save(client, event["event_code"])
+    seen.append(etags())
+
+    assert client.delete(f"/api/licenses/{saved['id']}").status_code == 200
+    seen.append(etags())
+
+    job = client.post("/api/admin/storage/tier-originals", json={"event_id": event["id"]}, headers=admin_headers).json()
+    assert client.get(f"/api/admin/jobs/{job['job_id']}", headers=admin_headers).json()["result"]["processed_objects"] == 1
+    seen.append(etags())
+
+    client.put(f"/api/admin/events/{event['id']}", json={"is_active": False}, headers=admin_headers)
+    assert cli_main(["archive", "--older-than-days", "0", "--event-id", str(event["id"])]) == 0
+    seen.append(etags())
+
+    # どの変更の後も、前のETagでは304にならない
+    for before, after in zip(seen, seen[1:]):
+        for old, new in zip(before, after):
+            assert old != new
+    for url, etag in zip(_list_urls(event), seen[-2]):
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_event_etag_changes_after_edit(client, admin_headers, event):
+    url = f"/api/events/{event['event_code']}"
+    etag = client.get(url).headers["etag"]
+
+    client.put(f"/api/admin/events/{event['id']}", json={"name": "改名したイベント"}, headers=admin_headers)
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["name"] == "改名したイベント"
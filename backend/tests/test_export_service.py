@@ -0,0 +1,37 @@
+import csv
+import io
+from datetime import date, datetime
+
+from app.repositories.licenses import LICENSE_EXPORT_FIELDS
+from app.services.export_service import _date_indexes, _text_indexes, csv_rows
+
+
+def _write_csv(fields, rows) -> list:
+    out = io.StringIO()
+    csv.writer(out).writerows(csv_rows(rows, _date_indexes(fields), _text_indexes(fields)))
+    return list(csv.reader(io.StringIO(out.getvalue())))
+
+
+def test_user_entered_values_cannot_become_formulas():
+    fields = ["receipt_number", "pet_name", "owner_name", "favorite_word", "favorite_food", "microchip_no"]
+    rows = [
+        ("0001", "=HYPERLINK(\"http://example.com\")", "+81-90", "-1", "@SUM(A1)", "\tx"),
+        ("0002", "\r=1+1", "ポチの飼い主", "a=b", None, "392-000"),
+    ]
+
+    assert _write_csv(fields, rows) == [
+        ["0001", "'=HYPERLINK(\"http://example.com\")", "'+81-90", "'-1", "'@SUM(A1)", "'\tx"],
+        ["0002", "'\r=1+1", "ポチの飼い主", "a=b", "", "392-000"],
+    ]
+
+
+def test_every_text_export_column_is_escaped():
+    for name in ("pet_name", "owner_name", "favorite_word", "favorite_food", "breed", "color"):
+        assert LICENSE_EXPORT_FIELDS.index(name) in _text_indexes(LICENSE_EXPORT_FIELDS)
+
+
+def test_dates_and_numbers_are_not_escaped():
+    fields = ["birth_date", "created_at", "confidence"]
+    rows = [(date(2020, 1, 2), datetime(2026, 1, 2, 3, 4, 5, 678000), -0.5)]
+
+    assert _write_csv(fields, rows) == [["2020-01-02", "2026-01-02T03:04:05.678000", "-0.5"]]
@@ -0,0 +1,28 @@
+from app.cli import IMPORT_TIME_BUDGET_MS
+from app.utils.import_time import measure_import_time
+
+# 初回の利用時・ウォームアップで読み込むSDK（app.main のインポートで読み込んではいけない）
+HEAVY_PACKAGES = ("openai", "boto3", "botocore", "PIL", "clarifai")
+
+# 計測のばらつき（他のプロセスの負荷など）を除くため、最も速かった回で予算と比べる
+MEASURE_RUNS = 5
+
+
+def _total_ms(timings) -> float:
+    return next(timing.cumulative_us for timing in timings if timing.module == "app.main") / 1000
+
+
+def test_app_main_does_not_import_heavy_sdks():
+    imported = {timing.module for timing in measure_import_time("app.main")}
+
+    heavy = sorted(
+        module for module in imported
+        if any(module == package or module.startswith(package + ".") for package in HEAVY_PACKAGES)
+    )
+    assert heavy == []
+
+
+def test_app_main_imports_within_budget():
+    best_ms = min(_total_ms(measure_import_time("app.main")) for _ in range(MEASURE_RUNS))
+
+    assert best_ms < IMPORT_TIME_BUDGET_MS
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import Base
+from app.models.database_models import Event, License
+from app.repositories.licenses import list_license_rows
+
+
+def _page_ids(created_ats, limit):
+    """created_ats の日時で免許証を保存し、limit 件ずつキーセットページングしたIDの並び"""
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            event = Event(name="テスト", issue_location="東京")
+            db.add(event)
+            await db.flush()
+            event_id = event.id
+            db.add_all(
+                License(event_id=event_id, pet_name=f"ペット{i}", owner_name="飼い主", license_image_url="x", created_at=created_at)
+                for i, created_at in enumerate(created_ats)
+            )
+            await db.commit()
+
+            pages, before = [], None
+            while True:
+                rows = await list_license_rows(db, event_id, limit=limit, before=before)
+                if not rows:
+                    break
+                pages.append([row.id for row in rows])
+                before = (rows[-1].created_at, rows[-1].id)
+        await engine.dispose()
+        return pages
+
+    return asyncio.run(run())
+
+
+def test_rows_sharing_one_second_are_neither_skipped_nor_repeated():
+    created_ats = [datetime(2026, 5, 1, 10, 0, 0, microsecond) for microsecond in (0, 250000, 250000, 500000, 750000)]
+    created_ats += [datetime(2026, 5, 1, 10, 0, 1), datetime(2026, 5, 1, 9, 59, 59, 999999)]
+
+    pages = _page_ids(created_ats, limit=2)
+
+    ids = [license_id for page in pages for license_id in page]
+    assert ids == [6, 5, 4, 3, 2, 1, 7]
+    assert all(len(page) <= 2 for page in pages)
+
+
+def test_cursor_inside_a_second_with_single_row_pages():
+    created_ats = [datetime(2026, 5, 1, 10, 0, 0, 100000 * i) for i in range(1, 6)]
+
+    assert _page_ids(created_ats, limit=1) == [[5], [4], [3], [2], [1]]
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+class StubS3Service:
+    """アップロードせずにキー・URLだけを返すストレージ"""
+
+    def __init__(self):
+        self.uploaded = 0
+
+    async def upload_image(self, image_data, filename=None, content_type="image/png", event_code=None):
+        self.uploaded += 1
+        key = f"events/{event_code}/licenses/{self.uploaded}.png"
+        return {"key": key, "url": f"http://localhost:8000/storage/{key}"}
+
+    async def upload_original_image(self, image_data, filename=None, event_code=None, content_addressed=None):
+        raise AssertionError("オリジナル画像は送っていない")
+
+
+@pytest.fixture
+def stub_s3(client, monkeypatch):
+    stub = StubS3Service()
+    monkeypatch.setattr(client.app.state.services, "s3", stub)
+    return stub
+
+
+def test_concurrent_saves_get_gapless_unique_receipt_numbers(client, event, stub_s3):
+    def save(i):
+        return client.post(
+            f"/api/licenses/{event['event_code']}/save",
+            files={"license_image": ("license.png", b"PNG")},
+            data={"pet_name": f"ペット{i}", "owner_name": "飼い主"},
+        )
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        responses = list(executor.map(save, range(200)))
+
+    assert [r.status_code for r in responses] == [200] * 200
+    assert stub_s3.uploaded == 200
+
+    receipt_numbers = sorted(int(r.json()["receipt_number"]) for r in responses)
+    assert receipt_numbers == list(range(1, 201))
+
+    # 保存された免許証の受付番号も 1..200 で、イベントの件数と一致する
+    listed = client.get(f"/api/licenses/{event['event_code']}").json()
+    assert sorted(int(item["receipt_number"]) for item in listed) == list(range(1, 201))
+    assert client.get(f"/api/licenses/{event['event_code']}/paginated").json()["total"] == 200
@@ -162,6 +162,7 @@ export interface LicenseSaveRequest {
   favoriteFood?: string
   favoriteWord?: string
   microchipNo?: string
+  confidence?: number
 }
 
 export interface LicenseSaveResponse {
@@ -188,6 +189,7 @@ export const saveLicense = async (data: LicenseSaveRequest): Promise<LicenseSave
   if (data.favoriteFood) formData.append('favorite_food', data.favoriteFood)
   if (data.favoriteWord) formData.append('favorite_word', data.favoriteWord)
   if (data.microchipNo) formData.append('microchip_no', data.microchipNo)
+  if (data.confidence !== undefined) formData.append('confidence', String(data.confidence))
 
   const response = await apiClient.post<LicenseSaveResponse>(
     `/licenses/${data.eventCode}/save`,
@@ -265,6 +267,45 @@ export const listNewLicensesByEventId = async (
   return response.data
 }
 
+export interface LicenseStreamHandlers {
+  onCreated: (item: LicenseData, totalCount: number) => void
+  onDeleted: (licenseId: number, totalCount: number) => void
+  // 取りこぼしを再送できない場合（サーバー再起動など）に呼ばれる。一覧を再読み込みする
+  onReset: () => void
+  // 接続・再接続のたびに呼ばれる。一覧の読み込みから接続までに保存された分を /new で取り込む
+  onOpen?: () => void
+  // 切断されたときに呼ばれる（ブラウザが自動で再接続する。再接続できない場合もある）
+  onError?: () => void
+}
+
+// 免許証の追加・削除をServer-Sent Eventsで購読する
+// 切断時はブラウザが Last-Event-ID を付けて自動再接続し、取りこぼし分が再送される
+const subscribeLicenseStream = (path: string, handlers: LicenseStreamHandlers): EventSource => {
+  const source = new EventSource(`${API_BASE_URL}${path}`)
+  source.addEventListener('open', () => handlers.onOpen?.())
+  source.addEventListener('error', () => handlers.onError?.())
+  source.addEventListener('created', (e) => {
+    const data = JSON.parse((e as MessageEvent).data)
+    handlers.onCreated(data.item, data.total_count)
+  })
+  source.addEventListener('deleted', (e) => {
+    const data = JSON.parse((e as MessageEvent).data)
+    handlers.onDeleted(data.id, data.total_count)
+  })
+  source.addEventListener('reset', () => handlers.onReset())
+  return source
+}
+
+export const subscribeLicenses = (
+  eventCode: string,
+  handlers: LicenseStreamHandlers
+): EventSource => subscribeLicenseStream(`/licenses/${eventCode}/stream`, handlers)
+
+export const subscribeLicensesByEventId = (
+  eventId: number,
+  handlers: LicenseStreamHandlers
+): EventSource => subscribeLicenseStream(`/licenses/by-event-id/${eventId}/stream`, handlers)
+
 export const deleteLicense = async (licenseId: number): Promise<void> => {
   await apiClient.delete(`/licenses/${licenseId}`)
 }